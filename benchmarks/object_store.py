@@ -0,0 +1,201 @@
+"""
+Local stand-in for an S3-compatible object store.
+
+    python -m benchmarks.object_store --root shared_cache --access-key test --secret-key secret
+
+Serves path-style GET, HEAD, PUT and DELETE requests for
+/<bucket>/<key> from a directory (one subdirectory per bucket), enough for
+the s3:// shared cache tier (see src.cache.ObjectStoreCache). With
+credentials set, requests must carry a valid AWS Signature Version 4
+Authorization header. Latency can be added to mimic a remote store.
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from hashlib import sha256
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from src.cache import sigv4_signature
+
+
+DEFAULT_PORT = 9000
+
+AUTHORIZATION = re.compile(r"AWS4-HMAC-SHA256 Credential=([^/]+)/\d{8}/([^/]+)/s3/aws4_request, "
+                           r"SignedHeaders=([^,]+), Signature=([0-9a-f]+)")
+
+
+class ObjectStoreHandler(BaseHTTPRequestHandler):
+    """Answer one object request from the store directory."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._handle()
+
+    def do_HEAD(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_DELETE(self):
+        self._handle()
+
+    def _handle(self):
+        server = self.server
+        body = b''
+        if self.command == 'PUT':
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if server.latency:
+            time.sleep(server.latency)
+
+        parts = urllib.parse.urlsplit(self.path)
+        if not self._authorized(parts, body):
+            server.count('denied')
+            return self._send(403, b"SignatureDoesNotMatch")
+        path = server.object_path(urllib.parse.unquote(parts.path))
+        if path is None:
+            return self._send(400, b"InvalidObjectName")
+
+        server.count(self.command.lower())
+        if self.command == 'PUT':
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(body)
+            tmp.replace(path)
+            return self._send(200, b"")
+        if self.command == 'DELETE':
+            path.unlink(missing_ok=True)
+            return self._send(204, b"")
+        if not path.is_file():
+            return self._send(404, b"NoSuchKey")
+        self._send(200, path.read_bytes())
+
+    def _authorized(self, parts, body):
+        """Check the request's Signature Version 4 against the configured credentials."""
+        server = self.server
+        if server.access_key is None:
+            return True
+        match = AUTHORIZATION.fullmatch(self.headers.get('Authorization', ''))
+        if match is None:
+            return False
+        access_key, region, signed, signature = match.groups()
+        headers = {name: self.headers.get(name, '') for name in signed.split(';')}
+        if access_key != server.access_key or headers.get('x-amz-content-sha256') is None:
+            return False
+        if self.command == 'PUT' and headers['x-amz-content-sha256'] != sha256(body).hexdigest():
+            return False
+        expected = sigv4_signature(server.secret_key, region, self.command, parts.path, headers, parts.query)
+        return expected == signature
+
+    def _send(self, status, content):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class ObjectStoreServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the store directory, credentials and request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, root, access_key=None, secret_key=None, latency=0.0, verbose=False):
+        super().__init__(address, ObjectStoreHandler)
+        self.root = Path(root)
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.latency = latency
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def object_path(self, path):
+        """Return the file of /bucket/key, or None for paths outside the store."""
+        bucket, _, key = path.lstrip('/').partition('/')
+        if not bucket or not key or '..' in Path(key).parts:
+            return None
+        return self.root / bucket / key
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def make_server(root, host='127.0.0.1', port=DEFAULT_PORT, access_key=None, secret_key=None,
+                latency=0.0, verbose=False):
+    """
+    Create an object store server (call serve_forever, or run it in a thread).
+
+    Args:
+        root: Directory holding one subdirectory per bucket
+        host, port: Address to listen on (port 0 picks a free one)
+        access_key, secret_key: Credentials requests must be signed with
+            (None: accept anonymous requests)
+        latency: Seconds to wait before every response
+        verbose: Log every request
+    """
+    if (access_key is None) != (secret_key is None):
+        raise ValueError("Set both access_key and secret_key, or neither")
+    return ObjectStoreServer((host, port), root, access_key, secret_key, latency, verbose)
+
+
+def create_parser():
+    """Create the argument parser of the object store."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.object_store',
+        description='Serve a directory as a local S3-compatible object store.')
+    parser.add_argument('--root', default='object_store',
+                        help="Directory of buckets (default: object_store)")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--access-key', help="Access key requests must be signed with")
+    parser.add_argument('--secret-key', help="Secret key requests must be signed with")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--verbose', '-v', action='store_true', help="Log every request")
+    return parser
+
+
+def main(argv=None):
+    """Run the server until interrupted."""
+    args = create_parser().parse_args(argv)
+    try:
+        server = make_server(args.root, args.host, args.port, args.access_key, args.secret_key,
+                             args.latency, args.verbose)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+
+    print(f"✓ Serving {args.root} on {server.url}")
+    print("Use it as the shared cache with:")
+    print(f"  export CACHE_SHARED=s3://<bucket>/<prefix> CACHE_S3_ENDPOINT={server.url}")
+    if args.access_key:
+        print(f"  export AWS_ACCESS_KEY_ID={args.access_key} AWS_SECRET_ACCESS_KEY=<secret key>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n✓ Served {server.stats}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
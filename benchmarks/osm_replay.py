@@ -0,0 +1,320 @@
+"""
+Local record/replay stand-in for the Overpass and Nominatim APIs.
+
+    python -m benchmarks.osm_replay record --cassette osm_cassette
+    python -m benchmarks.osm_replay replay --cassette osm_cassette --latency 0.2 --error-rate 0.1
+
+Requests to /overpass/... and /nominatim/... are forwarded to the real
+services in record mode and every response is stored in the cassette
+directory; replay mode answers them from the cassette without network
+access. Point the poster generator at the server with the OVERPASS_URL and
+NOMINATIM_URL environment variables (printed on start). Latency, bandwidth,
+injected errors and the Overpass slot status are configurable, so fetch,
+retry and rate-limit behavior can be benchmarked and tested reproducibly.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+
+# Real servers behind each path prefix
+UPSTREAMS = {
+    'overpass': 'https://overpass-api.de',
+    'nominatim': 'https://nominatim.openstreetmap.org',
+}
+
+# Bytes written per throttled chunk when a bandwidth is set
+CHUNK_SIZE = 16 * 1024
+
+DEFAULT_PORT = 8765
+
+
+def request_key(service, method, path, body=b''):
+    """
+    Return the cassette key of a request.
+
+    Query parameters and form-encoded bodies are compared as sorted
+    key/value pairs, so parameter order does not matter.
+    """
+    parts = urlsplit(path)
+    query = sorted(parse_qsl(parts.query, keep_blank_values=True))
+    try:
+        form = sorted(parse_qsl(body.decode('utf-8'), keep_blank_values=True, strict_parsing=True))
+    except (UnicodeDecodeError, ValueError):
+        form = hashlib.sha256(body).hexdigest()
+    text = json.dumps([service, method, parts.path.rstrip('/'), query, form])
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+
+def overpass_status(slot_wait=0):
+    """
+    Return an Overpass /status page; with slot_wait seconds the next slot is
+    that far away, otherwise slots are available now (as OSMnx parses it).
+    """
+    now = datetime.now(timezone.utc)
+    if slot_wait > 0:
+        free = (now + timedelta(seconds=slot_wait)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        slots = f"Slot available after: {free}, in {int(slot_wait)} seconds."
+    else:
+        slots = "2 slots available now."
+    return (f"Connected as: 0\nCurrent time: {now.strftime('%Y-%m-%dT%H:%M:%SZ')}\n"
+            f"Announced endpoint: none\nRate limit: 2\n{slots}\nCurrently running queries "
+            f"(pid, space limit, time limit, start time):\n")
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serve one request from the cassette (or the upstream server when recording)."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._handle(b'')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self._handle(self.rfile.read(length))
+
+    def _handle(self, body):
+        server = self.server
+        settings = server.settings
+        service, _, rest = self.path.lstrip('/').partition('/')
+        path = '/' + rest
+        if service not in server.upstreams:
+            return self._send(404, b"Unknown service; use /overpass/... or /nominatim/...",
+                              'text/plain')
+
+        server.count('requests')
+        if (service == 'overpass' and urlsplit(path).path.rstrip('/').endswith('/status')
+                and settings['mode'] == 'replay'):
+            return self._send(200, overpass_status(settings['slot_wait']).encode('utf-8'),
+                              'text/plain')
+
+        with server.lock:
+            inject = server.rng.random() < settings['error_rate']
+        if inject:
+            server.count('injected_errors')
+            return self._send(settings['error_status'], b"Injected error", 'text/plain',
+                              {'Retry-After': '1'})
+
+        key = request_key(service, self.command, path, body)
+        if settings['mode'] == 'record':
+            try:
+                status, content_type, content = self._forward(service, path, body)
+            except (urllib.error.URLError, OSError) as e:
+                # Unreachable or timed out: nothing worth recording
+                server.count('upstream_errors')
+                return self._send(502, f"Upstream error: {e}".encode('utf-8'), 'text/plain')
+            server.save(key, {
+                'service': service,
+                'method': self.command,
+                'path': path,
+                'status': status,
+                'content_type': content_type,
+            }, content)
+            server.count('recorded')
+        else:
+            entry = server.load(key)
+            if entry is None:
+                server.count('missing')
+                return self._send(404, f"Not recorded: {self.command} /{service}{path}".encode('utf-8'),
+                                  'text/plain')
+            meta, content = entry
+            status, content_type = meta['status'], meta['content_type']
+            server.count('replayed')
+        self._send(status, content, content_type)
+
+    def _forward(self, service, path, body):
+        """
+        Send the request to the real service; returns (status, content type,
+        body). Raises URLError or OSError when it cannot be reached in time.
+        """
+        request = urllib.request.Request(
+            self.server.upstreams[service] + path,
+            data=body if self.command == 'POST' else None,
+            method=self.command,
+            headers={name: value for name, value in self.headers.items()
+                     if name.lower() in ('user-agent', 'content-type', 'accept', 'referer')})
+        try:
+            with urllib.request.urlopen(request, timeout=self.server.settings['timeout']) as response:
+                return response.status, response.headers.get('Content-Type', ''), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('Content-Type', ''), e.read()
+
+    def _send(self, status, content, content_type, headers=None):
+        """Send a response after the configured latency, throttled to the bandwidth."""
+        settings = self.server.settings
+        if settings['latency']:
+            time.sleep(settings['latency'])
+        self.send_response(status)
+        self.send_header('Content-Type', content_type or 'application/octet-stream')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        bandwidth = settings['bandwidth']
+        if not bandwidth:
+            self.wfile.write(content)
+            return
+        for start in range(0, len(content), CHUNK_SIZE):
+            chunk = content[start:start + CHUNK_SIZE]
+            time.sleep(len(chunk) / bandwidth)
+            self.wfile.write(chunk)
+            self.wfile.flush()
+
+    def log_message(self, format, *args):
+        if self.server.settings['verbose']:
+            super().log_message(format, *args)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the cassette, the settings and request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, cassette_dir, settings, upstreams=None):
+        super().__init__(address, ReplayHandler)
+        self.cassette_dir = Path(cassette_dir)
+        self.settings = settings
+        self.upstreams = dict(upstreams or UPSTREAMS)
+        self.rng = random.Random(settings['seed'])
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def save(self, key, meta, content):
+        """Store a response in the cassette (body first, so entries are never partial)."""
+        self.cassette_dir.mkdir(parents=True, exist_ok=True)
+        (self.cassette_dir / f"{key}.body").write_bytes(content)
+        tmp = self.cassette_dir / f"{key}.json.tmp"
+        tmp.write_text(json.dumps(meta, indent=2))
+        tmp.replace(self.cassette_dir / f"{key}.json")
+
+    def load(self, key):
+        """Return (meta, body) of a recorded response, or None."""
+        meta_file = self.cassette_dir / f"{key}.json"
+        if not meta_file.exists():
+            return None
+        return json.loads(meta_file.read_text()), (self.cassette_dir / f"{key}.body").read_bytes()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def make_server(cassette_dir, mode='replay', host='127.0.0.1', port=DEFAULT_PORT, latency=0.0,
+                bandwidth=None, error_rate=0.0, error_status=429, slot_wait=0, seed=0,
+                timeout=180, upstreams=None, verbose=False):
+    """
+    Create a record/replay server (call serve_forever, or run it in a thread).
+
+    Args:
+        cassette_dir: Directory holding the recorded responses
+        mode: 'record' forwards to the real services and stores responses,
+            'replay' answers from the cassette only (404 if not recorded)
+        host, port: Address to listen on (port 0 picks a free one)
+        latency: Seconds to wait before every response
+        bandwidth: Response body rate limit in bytes per second (None: unlimited)
+        error_rate: Share of requests answered with error_status instead
+        error_status: HTTP status of injected errors (429 and 504 make
+            OSMnx pause and retry)
+        slot_wait: Seconds until the next Overpass slot in replayed /status
+            pages, which OSMnx waits before each query
+        seed: Seed of the error injection
+        timeout: Upstream request timeout in seconds when recording
+        upstreams: Service name -> base URL, defaults to UPSTREAMS
+        verbose: Log every request
+    """
+    if mode not in ('record', 'replay'):
+        raise ValueError(f"Unknown mode '{mode}', expected 'record' or 'replay'")
+    if not 0 <= error_rate <= 1:
+        raise ValueError("error_rate must be between 0 and 1")
+    settings = {
+        'mode': mode,
+        'latency': latency,
+        'bandwidth': bandwidth,
+        'error_rate': error_rate,
+        'error_status': error_status,
+        'slot_wait': slot_wait,
+        'seed': seed,
+        'timeout': timeout,
+        'verbose': verbose,
+    }
+    return ReplayServer((host, port), cassette_dir, settings, upstreams)
+
+
+def endpoint_settings(server):
+    """Return the OVERPASS_URL and NOMINATIM_URL values pointing at server."""
+    return {
+        'OVERPASS_URL': f"{server.url}/overpass/api",
+        'NOMINATIM_URL': f"{server.url}/nominatim",
+    }
+
+
+def create_parser():
+    """Create the argument parser of the replay server."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.osm_replay',
+        description='Record and replay Overpass and Nominatim responses locally.')
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('--cassette', default='osm_cassette',
+                        help="Directory of recorded responses (default: osm_cassette)")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--bandwidth', type=float, help="Response rate limit in bytes per second")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Share of requests answered with an injected error (0-1)")
+    parser.add_argument('--error-status', type=int, default=429,
+                        help="HTTP status of injected errors (default: 429)")
+    parser.add_argument('--slot-wait', type=float, default=0,
+                        help="Seconds until the next Overpass slot in replayed status pages")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the error injection")
+    parser.add_argument('--verbose', '-v', action='store_true', help="Log every request")
+    return parser
+
+
+def main(argv=None):
+    """Run the server until interrupted."""
+    args = create_parser().parse_args(argv)
+    try:
+        server = make_server(args.cassette, args.mode, args.host, args.port, args.latency,
+                             args.bandwidth, args.error_rate, args.error_status, args.slot_wait,
+                             args.seed, verbose=args.verbose)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+
+    action = "Recording to" if args.mode == 'record' else "Replaying"
+    print(f"✓ {action} {args.cassette} on {server.url}")
+    print("Point the poster generator at it with:")
+    for name, value in endpoint_settings(server).items():
+        print(f"  export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n✓ Served {json.dumps(server.stats)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
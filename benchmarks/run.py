@@ -0,0 +1,241 @@
+"""
+Run the renderer benchmarks on synthetic cities and write a JSON report.
+
+    python -m benchmarks.run --sizes 10k,100k --output report.json
+    python -m benchmarks.run --baseline baseline.json
+
+Every case renders a synthetic city (see benchmarks.synthetic_city) without
+network access. render_poster cases are timed per sub-stage with the
+profiler of src.profiling; all_themes cases run generate_all_themes with the
+map fetch replaced by the synthetic city. With --baseline the report is
+compared case by case and the exit status is 1 if any case got slower by
+more than --tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from src import poster_generator
+from src.profiling import profile_report, profiling
+from src.renderer import render_poster
+from src.theme import load_fonts, load_theme
+
+from .synthetic_city import LAYOUTS, SIZES, synthetic_city
+
+
+BENCHMARKS = ('render_poster', 'all_themes')
+
+# Output of every case: a small poster, so geometry work is not drowned by pixel fill
+BENCH_FIGSIZE = (12, 16)
+BENCH_DPI = 100
+BENCH_THEME = 'terracotta'
+
+# Slowdown (fraction of the baseline time) above which a case is a regression
+DEFAULT_TOLERANCE = 0.15
+
+
+def _quietly(func, *args, **kwargs):
+    """Call func with its progress output suppressed."""
+    with redirect_stdout(StringIO()):
+        return func(*args, **kwargs)
+
+
+def bench_render_poster(city, output_dir, dpi, figsize):
+    """Render one PNG poster; returns the profile report of the run."""
+    point, graph, water, parks = city
+    theme = _quietly(load_theme, BENCH_THEME)
+    fonts = _quietly(load_fonts)
+    output_file = os.path.join(output_dir, 'poster.png')
+    with profiling() as profile:
+        _quietly(render_poster, 'Synthetic', 'Benchmark', point, graph, water, parks,
+                 theme, fonts, output_file, 'png', dpi=dpi, figsize=figsize)
+    return profile_report(profile)
+
+
+def bench_all_themes(city, output_dir, dpi, figsize):
+    """Render the city in every theme with generate_all_themes; returns the profile report."""
+    point, graph, water, parks = city
+    resources = (point, None, graph, water, parks)
+    with mock.patch.object(poster_generator, 'fetch_map_resources', return_value=resources), \
+            mock.patch.object(poster_generator, 'POSTERS_DIR', output_dir):
+        with profiling() as profile:
+            result = _quietly(poster_generator.generate_all_themes, 'Synthetic', 'Benchmark',
+                              0, 'png', dpi, figsize)
+    if result['failed']:
+        raise RuntimeError(f"{result['failed']} themes failed to render")
+    return profile_report(profile)
+
+
+def run_case(benchmark, layout, size, repeat=3, dpi=BENCH_DPI, figsize=BENCH_FIGSIZE):
+    """
+    Run one benchmark case repeat times on a fresh synthetic city.
+
+    Returns the case entry of the report: run times, the min and median,
+    and the per-stage wall times and geometry counts of the fastest run.
+    """
+    started = time.perf_counter()
+    city = synthetic_city(layout, SIZES[size])
+    build_s = time.perf_counter() - started
+
+    func = {'render_poster': bench_render_poster, 'all_themes': bench_all_themes}[benchmark]
+    reports = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            reports.append(func(city, output_dir, dpi, figsize))
+
+    fastest = min(reports, key=lambda report: report['wall_s'])
+    runs = [report['wall_s'] for report in reports]
+    return {
+        'benchmark': benchmark,
+        'layout': layout,
+        'size': size,
+        'edges': city[1].number_of_edges(),
+        'build_s': round(build_s, 6),
+        'runs_s': runs,
+        'min_s': min(runs),
+        'median_s': statistics.median(runs),
+        'max_rss_mb': max(report['max_rss_mb'] for report in reports),
+        'stages': {name: entry['wall_s'] for name, entry in fastest['summary'].items()},
+        'counts': fastest['counts'],
+    }
+
+
+def run_benchmarks(benchmarks=BENCHMARKS, layouts=LAYOUTS, sizes=('10k', '100k'),
+                   all_themes_sizes=('10k',), repeat=3, dpi=BENCH_DPI, figsize=BENCH_FIGSIZE):
+    """
+    Run every benchmark x layout x size case and return the report dict.
+
+    all_themes renders each city once per theme, so it only runs at the
+    sizes in all_themes_sizes.
+    """
+    cases = {}
+    for benchmark in benchmarks:
+        for size in sizes:
+            if benchmark == 'all_themes' and size not in all_themes_sizes:
+                continue
+            for layout in layouts:
+                name = f"{benchmark}/{layout}/{size}"
+                print(f"Running {name}...")
+                cases[name] = run_case(benchmark, layout, size, repeat, dpi, figsize)
+                print(f"✓ {name}: {cases[name]['min_s']:.3f}s "
+                      f"(median {cases[name]['median_s']:.3f}s, {cases[name]['edges']:,} edges)")
+
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpus': os.cpu_count(),
+        },
+        'settings': {'repeat': repeat, 'dpi': dpi, 'figsize': list(figsize), 'theme': BENCH_THEME},
+        'cases': cases,
+    }
+
+
+def compare_reports(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare the cases of report with those of baseline by fastest run time.
+
+    Returns a list of dicts (case, baseline_s, current_s, ratio, regression)
+    for the cases both reports contain; ratio is current / baseline and a
+    case is a regression if it exceeds 1 + tolerance.
+    """
+    rows = []
+    for name, case in report['cases'].items():
+        base = baseline.get('cases', {}).get(name)
+        if base is None:
+            continue
+        ratio = case['min_s'] / base['min_s'] if base['min_s'] else float('inf')
+        rows.append({
+            'case': name,
+            'baseline_s': base['min_s'],
+            'current_s': case['min_s'],
+            'ratio': round(ratio, 3),
+            'regression': ratio > 1 + tolerance,
+        })
+    return rows
+
+
+def print_comparison(rows):
+    """Print a comparison from compare_reports, one line per case."""
+    for row in rows:
+        flag = "⚠ slower" if row['regression'] else ""
+        print(f"  {row['case']:<32} {row['baseline_s']:8.3f}s -> {row['current_s']:8.3f}s "
+              f"x{row['ratio']:.2f} {flag}")
+
+
+def _names(value, allowed):
+    names = [name.strip().lower() for name in value.split(',') if name.strip()]
+    if names == ['all']:
+        return list(allowed)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown {', '.join(unknown)} (choose from {', '.join(allowed)} or 'all')")
+    return names
+
+
+def create_parser():
+    """Create the argument parser of the benchmark runner."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.run',
+        description='Network-free renderer benchmarks on synthetic cities.')
+    parser.add_argument('--benchmarks', type=lambda value: _names(value, BENCHMARKS),
+                        default=list(BENCHMARKS), help="Comma-separated benchmarks (default: all)")
+    parser.add_argument('--layouts', type=lambda value: _names(value, LAYOUTS),
+                        default=list(LAYOUTS), help="Comma-separated city layouts (default: all)")
+    parser.add_argument('--sizes', type=lambda value: _names(value, SIZES),
+                        default=['10k', '100k'],
+                        help="Comma-separated city sizes: 10k, 100k, 1m (default: 10k,100k)")
+    parser.add_argument('--all-themes-sizes', type=lambda value: _names(value, SIZES),
+                        default=['10k'], help="Sizes the all_themes benchmark runs at (default: 10k)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case (default: 3)")
+    parser.add_argument('--dpi', type=int, default=BENCH_DPI, help=f"Poster DPI (default: {BENCH_DPI})")
+    parser.add_argument('--output', '-o', default='benchmark_report.json',
+                        help="Report file (default: benchmark_report.json)")
+    parser.add_argument('--baseline', help="Report to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed slowdown before a case counts as a regression "
+                             f"(default: {DEFAULT_TOLERANCE})")
+    return parser
+
+
+def main(argv=None):
+    """Run the benchmarks; returns the exit status."""
+    args = create_parser().parse_args(argv)
+    if args.repeat < 1:
+        print("Error: --repeat must be at least 1")
+        return 2
+
+    report = run_benchmarks(args.benchmarks, args.layouts, args.sizes, args.all_themes_sizes,
+                            args.repeat, args.dpi)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Benchmark report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare_reports(report, baseline, args.tolerance)
+        print(f"Compared with {args.baseline}:")
+        print_comparison(rows)
+        if any(row['regression'] for row in rows):
+            print(f"⚠ {sum(row['regression'] for row in rows)} case(s) slower than the baseline "
+                  f"by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
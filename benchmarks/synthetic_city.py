@@ -0,0 +1,178 @@
+"""
+Deterministic synthetic cities for network-free benchmarks.
+
+synthetic_city builds a street network plus water and park polygons in the
+types fetch_map_data returns (an unprojected OSMnx-style MultiDiGraph and
+two GeoDataFrames in EPSG:4326), so everything downstream of the fetch runs
+unchanged. The same layout, size and seed always give the same city.
+"""
+
+import geopandas as gpd
+import networkx as nx
+import numpy as np
+import shapely
+from scipy.spatial import Delaunay
+
+
+LAYOUTS = ('grid', 'radial', 'organic')
+
+# Benchmark sizes by name, in directed graph edges
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# City center and street spacing (about 110 m) in degrees
+CENTER = (40.0, -3.0)
+BLOCK = 0.001
+
+# Road classes by rank in the street hierarchy, rank 0 most important
+HIERARCHY = ['motorway', 'primary', 'secondary', 'tertiary', 'residential', 'service', 'footway']
+
+
+def _grid_rank(index):
+    """Rank of grid line index: every 20th a motorway down to plain residential."""
+    for every, rank in ((20, 0), (10, 1), (5, 2), (3, 3)):
+        if index % every == 0:
+            return rank
+    return 4
+
+
+def _grid(edges, rng):
+    """Square street grid; returns node coordinates (x, y), edges (u, v) and ranks."""
+    # An n x n grid of two-way streets has 4 n (n - 1) directed edges
+    n = max(2, int(round((1 + np.sqrt(1 + edges)) / 2)))
+    i, j = np.divmod(np.arange(n * n), n)
+    nodes = np.column_stack((i, j)) * BLOCK
+
+    ids = np.arange(n * n).reshape(n, n)
+    across = np.column_stack((ids[:-1, :].ravel(), ids[1:, :].ravel()))
+    along = np.column_stack((ids[:, :-1].ravel(), ids[:, 1:].ravel()))
+    ranks = np.concatenate((
+        [_grid_rank(k) for k in np.tile(np.arange(n), n - 1)],
+        [_grid_rank(k) for k in np.repeat(np.arange(n), n - 1)],
+    ))
+    return nodes, np.concatenate((across, along)), ranks
+
+
+def _radial(edges, rng):
+    """Concentric rings joined by spokes, with twice as many spokes as rings."""
+    # rings x spokes nodes, each with one ring and one spoke street (two-way)
+    rings = max(2, int(round(np.sqrt(edges / 8))))
+    spokes = 2 * rings
+    ring, spoke = np.divmod(np.arange(rings * spokes), spokes)
+    radius = (ring + 1) * BLOCK
+    angle = spoke * 2 * np.pi / spokes
+    nodes = np.column_stack((radius * np.cos(angle), radius * np.sin(angle)))
+    nodes = np.vstack((nodes, [[0.0, 0.0]]))
+    center = rings * spokes
+
+    ids = np.arange(rings * spokes).reshape(rings, spokes)
+    around = np.column_stack((ids.ravel(), np.roll(ids, -1, axis=1).ravel()))
+    out = np.column_stack((np.concatenate(([center] * spokes, ids[:-1].ravel())), ids.ravel()))
+    ring_ranks = np.repeat([0 if r == rings - 1 else 2 if r % 8 == 7 else 4 for r in range(rings)],
+                           spokes)
+    spoke_ranks = np.tile([1 if s % 8 == 0 else 3 if s % 2 == 0 else 4 for s in range(spokes)],
+                          rings)
+    return nodes, np.concatenate((around, out)), np.concatenate((ring_ranks, spoke_ranks))
+
+
+def _organic(edges, rng):
+    """Jittered points joined by a thinned Delaunay triangulation."""
+    # A Delaunay triangulation has about 3 edges per point; 80% are kept
+    count = max(8, int(edges / (2 * 3 * 0.8)))
+    side = int(np.ceil(np.sqrt(count)))
+    i, j = np.divmod(np.arange(count), side)
+    nodes = (np.column_stack((i, j)) + rng.uniform(-0.4, 0.4, (count, 2))) * BLOCK
+
+    simplices = Delaunay(nodes).simplices
+    pairs = np.sort(np.vstack((simplices[:, [0, 1]], simplices[:, [1, 2]], simplices[:, [0, 2]])), axis=1)
+    pairs = np.unique(pairs, axis=0)
+    length = np.linalg.norm(nodes[pairs[:, 0]] - nodes[pairs[:, 1]], axis=1)
+    pairs = pairs[(length < 2 * BLOCK) & (rng.random(len(pairs)) < 0.8)]
+
+    # Rarer, more important classes; footways and service roads fill in
+    ranks = rng.choice(len(HIERARCHY), size=len(pairs), p=[0.01, 0.04, 0.08, 0.12, 0.5, 0.15, 0.1])
+    return nodes, pairs, ranks
+
+
+def _curved(start, end, rng, vertices=5):
+    """Gently bowed LineStrings from start to end (arrays of points)."""
+    t = np.linspace(0, 1, vertices)
+    bow = rng.uniform(-0.15, 0.15, (len(start), 1)) * np.sin(t * np.pi)
+    delta = end - start
+    normal = np.column_stack((-delta[:, 1], delta[:, 0]))
+    coords = (start[:, None, :] + delta[:, None, :] * t[None, :, None]
+              + normal[:, None, :] * bow[:, :, None])
+    return shapely.linestrings(coords)
+
+
+def _polygons(bounds, count, rng, max_size):
+    """count irregular polygons scattered over bounds, some of them overlapping."""
+    west, south, east, north = bounds
+    centers = rng.uniform((west, south), (east, north), (count, 2))
+    angles = np.sort(rng.uniform(0, 2 * np.pi, (count, 12)), axis=1)
+    radii = rng.uniform(0.4, 1.0, (count, 12)) * rng.uniform(0.2, 1.0, (count, 1)) * max_size
+    rings = centers[:, None, :] + radii[:, :, None] * np.stack((np.cos(angles), np.sin(angles)), axis=2)
+    rings = np.concatenate((rings, rings[:, :1]), axis=1)
+    return shapely.polygons(rings)
+
+
+def synthetic_city(layout='grid', edges=10_000, seed=0):
+    """
+    Build a synthetic city.
+
+    layout is 'grid', 'radial' or 'organic'; edges is the target number of
+    directed graph edges (streets are two-way, so about half as many
+    streets), matched to within a few percent. Organic streets carry curved
+    'geometry' like simplified OSMnx edges; grid and radial streets are
+    straight. A few highway tags are lists, as OSM returns for merged ways.
+
+    Returns:
+        Tuple of (point, graph, water, parks) with point the (lat, lon)
+        center, i.e. the coordinates plus the fetch_map_data result
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout '{layout}', expected one of {', '.join(LAYOUTS)}")
+    rng = np.random.default_rng(seed)
+    builders = {'grid': _grid, 'radial': _radial, 'organic': _organic}
+    nodes, pairs, ranks = builders[layout](edges, rng)
+
+    lat0, lon0 = CENTER
+    nodes = nodes - nodes.mean(axis=0) + (lon0, lat0)
+
+    # Edges with a 'geometry' are what simplified OSMnx graphs hold, and
+    # ox.project_graph only projects edge geometry when the graph says so
+    graph = nx.MultiDiGraph(crs='epsg:4326', simplified=layout == 'organic')
+    graph.add_nodes_from((k, {'x': x, 'y': y}) for k, (x, y) in enumerate(nodes.tolist()))
+
+    merged = rng.random(len(pairs)) < 0.01
+    highway = [[HIERARCHY[rank], 'residential'] if merge else HIERARCHY[rank]
+               for rank, merge in zip(ranks.tolist(), merged.tolist())]
+
+    u, v = pairs[:, 0], pairs[:, 1]
+    attrs = [{'highway': tag, 'oneway': False} for tag in highway]
+    if layout == 'organic':
+        forward = _curved(nodes[u], nodes[v], rng)
+        backward = shapely.reverse(forward)
+        for attr, fwd in zip(attrs, forward):
+            attr['geometry'] = fwd
+        graph.add_edges_from(zip(u.tolist(), v.tolist(), attrs))
+        graph.add_edges_from(zip(v.tolist(), u.tolist(),
+                                 [dict(attr, geometry=bwd) for attr, bwd in zip(attrs, backward)]))
+    else:
+        graph.add_edges_from(zip(u.tolist(), v.tolist(), attrs))
+        graph.add_edges_from(zip(v.tolist(), u.tolist(), [dict(attr) for attr in attrs]))
+
+    bounds = (*nodes.min(axis=0), *nodes.max(axis=0))
+    extent = max(bounds[2] - bounds[0], bounds[3] - bounds[1])
+    scale = max(1, graph.number_of_edges() // 2_000)
+    lakes = _polygons(bounds, 2 + scale // 4, rng, extent * 0.06)
+    river = shapely.buffer(shapely.linestrings(np.column_stack((
+        np.linspace(bounds[0], bounds[2], 50),
+        (bounds[1] + bounds[3]) / 2 + np.sin(np.linspace(0, 3 * np.pi, 50)) * extent * 0.1,
+    ))), extent * 0.01)
+    water = gpd.GeoDataFrame(
+        {'natural': ['water'] * len(lakes) + [None], 'waterway': [None] * len(lakes) + ['riverbank']},
+        geometry=list(lakes) + [river], crs='epsg:4326')
+    green = _polygons(bounds, 3 + scale, rng, extent * 0.03)
+    parks = gpd.GeoDataFrame({'leisure': ['park'] * len(green)}, geometry=list(green), crs='epsg:4326')
+
+    return (lat0, lon0), graph, water, parks
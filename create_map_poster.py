@@ -11,8 +11,7 @@ from src import (
     parse_resolution,
     create_parser,
     validate_args,
-    generate_single_poster,
-    generate_all_themes,
+    get_render_options,
     DEFAULT_FIGSIZE,
     DEFAULT_DPI
 )
@@ -20,6 +19,10 @@ from src import (
 
 def main():
     """Main entry point for the map poster generator."""
+    if sys.argv[1:2] == ['cache']:
+        from src.bundle import main as cache_main
+        sys.exit(cache_main(sys.argv[2:]))
+    
     parser = create_parser()
     args = parser.parse_args()
     
@@ -47,11 +50,56 @@ def main():
         dpi = DEFAULT_DPI
         print(f"✓ Using default DPI: {dpi}")
     
+    render_options = get_render_options(args)
+    
+    try:
+        if args.profile or args.profile_trace:
+            generate_profiled(args, dpi, figsize, render_options)
+        else:
+            generate(args, dpi, figsize, render_options)
+    finally:
+        report_cache_usage(args.cache_metrics)
+
+
+def generate_profiled(args, dpi, figsize, render_options):
+    """Run generate() under the profiler and write the requested reports."""
+    from src.profiling import profiling, write_profile, print_profile_summary
+    profile = None
+    try:
+        with profiling(memory=args.profile_memory) as profile:
+            generate(args, dpi, figsize, render_options)
+    finally:
+        # Also written when generation fails, to show where it got to; not
+        # when the profiler itself failed to start
+        if profile is not None:
+            report = write_profile(profile, args.profile, args.profile_trace)
+            print_profile_summary(report)
+
+
+def report_cache_usage(metrics_file=None):
+    """Print the cache hit/miss summary of this run and optionally write Prometheus metrics."""
+    from src.cache import cache_stats, format_cache_stats, write_cache_metrics
+    stats = cache_stats()
+    if stats:
+        print("Cache usage:")
+        print(format_cache_stats(stats))
+    if metrics_file:
+        write_cache_metrics(metrics_file)
+
+
+def generate(args, dpi, figsize, render_options):
+    """Generate the poster(s) requested on the command line."""
+    # The fetching and rendering stack only loads once the arguments are valid
+    from src import generate_single_poster, generate_all_themes
+    
     # Handle all-themes mode
     if args.all_themes:
         generate_all_themes(
             args.city, args.country, args.distance, 
-            args.format, dpi, figsize
+            args.format, dpi, figsize,
+            render_options=render_options,
+            display_city=args.display_city,
+            display_country=args.display_country
         )
         return
     
@@ -63,7 +111,10 @@ def main():
     try:
         output_file = generate_single_poster(
             args.city, args.country, args.theme, args.distance,
-            args.format, dpi, figsize
+            args.format, dpi, figsize,
+            render_options=render_options,
+            display_city=args.display_city,
+            display_country=args.display_country
         )
         
         print("\n" + "=" * 50)
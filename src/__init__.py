@@ -1,47 +1,71 @@
-"""Map poster generator package."""
+"""
+Map poster generator package.
+
+Exports load on first use, so importing the package (e.g. for the CLI's
+argument handling) does not pull in OSMnx, GeoPandas, Matplotlib or geopy.
+"""
+
+import importlib
 
 from .config import *
-from .cache import CacheError, cache_get, cache_set
-from .theme import load_theme, load_fonts, get_available_themes, list_themes
-from .geocoding import get_coordinates
-from .data_fetcher import fetch_map_data
-from .renderer import render_poster
-from .utils import (
-    generate_output_filename,
-    generate_city_folder_name,
-    parse_resolution,
-    calculate_dpi_from_resolution,
-    calculate_bbox
-)
-from .cli import create_parser, validate_args, print_examples
-from .poster_generator import (
-    render_single_poster,
-    fetch_map_resources,
-    generate_single_poster,
-    generate_all_themes
-)
-
-__all__ = [
-    'CacheError',
-    'cache_get',
-    'cache_set',
-    'load_theme',
-    'load_fonts',
-    'get_available_themes',
-    'list_themes',
-    'get_coordinates',
-    'fetch_map_data',
-    'render_poster',
-    'generate_output_filename',
-    'generate_city_folder_name',
-    'parse_resolution',
-    'calculate_dpi_from_resolution',
-    'calculate_bbox',
-    'create_parser',
-    'validate_args',
-    'print_examples',
-    'render_single_poster',
-    'fetch_map_resources',
-    'generate_single_poster',
-    'generate_all_themes',
-]
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    'CacheError': 'cache',
+    'cache_get': 'cache',
+    'cache_lock': 'cache',
+    'cache_set': 'cache',
+    'cache_stats': 'cache',
+    'cache_tiers': 'cache',
+    'reset_cache_stats': 'cache',
+    'write_cache_metrics': 'cache',
+    'export_bundle': 'bundle',
+    'import_bundle': 'bundle',
+    'load_theme': 'theme',
+    'load_fonts': 'theme',
+    'get_available_themes': 'theme',
+    'list_themes': 'theme',
+    'get_coordinates': 'geocoding',
+    'fetch_map_data': 'data_fetcher',
+    'prepare_scene': 'scene',
+    'render_poster': 'renderer',
+    'render_poster_tiled': 'tiling',
+    'render_poster_crop': 'tiling',
+    'render_poster_pyramid': 'pyramid',
+    'render_poster_vector': 'vector',
+    'render_poster_cached_body': 'body',
+    'render_poster_preview': 'preview',
+    'generate_output_filename': 'utils',
+    'generate_city_folder_name': 'utils',
+    'parse_resolution': 'utils',
+    'parse_crop': 'utils',
+    'calculate_dpi_from_resolution': 'utils',
+    'calculate_bbox': 'utils',
+    'profiling': 'profiling',
+    'stage': 'profiling',
+    'write_profile': 'profiling',
+    'create_parser': 'cli',
+    'validate_args': 'cli',
+    'get_render_options': 'cli',
+    'print_examples': 'cli',
+    'render_single_poster': 'poster_generator',
+    'fetch_map_resources': 'poster_generator',
+    'generate_single_poster': 'poster_generator',
+    'generate_all_themes': 'poster_generator',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """Import the submodule defining name on first access."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
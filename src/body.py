@@ -0,0 +1,129 @@
+"""Cached map-body rasters with a per-variant typography overlay."""
+
+import json
+from hashlib import md5
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from .cache import cache_get, cache_set, CacheError
+from .config import DEFAULT_DPI, DEFAULT_FIGSIZE
+from .profiling import stage
+from .renderer import agg_figure, build_scene, draw_typography, poster_transform
+from .tiling import build_tile_jobs, render_tile
+
+
+# Theme colors drawn in the body, besides the road_* colors
+BODY_THEME_KEYS = ('bg', 'gradient_color', 'water', 'parks')
+
+
+def map_body_key(scene_key, theme, figsize, dpi, scene_options=None):
+    """
+    Return the cache key of a map body.
+
+    scene_key identifies the map data (e.g. the fetch bbox); the body
+    colors of the theme, output size and geometry stages complete it, so
+    any change that alters a body pixel gets its own entry, while themes
+    differing only in text color or name share one.
+    """
+    colors = {name: color for name, color in theme.items()
+              if name in BODY_THEME_KEYS or name.startswith('road_')}
+    theme_hash = md5(json.dumps(colors, sort_keys=True).encode()).hexdigest()
+    options = json.dumps(scene_options or {}, sort_keys=True)
+    return f"map_body_{scene_key}_{theme_hash}_{figsize[0]}x{figsize[1]}_{dpi}_{options}"
+
+
+def encode_body(body):
+    """
+    Encode a map body as PNG bytes for the cache. Bodies are mostly flat
+    color, so this is a small fraction of the raw array (about 52 MB at
+    the default size), even at the fastest compression level.
+    """
+    buffer = BytesIO()
+    Image.fromarray(body).save(buffer, format='png', compress_level=1)
+    return buffer.getvalue()
+
+
+def decode_body(data):
+    """Return the (h, w, 3) uint8 array of a body encoded by encode_body."""
+    with Image.open(BytesIO(data)) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+def render_map_body(graph, water, parks, theme, figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI,
+                    scene_options=None):
+    """
+    Rasterize the map body (water, roads, parks and edge fades) without any
+    text. Returns a (h, w, 3) uint8 array of exactly figsize * dpi pixels.
+    scene_options are passed on to build_scene.
+    """
+    scene = build_scene(graph, water, parks, figsize, dpi, **(scene_options or {}))
+    poster_size = (int(figsize[0] * dpi), int(figsize[1] * dpi))
+    context = {
+        'theme': theme,
+        'figsize': figsize,
+        'dpi': dpi,
+        'typography': False,
+    }
+    rect = (0, 0, poster_size[0], poster_size[1])
+    job = next(build_tile_jobs(scene, [rect], poster_size, context))
+    return render_tile(job)
+
+
+def composite_typography(body, city, country, point, theme, fonts, output_file,
+                         dpi=DEFAULT_DPI, figsize=DEFAULT_FIGSIZE):
+    """
+    Draw the poster typography over a map body and save it as PNG.
+
+    The body is blitted unresampled and the text placed in poster pixels
+    like render_tile, so the result matches a full tiled render.
+    """
+    height, width = body.shape[:2]
+    with agg_figure(figsize=(width / dpi, height / dpi), dpi=dpi, facecolor=theme['bg']) as fig:
+        fig.figimage(body, 0, 0, origin='upper')
+        # Above the figure image, which figures otherwise draw last
+        ax = fig.add_axes((0, 0, 1, 1), zorder=1)
+        ax.set_axis_off()
+        draw_typography(ax, city, country, point, theme, fonts, figsize,
+                        transform=poster_transform(width, height))
+        with stage('rasterize'):
+            fig.canvas.draw()
+        pixels = np.asarray(fig.canvas.buffer_rgba())[:height, :width, :3]
+        with stage('encode'):
+            Image.fromarray(pixels).save(output_file, format='png', dpi=(dpi, dpi))
+
+
+def render_poster_cached_body(city, country, point, scene_key, load_map_data, theme, fonts,
+                              output_file, output_format, dpi=DEFAULT_DPI,
+                              figsize=DEFAULT_FIGSIZE, scene_options=None):
+    """
+    Render a PNG poster from a cached map body, rendering it first if needed.
+
+    load_map_data is called (returning graph, water, parks) only on a cache
+    miss, so text-only variants of a cached map skip fetching, scene
+    preparation and drawing and only composite their typography.
+    The output is exactly figsize * dpi pixels like render_poster_tiled.
+    """
+    if output_format.lower() != 'png':
+        raise ValueError("Cached map bodies only support PNG output")
+
+    key = map_body_key(scene_key, theme, figsize, dpi, scene_options)
+    cached = cache_get(key)
+    # Older entries hold the raw array; they are rendered and stored again
+    if isinstance(cached, bytes):
+        print("✓ Using cached map body")
+        body = decode_body(cached)
+    else:
+        print("Rendering map body...")
+        graph, water, parks = load_map_data()
+        body = render_map_body(graph, water, parks, theme, figsize, dpi, scene_options)
+        try:
+            cache_set(key, encode_body(body))
+        except CacheError as e:
+            print(e)
+
+    print(f"Saving to {output_file}...")
+    print(f"  Resolution: {body.shape[1]}x{body.shape[0]} pixels ({dpi} DPI)")
+    composite_typography(body, city, country, point, theme, fonts, output_file, dpi, figsize)
+    print(f"✓ Done! Poster saved as {output_file}")
@@ -0,0 +1,250 @@
+"""
+Cache bundles: selected cache entries in one compressed file, for warming
+the cache of another machine without downloading from Overpass again.
+
+    python create_map_poster.py cache export paris.zip --city "Paris, France"
+    python create_map_poster.py cache import paris.zip
+
+A bundle is a zip archive: manifest.json (the original keys and metadata
+of every entry) followed by one compressed member per entry file. The zip
+directory indexes the members, so import reads the manifest and then
+streams one entry at a time into CACHE_DIR.
+"""
+
+import argparse
+import json
+import pickle
+import re
+import sys
+import time
+import zipfile
+
+from . import cache
+from .config import CACHE_KEY_TYPES
+
+
+BUNDLE_FORMAT = 'mapposter-cache-bundle'
+BUNDLE_VERSION = 1
+MANIFEST = 'manifest.json'
+
+COMPRESSION = {
+    'deflate': zipfile.ZIP_DEFLATED,
+    'lzma': zipfile.ZIP_LZMA,
+    'none': zipfile.ZIP_STORED,
+}
+
+# Entry files are named by cache.cache_file
+ENTRY_FILE = re.compile(r"[0-9a-f]{32}\.pkl")
+
+# Map data keys name the fetch bbox as bbox_<west>_<south>_<east>_<north>
+BBOX_KEY = re.compile(r"bbox_(-?[\d.]+(?:e-?\d+)?)_(-?[\d.]+(?:e-?\d+)?)_(-?[\d.]+(?:e-?\d+)?)_(-?[\d.]+(?:e-?\d+)?)")
+
+
+def key_bbox(key):
+    """Return the (west, south, east, north) bbox named in a cache key, or None."""
+    match = BBOX_KEY.search(key or '')
+    return tuple(float(value) for value in match.groups()) if match else None
+
+
+def parse_city(text):
+    """Split 'City, Country' (the country after the last comma) into (city, country)."""
+    city, sep, country = text.rpartition(',')
+    if not sep or not city.strip() or not country.strip():
+        raise ValueError(f"Expected 'City, Country', got '{text}'")
+    return city.strip(), country.strip()
+
+
+def _cached_point(record):
+    """Return the (lat, lon) stored in a coords entry, or None."""
+    try:
+        lat, lon = pickle.loads((cache.CACHE_DIR / record['file']).read_bytes())
+        return float(lat), float(lon)
+    except Exception:
+        return None
+
+
+def _contains(bbox, point):
+    west, south, east, north = bbox
+    lat, lon = point
+    return west <= lon <= east and south <= lat <= north
+
+
+def _intersects(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def select_entries(index=None, layers=None, bbox=None, cities=None):
+    """
+    Return the index records (see cache.cache_index) to export, each with
+    its bbox (map data) or point (coordinates) added.
+
+    Args:
+        index: Records to choose from, defaults to every entry in CACHE_DIR
+        layers: Key types to keep (e.g. 'graph', 'water', 'coords')
+        bbox: (west, south, east, north); keeps map data whose fetch bbox
+            intersects it and coordinates inside it
+        cities: (city, country) pairs; keeps their coordinates and the map
+            data whose fetch bbox contains them (the coordinates must be
+            cached)
+
+    Entries matching any of bbox and cities, and one of layers, are kept;
+    without any filter everything is, including files whose key was never
+    recorded.
+    """
+    index = cache.cache_index() if index is None else index
+    points = {}
+    for city, country in cities or []:
+        key = f"coords_{city.lower()}_{country.lower()}"
+        record = next((r for r in index if r['key'] == key), None)
+        point = record and _cached_point(record)
+        if point is None:
+            print(f"⚠ No cached coordinates for {city}, {country}; generate a poster of it first")
+            continue
+        points[key] = point
+
+    selected = []
+    for record in index:
+        record = dict(record)
+        if record['type'] == 'coords':
+            record['point'] = _cached_point(record)
+        else:
+            record['bbox'] = key_bbox(record['key'])
+        if layers or bbox or cities:
+            if record['key'] is None or (layers and record['type'] not in layers):
+                continue
+            if (bbox or cities) and not _in_region(record, bbox, points):
+                continue
+        selected.append(record)
+    return selected
+
+
+def _in_region(record, bbox, points):
+    if record.get('point') is not None:
+        return record['key'] in points or (bbox is not None and _contains(bbox, record['point']))
+    if record.get('bbox') is None:
+        return False
+    return ((bbox is not None and _intersects(record['bbox'], bbox))
+            or any(_contains(record['bbox'], point) for point in points.values()))
+
+
+def export_bundle(path, entries, compression='deflate'):
+    """
+    Write the selected entries (from select_entries) to a bundle at path.
+    Entry files are streamed from CACHE_DIR; returns the manifest.
+    """
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': BUNDLE_VERSION,
+        'created': round(time.time(), 3),
+        'entries': entries,
+    }
+    with zipfile.ZipFile(path, 'w', COMPRESSION[compression]) as bundle:
+        bundle.writestr(MANIFEST, json.dumps(manifest, indent=2))
+        for entry in entries:
+            bundle.write(cache.CACHE_DIR / entry['file'], f"entries/{entry['file']}")
+    return manifest
+
+
+def read_manifest(bundle):
+    """Return the manifest of an open bundle (a zipfile.ZipFile)."""
+    try:
+        manifest = json.loads(bundle.read(MANIFEST))
+    except KeyError:
+        raise ValueError("Not a cache bundle (no manifest.json)") from None
+    if manifest.get('format') != BUNDLE_FORMAT or manifest.get('version', 0) > BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format')} v{manifest.get('version')}")
+    return manifest
+
+
+def import_bundle(path, overwrite=False):
+    """
+    Copy the entries of a bundle into the local cache (CACHE_DIR).
+
+    Each entry is streamed and decompressed straight into a temporary file
+    and renamed into place once its checksum has been verified, so memory
+    use does not grow with the bundle. Entries already cached are kept
+    unless overwrite. Returns (imported, skipped) counts.
+    """
+    local = cache.FilesystemCache(cache.CACHE_DIR)
+    imported = skipped = 0
+    with zipfile.ZipFile(path) as bundle:
+        for entry in read_manifest(bundle)['entries']:
+            if not ENTRY_FILE.fullmatch(entry['file']):
+                raise ValueError(f"Invalid entry file name in bundle: {entry['file']!r}")
+            if not overwrite and local.exists(entry['file']):
+                skipped += 1
+                continue
+            # Reading to the end checks the member's CRC before the rename
+            with bundle.open(f"entries/{entry['file']}") as stream:
+                local.set_stream(entry['file'], stream)
+            if entry['key'] is not None:
+                cache.index_key(entry['key'], entry['file'], entry['size'])
+            imported += 1
+    return imported, skipped
+
+
+def _parse_bbox(text):
+    try:
+        west, south, east, north = (float(value) for value in text.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError("Expected WEST,SOUTH,EAST,NORTH in degrees") from None
+    return west, south, east, north
+
+
+def create_parser():
+    """Create the argument parser of the cache commands."""
+    parser = argparse.ArgumentParser(
+        prog='create_map_poster.py cache',
+        description='Export and import bundles of cached map data.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='Write selected cache entries to a bundle')
+    export.add_argument('bundle', help='Bundle file to write (e.g. paris.zip)')
+    export.add_argument('--city', action='append', metavar='"CITY, COUNTRY"',
+                        help='Entries of a city whose coordinates are cached (repeatable)')
+    export.add_argument('--bbox', type=_parse_bbox, metavar='W,S,E,N',
+                        help='Entries whose fetch area intersects this region, in degrees')
+    export.add_argument('--layer', action='append', choices=CACHE_KEY_TYPES,
+                        help='Only entries of this key type (repeatable)')
+    export.add_argument('--compression', choices=sorted(COMPRESSION), default='deflate',
+                        help='Compression of the entries (default: deflate)')
+
+    load = commands.add_parser('import', help='Copy the entries of a bundle into the cache')
+    load.add_argument('bundle', help='Bundle file to read')
+    load.add_argument('--overwrite', action='store_true', help='Replace entries already cached')
+
+    show = commands.add_parser('list', help='List the entries of a bundle')
+    show.add_argument('bundle', help='Bundle file to read')
+    return parser
+
+
+def main(argv=None):
+    """Run a cache command; returns the exit status."""
+    args = create_parser().parse_args(argv)
+    try:
+        if args.command == 'export':
+            cities = [parse_city(text) for text in args.city or []]
+            entries = select_entries(layers=args.layer, bbox=args.bbox, cities=cities)
+            if not entries:
+                print("⚠ No cache entries match")
+                return 1
+            export_bundle(args.bundle, entries, args.compression)
+            size = sum(entry['size'] for entry in entries)
+            print(f"✓ Exported {len(entries)} entries ({size / 2 ** 20:.1f} MB) to {args.bundle}")
+        elif args.command == 'import':
+            imported, skipped = import_bundle(args.bundle, args.overwrite)
+            print(f"✓ Imported {imported} entries into {cache.CACHE_DIR}"
+                  + (f", kept {skipped} already cached" if skipped else ""))
+        else:
+            with zipfile.ZipFile(args.bundle) as bundle:
+                for entry in read_manifest(bundle)['entries']:
+                    print(f"  {entry['type'] or '-':<14} {entry['size'] / 2 ** 20:8.2f} MB  "
+                          f"{entry['key'] or entry['file']}")
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
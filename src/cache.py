@@ -1,10 +1,47 @@
-"""Caching functionality for map data."""
+"""
+Caching functionality for map data.
 
+Entries are looked up in tiers (see cache_tiers): an in-process memory
+cache, the local CACHE_DIR, and an optional shared tier (a directory,
+SQLite database or S3-compatible bucket, usually read-only). A hit in a
+slower tier is copied into the faster ones, so each machine warms its
+local cache from the shared one instead of from Overpass.
+
+Files are written to a temporary file and renamed into place, so readers
+never see a partial pickle. Entries that fail to load anyway (e.g. a disk
+filled up, or a file from an older version) are moved to the quarantine
+directory and reported as misses, so callers refetch them. cache_lock lets
+exactly one process fetch a missing entry while others wait for it.
+"""
+
+import hmac
+import io
+import json
+import os
 import pickle
-from hashlib import md5
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+from hashlib import md5, sha256
 from pathlib import Path
 
-from .config import CACHE_DIR
+from .config import (CACHE_DIR, CACHE_KEY_TYPES, CACHE_LATENCY_BUCKETS, CACHE_LOCK_TIMEOUT,
+                     CACHE_MEMORY_MB, CACHE_S3_ENDPOINT, CACHE_SHARED, CACHE_SHARED_WRITE)
+from .profiling import stage
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 
 class CacheError(Exception):
@@ -12,32 +49,731 @@ class CacheError(Exception):
     pass
 
 
+# The process umask, read once (os.umask can only be read by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Log of the key of every entry file written to CACHE_DIR (see index_key)
+INDEX_FILE = "index.jsonl"
+# The log is compacted to one line per entry file once it passes this size
+# and twice its size after this process last compacted it
+INDEX_COMPACT_BYTES = 2 ** 20
+INDEX_LOCK_TIMEOUT = 10.0
+_index_compacted_size = 0
+
+# Counters and latency histograms per key type, since process start or the
+# last reset_cache_stats()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
 def cache_file(key: str) -> str:
     """Generate cache filename from key."""
     encoded = md5(key.encode()).hexdigest()
     return f"{encoded}.pkl"
 
 
+def cache_key_type(name: str) -> str:
+    """Return the key type of a cache entry (its prefix, e.g. 'graph'), or 'other'."""
+    for key_type in CACHE_KEY_TYPES:
+        if name.startswith(f"{key_type}_"):
+            return key_type
+    return 'other'
+
+
+def _new_histogram():
+    return {'buckets': [0] * len(CACHE_LATENCY_BUCKETS), 'count': 0, 'sum': 0.0}
+
+
+def _record(name, counts, latency=None, latency_kind=None):
+    """Add counts (and one latency observation) to the stats of name's key type."""
+    with _stats_lock:
+        entry = _stats.get(cache_key_type(name))
+        if entry is None:
+            entry = _stats[cache_key_type(name)] = {
+                'hits': 0, 'misses': 0, 'writes': 0, 'errors': 0, 'corrupt': 0, 'promotions': 0,
+                'bytes_read': 0, 'bytes_written': 0,
+                'read_seconds': _new_histogram(), 'write_seconds': _new_histogram(),
+            }
+        for key, value in counts.items():
+            entry[key] += value
+        if latency is not None:
+            histogram = entry[latency_kind]
+            histogram['count'] += 1
+            histogram['sum'] += latency
+            for i, bound in enumerate(CACHE_LATENCY_BUCKETS):
+                if latency <= bound:
+                    histogram['buckets'][i] += 1
+
+
+def cache_stats() -> dict:
+    """
+    Return a snapshot of the cache counters per key type.
+
+    Each entry has hits, misses, writes, errors, corrupt (quarantined
+    entries, also counted as misses unless another tier had the data),
+    promotions (copies of hits into faster tiers), bytes_read,
+    bytes_written and the read_seconds (lookup and deserialize of hits) and write_seconds
+    histograms: cumulative bucket counts for CACHE_LATENCY_BUCKETS, count
+    and sum.
+    """
+    with _stats_lock:
+        return {key_type: {key: dict(value, buckets=list(value['buckets']))
+                           if isinstance(value, dict) else value
+                           for key, value in entry.items()}
+                for key_type, entry in _stats.items()}
+
+
+def reset_cache_stats() -> None:
+    """Clear all cache counters."""
+    with _stats_lock:
+        _stats.clear()
+
+
+class CacheBackend:
+    """
+    A cache tier: stores pickled entries as bytes under their cache_file name.
+
+    Subclasses implement get and set; read-only tiers (writable False) are
+    only looked up, and quarantine removes a corrupt entry where possible.
+    """
+
+    name = 'backend'
+
+    def __init__(self, writable=True):
+        self.writable = writable
+
+    def get(self, filename: str) -> bytes | None:
+        raise NotImplementedError
+
+    def set(self, filename: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def set_stream(self, filename: str, stream) -> None:
+        """Store the entry read from the binary file object stream."""
+        self.set(filename, stream.read())
+
+    def exists(self, filename: str) -> bool:
+        return self.get(filename) is not None
+
+    def quarantine(self, filename: str, data: bytes) -> bool:
+        """Remove the corrupt entry data stored under filename; return True if it was moved aside."""
+        return False
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r}, writable={self.writable})"
+
+
+class MemoryCache(CacheBackend):
+    """In-process tier keeping the most recently used entries up to max_bytes."""
+
+    name = 'memory'
+
+    def __init__(self, max_bytes):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        with self._lock:
+            data = self._entries.get(filename)
+            if data is not None:
+                self._entries.move_to_end(filename)
+            return data
+
+    def set(self, filename, data):
+        with self._lock:
+            old = self._entries.pop(filename, None)
+            if old is not None:
+                self._size -= len(old)
+            if len(data) > self.max_bytes:
+                return
+            self._entries[filename] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def quarantine(self, filename, data):
+        with self._lock:
+            if self._entries.get(filename) is data:
+                del self._entries[filename]
+                self._size -= len(data)
+        return False
+
+
+class FilesystemCache(CacheBackend):
+    """
+    One file per entry in a directory (CACHE_DIR, or a shared mount).
+
+    Entries are written to a temporary file and renamed into place, so
+    readers never see a partial pickle; corrupt entries are moved to the
+    directory's quarantine subdirectory.
+    """
+
+    def __init__(self, path, writable=True):
+        super().__init__(writable)
+        self.path = Path(path)
+        self.name = str(path)
+
+    def get(self, filename):
+        try:
+            return (self.path / filename).read_bytes()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        except OSError as e:
+            print(f"⚠ Cannot read cache entry {filename} in {self.name}: {e}")
+            return None
+
+    def exists(self, filename):
+        return (self.path / filename).exists()
+
+    def set(self, filename, data):
+        self.set_stream(filename, io.BytesIO(data))
+
+    def set_stream(self, filename, stream):
+        self.path.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=f"{Path(filename).stem}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(stream, f)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp files are private (0600); entries get the mode of any new file
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+            os.replace(tmp_path, self.path / filename)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def quarantine(self, filename, data):
+        path = self.path / filename
+        try:
+            # Leave an entry another process has rewritten meanwhile
+            if not self.writable or path.read_bytes() != data:
+                return False
+            quarantine_dir = self.path / "quarantine"
+            quarantine_dir.mkdir(exist_ok=True)
+            path.replace(quarantine_dir / f"{path.stem}_{time.time_ns()}.pkl")
+        except OSError:
+            # Another reader quarantined it first
+            return False
+        return True
+
+
+class SQLiteCache(CacheBackend):
+    """
+    All entries in one SQLite database file, e.g. a single-file shared
+    cache; read-only tiers open it in read-only mode.
+    """
+
+    def __init__(self, path, writable=True):
+        super().__init__(writable)
+        self.path = Path(path)
+        self.name = f"sqlite:///{path}"
+
+    def _connect(self):
+        if not self.writable:
+            return sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        return connection
+
+    def get(self, filename):
+        try:
+            connection = self._connect()
+        except sqlite3.OperationalError:
+            # A read-only database that does not exist (yet)
+            return None
+        with closing(connection):
+            try:
+                row = connection.execute("SELECT data FROM entries WHERE key = ?", (filename,)).fetchone()
+            except sqlite3.OperationalError:
+                return None
+        return None if row is None else bytes(row[0])
+
+    def exists(self, filename):
+        try:
+            with closing(self._connect()) as connection:
+                return connection.execute("SELECT 1 FROM entries WHERE key = ?", (filename,)).fetchone() is not None
+        except sqlite3.OperationalError:
+            return False
+
+    def set(self, filename, data):
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute("INSERT OR REPLACE INTO entries (key, data) VALUES (?, ?)",
+                                   (filename, sqlite3.Binary(data)))
+        except sqlite3.Error as e:
+            raise OSError(f"SQLite error in {self.path}: {e}") from e
+
+    def quarantine(self, filename, data):
+        if not self.writable:
+            return False
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM entries WHERE key = ? AND data = ?",
+                               (filename, sqlite3.Binary(data)))
+        return True
+
+
+def sigv4_signature(secret_key, region, method, path, headers, query=''):
+    """
+    Return the AWS Signature Version 4 signature of an S3 request.
+
+    headers are the signed headers (lowercase names, including host,
+    x-amz-date and x-amz-content-sha256, the payload's SHA-256); path is
+    the URL-encoded object path.
+    """
+    amz_date = headers['x-amz-date']
+    names = sorted(headers)
+    canonical = "\n".join([method, path, query, *(f"{name}:{headers[name].strip()}" for name in names),
+                           "", ";".join(names), headers['x-amz-content-sha256']])
+    to_sign = "\n".join(["AWS4-HMAC-SHA256", amz_date, f"{amz_date[:8]}/{region}/s3/aws4_request",
+                         sha256(canonical.encode('utf-8')).hexdigest()])
+    key = f"AWS4{secret_key}".encode('utf-8')
+    for part in (amz_date[:8], region, 's3', 'aws4_request'):
+        key = hmac.new(key, part.encode('utf-8'), sha256).digest()
+    return hmac.new(key, to_sign.encode('utf-8'), sha256).hexdigest()
+
+
+class ObjectStoreCache(CacheBackend):
+    """
+    Entries as objects in an S3-compatible bucket (AWS S3, MinIO, Ceph, or
+    benchmarks.object_store locally), addressed path-style as
+    endpoint/bucket/prefix/filename. Requests are signed with AWS
+    Signature Version 4 when access_key is set, anonymous otherwise.
+    """
+
+    def __init__(self, endpoint, bucket, prefix='', writable=False, access_key=None,
+                 secret_key=None, session_token=None, region='us-east-1', timeout=30):
+        super().__init__(writable)
+        self.endpoint = endpoint.rstrip('/')
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.session_token = session_token
+        self.region = region
+        self.timeout = timeout
+        self.name = f"s3://{bucket}/{self.prefix}"
+
+    def _path(self, filename):
+        key = f"{self.prefix}/{filename}" if self.prefix else filename
+        return urllib.parse.quote(f"/{self.bucket}/{key}", safe='/~')
+
+    def _signed_headers(self, method, path, data):
+        """Return the AWS Signature Version 4 headers of a request."""
+        amz_date = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        headers = {
+            'host': urllib.parse.urlsplit(self.endpoint).netloc,
+            'x-amz-content-sha256': sha256(data).hexdigest(),
+            'x-amz-date': amz_date,
+        }
+        if self.session_token:
+            headers['x-amz-security-token'] = self.session_token
+        signature = sigv4_signature(self.secret_key, self.region, method, path, headers)
+        headers['Authorization'] = (f"AWS4-HMAC-SHA256 Credential={self.access_key}/{amz_date[:8]}/"
+                                    f"{self.region}/s3/aws4_request, "
+                                    f"SignedHeaders={';'.join(sorted(headers))}, Signature={signature}")
+        # urllib sets Host itself
+        del headers['host']
+        return headers
+
+    def _request(self, method, filename, data=b''):
+        """Send a request; returns the response body, or None if there is no such object."""
+        path = self._path(filename)
+        headers = self._signed_headers(method, path, data) if self.access_key else {}
+        request = urllib.request.Request(self.endpoint + path, data=data if method == 'PUT' else None,
+                                         method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise OSError(f"{method} {self.name}/{filename} failed: HTTP {e.code}") from e
+        except urllib.error.URLError as e:
+            raise OSError(f"{method} {self.name}/{filename} failed: {e.reason}") from e
+
+    def get(self, filename):
+        try:
+            return self._request('GET', filename)
+        except OSError as e:
+            print(f"⚠ Shared cache unavailable: {e}")
+            return None
+
+    def exists(self, filename):
+        try:
+            return self._request('HEAD', filename) is not None
+        except OSError:
+            return False
+
+    def set(self, filename, data):
+        self._request('PUT', filename, data)
+
+    def quarantine(self, filename, data):
+        if not self.writable:
+            return False
+        try:
+            self._request('DELETE', filename)
+        except OSError:
+            return False
+        return True
+
+
+def open_backend(spec, writable=True):
+    """
+    Return the cache tier described by spec: a directory path,
+    sqlite:///path/to/cache.sqlite or s3://bucket/prefix (at
+    CACHE_S3_ENDPOINT, with credentials from the AWS_* environment
+    variables).
+    """
+    if spec.startswith('sqlite://'):
+        return SQLiteCache(spec[len('sqlite://'):], writable)
+    if spec.startswith('s3://'):
+        bucket, _, prefix = spec[len('s3://'):].partition('/')
+        region = os.environ.get('AWS_REGION', 'us-east-1')
+        return ObjectStoreCache(CACHE_S3_ENDPOINT or f"https://s3.{region}.amazonaws.com", bucket,
+                                prefix, writable, os.environ.get('AWS_ACCESS_KEY_ID'),
+                                os.environ.get('AWS_SECRET_ACCESS_KEY'),
+                                os.environ.get('AWS_SESSION_TOKEN'), region)
+    return FilesystemCache(spec, writable)
+
+
+# Tier stack of the current configuration; rebuilt when CACHE_DIR or the
+# tier settings change (e.g. tests pointing the cache elsewhere)
+_tiers = (None, [])
+_tiers_lock = threading.Lock()
+
+
+def cache_tiers() -> list:
+    """
+    Return the cache tiers in lookup order: memory (CACHE_MEMORY_MB), the
+    local CACHE_DIR, then the shared CACHE_SHARED tier if configured.
+    """
+    global _tiers
+    config = (CACHE_DIR, CACHE_MEMORY_MB, CACHE_SHARED, CACHE_SHARED_WRITE, CACHE_S3_ENDPOINT)
+    with _tiers_lock:
+        if _tiers[0] != config:
+            tiers = [MemoryCache(int(CACHE_MEMORY_MB * 2 ** 20))] if CACHE_MEMORY_MB > 0 else []
+            tiers.append(FilesystemCache(CACHE_DIR))
+            if CACHE_SHARED:
+                tiers.append(open_backend(CACHE_SHARED, writable=CACHE_SHARED_WRITE))
+            _tiers = (config, tiers)
+        return _tiers[1]
+
+
+def _index_records(path) -> dict:
+    """Return the latest record per entry file of the index at path."""
+    records = {}
+    try:
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+                records[record['file']] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+@contextmanager
+def _locked_index():
+    """
+    Open the index for appending while holding its lock, so compaction
+    never drops a line written meanwhile. Yields (file, locked); after
+    INDEX_LOCK_TIMEOUT seconds of waiting it goes ahead without the lock.
+    """
+    path = CACHE_DIR / INDEX_FILE
+    deadline = time.monotonic() + INDEX_LOCK_TIMEOUT
+    while True:
+        f = path.open("a", encoding="utf-8")
+        locked = _try_lock(f)
+        while not locked and time.monotonic() < deadline:
+            time.sleep(0.01)
+            locked = _try_lock(f)
+        try:
+            # Another process may have compacted it into a new file meanwhile
+            if not locked or os.path.samestat(os.fstat(f.fileno()), os.stat(path)):
+                break
+        except OSError:
+            pass
+        _unlock(f)
+        f.close()
+    with f:
+        try:
+            yield f, locked
+        finally:
+            if locked:
+                f.flush()
+                _unlock(f)
+
+
+def _compact_index() -> int:
+    """
+    Rewrite the index with only the latest record of each entry file still
+    in CACHE_DIR; returns its new size in bytes. Call with the index locked.
+    """
+    path = CACHE_DIR / INDEX_FILE
+    records = _index_records(path)
+    text = "".join(json.dumps(records[entry.name]) + "\n"
+                   for entry in sorted(CACHE_DIR.glob("*.pkl")) if entry.name in records)
+    # The index lock keeps other writers out, so a per-process name is unique
+    tmp_path = CACHE_DIR / f"{INDEX_FILE}.{os.getpid()}.tmp"
+    try:
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return len(text.encode())
+
+
+def index_key(name: str, filename: str | None = None, size: int | None = None) -> None:
+    """
+    Record in CACHE_DIR/index.jsonl which key an entry file holds, so
+    entries can be selected by key (see src.bundle). Best effort: the
+    cache works without it. Rewriting an entry appends a new record, so
+    the file is compacted once it grows (see INDEX_COMPACT_BYTES).
+    """
+    global _index_compacted_size
+    record = {'key': name, 'file': filename or cache_file(name), 'type': cache_key_type(name),
+              'size': size, 'time': round(time.time(), 3)}
+    try:
+        with _locked_index() as (f, locked):
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            if locked and os.fstat(f.fileno()).st_size > max(INDEX_COMPACT_BYTES,
+                                                             2 * _index_compacted_size):
+                _index_compacted_size = _compact_index()
+    except OSError:
+        pass
+
+
+def cache_index() -> list:
+    """
+    Return a record (key, file, type, size, time) per entry file in
+    CACHE_DIR, from the index; files written before the index existed
+    have key and type None.
+    """
+    records = _index_records(CACHE_DIR / INDEX_FILE)
+    index = []
+    for path in sorted(CACHE_DIR.glob("*.pkl")):
+        record = records.get(path.name, {'key': None, 'file': path.name, 'type': None, 'time': None})
+        index.append(dict(record, size=path.stat().st_size))
+    return index
+
+
+def cache_exists(name: str) -> bool:
+    """Return True if an entry is stored under name in any tier (without loading it)."""
+    filename = cache_file(name)
+    return any(tier.exists(filename) for tier in cache_tiers())
+
+
+def _promote(name, tiers, filename, data):
+    """Copy an entry found in a slower tier into the faster writable ones; returns the count."""
+    promoted = 0
+    for tier in tiers:
+        if not tier.writable:
+            continue
+        try:
+            tier.set(filename, data)
+            promoted += 1
+            if isinstance(tier, FilesystemCache) and tier.path == CACHE_DIR:
+                index_key(name, filename, len(data))
+        except OSError as e:
+            print(f"⚠ Could not copy cache entry '{name}' to {tier.name}: {e}")
+    return promoted
+
+
+@stage('cache_load')
 def cache_get(name: str) -> dict | None:
-    """Retrieve cached data by name."""
-    path = CACHE_DIR / cache_file(name)
-    if path.exists():
-        with path.open("rb") as f:
-            return pickle.load(f)
+    """
+    Retrieve cached data by name, looking through cache_tiers() in order.
+
+    A hit in a slower tier is copied into the faster ones. Returns None on
+    a miss; entries that cannot be unpickled are quarantined (moved to the
+    tier's quarantine directory where it is writable) and skipped, so the
+    data is fetched again.
+    """
+    filename = cache_file(name)
+    start = time.perf_counter()
+    tiers = cache_tiers()
+    for i, tier in enumerate(tiers):
+        data = tier.get(filename)
+        if data is None:
+            continue
+        try:
+            obj = pickle.loads(data)
+        except Exception as e:
+            where = "quarantined" if tier.quarantine(filename, data) else f"in {tier.name} skipped"
+            print(f"⚠ Corrupt cache entry for '{name}' {where} ({type(e).__name__}: {e})")
+            _record(name, {'corrupt': 1})
+            continue
+        promotions = _promote(name, tiers[:i], filename, data)
+        _record(name, {'hits': 1, 'bytes_read': len(data), 'promotions': promotions},
+                time.perf_counter() - start, 'read_seconds')
+        return obj
+    _record(name, {'misses': 1})
     return None
 
 
 def cache_set(name: str, obj) -> None:
-    """Store data in cache."""
-    path = CACHE_DIR / cache_file(name)
+    """
+    Store data in every writable cache tier, creating the cache directory
+    if needed. Slower tiers are written first, so a failed write never
+    leaves an entry only in memory.
+    """
+    filename = cache_file(name)
+    start = time.perf_counter()
     try:
-        with path.open("wb") as f:
-            pickle.dump(obj, f)
-    except pickle.PickleError as e:
+        data = pickle.dumps(obj)
+        for tier in reversed(cache_tiers()):
+            if tier.writable:
+                tier.set(filename, data)
+        index_key(name, filename, len(data))
+    except (pickle.PickleError, TypeError, AttributeError) as e:
+        # pickle raises TypeError or AttributeError for many objects it cannot handle
+        _record(name, {'errors': 1})
         raise CacheError(
             f"Serialization error while saving cache for '{name}': {e}"
         ) from e
     except (OSError, IOError) as e:
+        _record(name, {'errors': 1})
         raise CacheError(
             f"File error while saving cache for '{name}': {e}"
         ) from e
+    _record(name, {'writes': 1, 'bytes_written': len(data)},
+            time.perf_counter() - start, 'write_seconds')
+
+
+def _try_lock(f):
+    """Take an exclusive lock on the open file f without blocking; return True if taken."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def cache_lock(name: str, timeout: float | None = None, poll: float = 0.1):
+    """
+    Hold the lock of a cache entry, shared by all processes using CACHE_DIR.
+
+    Wrap the fetch of a missing entry in it and check the cache again
+    inside, so only the first process (or thread) downloads the data and
+    the others wait and then load it. Raises CacheError after timeout
+    seconds (default CACHE_LOCK_TIMEOUT) of waiting.
+    """
+    timeout = CACHE_LOCK_TIMEOUT if timeout is None else timeout
+    lock_dir = CACHE_DIR / "locks"
+    try:
+        lock_dir.mkdir(parents=True, exist_ok=True)
+        f = (lock_dir / f"{Path(cache_file(name)).stem}.lock").open("a+b")
+    except OSError as e:
+        raise CacheError(f"File error while locking cache for '{name}': {e}") from e
+    with f:
+        deadline = time.monotonic() + timeout
+        waiting = False
+        while not _try_lock(f):
+            if time.monotonic() >= deadline:
+                raise CacheError(f"Timed out after {timeout:g}s waiting for the cache lock of '{name}'")
+            if not waiting:
+                print(f"Waiting for another process fetching '{name}'...")
+                waiting = True
+            time.sleep(poll)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+
+def format_cache_stats(stats=None) -> str:
+    """Return a human-readable summary of cache_stats(), one line per key type."""
+    stats = cache_stats() if stats is None else stats
+    lines = []
+    for key_type, entry in sorted(stats.items()):
+        lookups = entry['hits'] + entry['misses']
+        hit_rate = f"{entry['hits'] / lookups:.0%}" if lookups else "-"
+        reads = entry['read_seconds']
+        read_ms = f"{1000 * reads['sum'] / reads['count']:.1f} ms" if reads['count'] else "-"
+        lines.append(f"  {key_type:<14} {entry['hits']} hits / {entry['misses']} misses "
+                     f"({hit_rate}), {entry['writes']} writes, "
+                     f"{entry['bytes_read'] / 2 ** 20:.1f} MB read, "
+                     f"{entry['bytes_written'] / 2 ** 20:.1f} MB written, "
+                     f"mean load {read_ms}"
+                     + (f", {entry['corrupt']} corrupt" if entry.get('corrupt') else ""))
+    return "\n".join(lines)
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def prometheus_cache_metrics(stats=None) -> str:
+    """Return cache_stats() in the Prometheus text exposition format."""
+    stats = cache_stats() if stats is None else stats
+    key_types = sorted(stats)
+    lines = []
+
+    def _header(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    _header("mapposter_cache_requests_total", "counter", "Cache lookups by key type and result.")
+    for key_type in key_types:
+        for result, counter in (('hit', 'hits'), ('miss', 'misses')):
+            lines.append(f"mapposter_cache_requests_total{_labels(type=key_type, result=result)} "
+                         f"{stats[key_type][counter]}")
+
+    for counter, name, help_text in (
+            ('writes', 'mapposter_cache_writes_total', "Cache entries written."),
+            ('errors', 'mapposter_cache_errors_total', "Failed cache writes."),
+            ('corrupt', 'mapposter_cache_corrupt_total', "Corrupt cache entries quarantined."),
+            ('promotions', 'mapposter_cache_promotions_total', "Hits copied into faster cache tiers."),
+            ('bytes_read', 'mapposter_cache_read_bytes_total', "Bytes deserialized from cache hits."),
+            ('bytes_written', 'mapposter_cache_written_bytes_total', "Bytes serialized into the cache.")):
+        _header(name, "counter", help_text)
+        for key_type in key_types:
+            lines.append(f"{name}{_labels(type=key_type)} {stats[key_type][counter]}")
+
+    for histogram_key, name, help_text in (
+            ('read_seconds', 'mapposter_cache_read_seconds', "Lookup and deserialize time of cache hits."),
+            ('write_seconds', 'mapposter_cache_write_seconds', "Serialize and write time of cache entries.")):
+        _header(name, "histogram", help_text)
+        for key_type in key_types:
+            histogram = stats[key_type][histogram_key]
+            for bound, count in zip(CACHE_LATENCY_BUCKETS, histogram['buckets']):
+                lines.append(f"{name}_bucket{_labels(type=key_type, le=bound)} {count}")
+            lines.append(f"{name}_bucket{_labels(type=key_type, le='+Inf')} {histogram['count']}")
+            lines.append(f"{name}_sum{_labels(type=key_type)} {histogram['sum']:.6f}")
+            lines.append(f"{name}_count{_labels(type=key_type)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_cache_metrics(path) -> None:
+    """Write the cache metrics as a Prometheus text file (e.g. for node_exporter's textfile collector)."""
+    tmp_path = Path(f"{path}.tmp")
+    tmp_path.write_text(prometheus_cache_metrics())
+    tmp_path.replace(path)
+    print(f"✓ Cache metrics written to {path}")
@@ -4,6 +4,7 @@ import argparse
 import sys
 
 from .theme import get_available_themes
+from .utils import parse_crop
 
 
 def print_examples():
@@ -78,6 +79,8 @@ Examples:
   python create_map_poster.py --city Paris --country France --theme noir --distance 15000
   python create_map_poster.py --city "Tokyo" --country "Japan" --all-themes
   python create_map_poster.py --list-themes
+  python create_map_poster.py cache export paris.zip --city "Paris, France"
+  python create_map_poster.py cache import paris.zip
         """
     )
     
@@ -87,9 +90,30 @@ Examples:
     parser.add_argument('--distance', '-d', type=int, default=29000, help='Map radius in meters (default: 29000)')
     parser.add_argument('--list-themes', action='store_true', help='List all available themes')
     parser.add_argument('--all-themes', action='store_true', help='Generate posters for all available themes')
-    parser.add_argument('--format', '-f', default='png', choices=['png', 'svg', 'pdf'], help='Output format for the poster (default: png)')
+    parser.add_argument('--format', '-f', default='png', choices=['png', 'svg', 'pdf', 'dzi'], help='Output format for the poster; dzi writes a Deep Zoom tile pyramid (default: png)')
     parser.add_argument('--resolution', '-r', type=str, help='Output resolution in pixels (e.g., 3840x2160). Cannot be used with --dpi.')
     parser.add_argument('--dpi', type=int, help='DPI for PNG output. Cannot be used with --resolution.')
+    parser.add_argument('--tiled', action='store_true', help='Render PNG output in bands across a process pool (for very large resolutions)')
+    parser.add_argument('--workers', type=int, help='Number of worker processes for --tiled and dzi output (default: all cores)')
+    parser.add_argument('--threads', action='store_true', help='Use threads instead of processes for --tiled and dzi output (shares the prepared map in memory)')
+    parser.add_argument('--compact-vector', action='store_true', help='Stream SVG/PDF output with roads grouped by class and coordinates rounded to --dpi')
+    parser.add_argument('--raster-dpi', type=int, metavar='DPI', help='Rasterize roads, water and parks at this DPI inside SVG/PDF output; text stays vector')
+    parser.add_argument('--merge-roads', action='store_true', help='Chain same-class road segments into long strokes before drawing')
+    parser.add_argument('--merge-through', action='store_true', help='Also continue strokes straight through intersections (implies --merge-roads)')
+    parser.add_argument('--no-clip', action='store_true', help='Draw all fetched geometry instead of clipping it to the visible frame')
+    parser.add_argument('--fade-lod', action='store_true', help='Drop minor roads and simplify harder where the edge fades hide the map')
+    parser.add_argument('--lod', action='store_true', help='Simplify geometry to the output pixel size before drawing')
+    parser.add_argument('--crop', type=str, metavar='L,T,R,B', help='Render only this window of the PNG poster, as fractions of its width and height from the top-left (e.g. 0.4,0.3,0.6,0.5)')
+    parser.add_argument('--preview', action='store_true', help='Render a quick low-DPI PNG preview with major roads only')
+    parser.add_argument('--refine', action='store_true', help='With --preview, then render the full poster and replace the preview with it')
+    parser.add_argument('--cache-body', action='store_true', help='Cache the rendered map body (PNG) so later posters of the same map, theme and size only redraw the text')
+    parser.add_argument('--display-city', type=str, metavar='TEXT', help='Title printed on the poster instead of --city (e.g. a custom or translated name)')
+    parser.add_argument('--display-country', type=str, metavar='TEXT', help='Subtitle printed on the poster instead of --country')
+    parser.add_argument('--profile', type=str, metavar='FILE', help='Write per-stage wall time, CPU time, peak memory and geometry counts to this JSON file')
+    parser.add_argument('--profile-memory', action='store_true', help='With --profile, also trace allocations for exact per-stage memory peaks (much slower)')
+    parser.add_argument('--profile-trace', type=str, metavar='FILE', help='Write the profiled stages as a Chrome trace (chrome://tracing, Perfetto) to this file')
+    parser.add_argument('--cache-metrics', type=str, metavar='FILE', help='Write cache hit/miss counters and latency histograms as a Prometheus text file')
+    parser.add_argument('--lod-min-density', type=float, metavar='PX_PER_KM', help='Skip minor roads when the output has fewer pixels per km than this (implies --lod)')
     
     return parser
 
@@ -130,4 +154,94 @@ def validate_args(args):
         print("Error: Cannot specify both --resolution and --dpi. Choose one.")
         sys.exit(1)
     
+    # Validate tiled rendering arguments
+    if args.tiled and args.format != 'png':
+        print("Error: --tiled only supports PNG output.")
+        sys.exit(1)
+    
+    if args.crop:
+        if args.format != 'png' or args.tiled or args.cache_body:
+            print("Error: --crop only supports PNG output without --tiled or --cache-body.")
+            sys.exit(1)
+        try:
+            parse_crop(args.crop)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    
+    if args.preview and (args.format != 'png' or args.crop or args.cache_body):
+        print("Error: --preview only supports PNG output without --crop or --cache-body.")
+        sys.exit(1)
+    
+    if args.refine and not args.preview:
+        print("Error: --refine requires --preview.")
+        sys.exit(1)
+    
+    if args.cache_body and (args.format != 'png' or args.tiled):
+        print("Error: --cache-body only supports PNG output without --tiled.")
+        sys.exit(1)
+    
+    if args.compact_vector and args.format not in ('svg', 'pdf'):
+        print("Error: --compact-vector only supports SVG and PDF output.")
+        sys.exit(1)
+    
+    if args.raster_dpi is not None:
+        if args.format not in ('svg', 'pdf') or args.compact_vector:
+            print("Error: --raster-dpi only applies to SVG and PDF output without --compact-vector.")
+            sys.exit(1)
+        if args.raster_dpi < 1:
+            print("Error: --raster-dpi must be positive.")
+            sys.exit(1)
+    
+    if args.threads and not (args.tiled or args.format == 'dzi'):
+        print("Error: --threads only applies to --tiled and dzi output.")
+        sys.exit(1)
+    
+    if args.workers is not None and args.workers < 1:
+        print("Error: --workers must be at least 1.")
+        sys.exit(1)
+    
+    if args.lod_min_density is not None and args.lod_min_density <= 0:
+        print("Error: --lod-min-density must be positive.")
+        sys.exit(1)
+    
     return True
+
+
+def get_render_options(args):
+    """
+    Collect the optional render_poster keyword arguments from parsed args.
+    Returns a dict suitable for the render_options parameter.
+    """
+    options = {}
+    if args.tiled:
+        options['tiled'] = True
+    if args.tiled or args.format == 'dzi':
+        options['workers'] = args.workers
+    if args.threads:
+        options['threads'] = True
+    if args.compact_vector:
+        options['compact_vector'] = True
+    if args.raster_dpi:
+        options['raster_dpi'] = args.raster_dpi
+    if args.merge_roads:
+        options['merge'] = True
+    if args.merge_through:
+        options['merge_through'] = True
+    if args.no_clip:
+        options['clip'] = False
+    if args.fade_lod:
+        options['fade_lod'] = True
+    if args.lod:
+        options['lod'] = True
+    if args.lod_min_density:
+        options['minor_road_min_density'] = args.lod_min_density
+    if args.crop:
+        options['crop'] = parse_crop(args.crop)
+    if args.cache_body:
+        options['cache_body'] = True
+    if args.preview:
+        options['preview'] = True
+    if args.refine:
+        options['refine'] = True
+    return options
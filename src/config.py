@@ -3,10 +3,41 @@
 import os
 from pathlib import Path
 
-# Cache configuration
+# Cache configuration (the directory is created on the first cache write)
 CACHE_DIR_PATH = os.environ.get("CACHE_DIR", "cache")
 CACHE_DIR = Path(CACHE_DIR_PATH)
-CACHE_DIR.mkdir(exist_ok=True)
+
+# Fetched map data is cached slimmed to what the renderer reads (see
+# src.payload); set CACHE_RAW_OSM=1 to cache the full OSMnx graphs and
+# GeoDataFrames with every OSM attribute instead
+CACHE_RAW_OSM = os.environ.get("CACHE_RAW_OSM", "") == "1"
+
+# Cache tiers, looked up in order: up to CACHE_MEMORY_MB of entries in
+# memory, the local CACHE_DIR, then an optional shared tier CACHE_SHARED (a
+# directory such as an NFS mount, sqlite:///path/cache.sqlite, or
+# s3://bucket/prefix at CACHE_S3_ENDPOINT, default AWS, with the usual
+# AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY/AWS_REGION variables). Hits are
+# copied into the faster tiers. The shared tier is read-only unless
+# CACHE_SHARED_WRITE=1.
+CACHE_MEMORY_MB = float(os.environ.get("CACHE_MEMORY_MB", "256"))
+CACHE_SHARED = os.environ.get("CACHE_SHARED", "")
+CACHE_SHARED_WRITE = os.environ.get("CACHE_SHARED_WRITE", "") == "1"
+CACHE_S3_ENDPOINT = os.environ.get("CACHE_S3_ENDPOINT", "")
+
+# Seconds a process waits for another one fetching the same cache entry
+# before giving up (see src.cache.cache_lock)
+CACHE_LOCK_TIMEOUT = float(os.environ.get("CACHE_LOCK_TIMEOUT", "900"))
+
+# Cache instrumentation: latency histogram bucket bounds in seconds
+# (Prometheus 'le' labels) and the key types reported separately
+CACHE_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+CACHE_KEY_TYPES = ('coords', 'graph', 'water', 'parks', 'preview_scene', 'map_body')
+
+# OpenStreetMap services (Overpass API base URL and Nominatim server URL);
+# point them at a local stand-in such as benchmarks.osm_replay to fetch
+# offline with recorded responses
+OVERPASS_URL = os.environ.get("OVERPASS_URL", "https://overpass-api.de/api")
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
 
 # Directory paths
 THEMES_DIR = "themes"
@@ -40,3 +71,42 @@ LINE_WIDTH_INCHES = 2.4  # Total line width in inches
 # Font scaling reference (base figure dimensions in inches)
 BASE_FIGURE_HEIGHT = 16.0
 BASE_FIGURE_WIDTH = 12.0
+
+# Tiled rendering (rows of pixels per band rendered by one worker)
+TILED_BAND_HEIGHT = 1024
+
+# Deep Zoom tile pyramid export (tile edge in pixels)
+PYRAMID_TILE_SIZE = 256
+
+# Level of detail (in output pixels): simplification tolerance and the
+# smallest feature extent that is still drawn
+LOD_TOLERANCE_PX = 1.0
+LOD_MIN_FEATURE_PX = 1.0
+
+# Viewport clipping margin (in output pixels) so strokes at the frame edge
+# keep their full width
+CLIP_MARGIN_PX = 4
+
+# Edge fades (fraction of the poster covered by each gradient)
+FADE_HEIGHT = 0.15  # Top and bottom
+FADE_WIDTH = 0.10  # Left and right
+
+# Fade-aware level of detail: minor roads are skipped where less than this
+# share of them shows through the fades, and tolerance grows as 1/visibility
+# up to FADE_LOD_MAX_SCALE times the base tolerance
+FADE_LOD_MINOR_VISIBILITY = 0.25
+FADE_LOD_MAX_SCALE = 8
+
+# Stroke merging: largest turn (degrees) at which same-class roads are still
+# joined through an intersection
+MERGE_MAX_TURN_DEG = 30
+
+# Map layers (water, roads, parks) are drawn below this zorder; fades and
+# typography above it stay out of hybrid rasterization
+MAP_LAYERS_ZORDER = 3
+
+# Preview mode: output resolution (major roads only, simplified to it)
+PREVIEW_DPI = 72
+
+# Compact vector output: features written per <path> element
+VECTOR_PATH_CHUNK = 1000
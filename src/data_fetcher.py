@@ -1,29 +1,85 @@
 """Data fetching from OpenStreetMap using OSMnx."""
 
 import time
-import osmnx as ox
+from contextlib import ExitStack, contextmanager
+
 from tqdm import tqdm
 
-from .cache import cache_get, cache_set, CacheError
+from .cache import cache_exists, cache_get, cache_lock, cache_set, CacheError
+from .config import CACHE_RAW_OSM, OVERPASS_URL, NOMINATIM_URL
+from .payload import expand_payload, is_slim_payload, slim_features, slim_graph
+from .profiling import stage
+from .utils import lazy_import
+
+# Loaded on the first download; cached map data never needs it
+ox = lazy_import('osmnx')
+
+
+def usable_cache_entry(cached):
+    """Return True if a cached entry can be used (raw data was not requested but slimmed)."""
+    return cached is not None and not (CACHE_RAW_OSM and is_slim_payload(cached))
+
+
+def cached_after_lock(key):
+    """
+    Return the usable entry another process stored under key while this one
+    waited for its cache_lock, or None.
+    """
+    cached = cache_get(key) if cache_exists(key) else None
+    return cached if usable_cache_entry(cached) else None
+
+
+@contextmanager
+def fetch_lock(key):
+    """
+    Hold the cache_lock of key while fetching it; if the cache cannot be
+    locked (e.g. CACHE_DIR is not writable, or the wait timed out) the
+    fetch goes ahead without it.
+    """
+    with ExitStack() as stack:
+        try:
+            stack.enter_context(cache_lock(key))
+        except CacheError as e:
+            print(f"⚠ {e}; fetching without the lock")
+        yield
 
 
+def use_configured_endpoints():
+    """Point OSMnx at the configured Overpass and Nominatim servers."""
+    ox.settings.overpass_url = OVERPASS_URL
+    ox.settings.nominatim_url = NOMINATIM_URL
+
+
+@stage('fetch_graph')
 def fetch_graph_bbox(bbox):
-    """Fetch graph using bbox with caching."""
+    """
+    Fetch graph using bbox with caching.
+    The cache keeps only what the renderer reads (see src.payload) unless
+    CACHE_RAW_OSM is set. Concurrent processes missing the same bbox
+    download it once (see src.cache.cache_lock).
+    """
     west, south, east, north = bbox
     graph_key = f"graph_bbox_{west}_{south}_{east}_{north}"
     cached = cache_get(graph_key)
-    if cached is not None:
+    if usable_cache_entry(cached):
         print("✓ Using cached street network")
-        return cached
+        return expand_payload(cached)
     
     try:
-        G = ox.graph_from_bbox(bbox=bbox, network_type='all')
-        # Rate limit between requests
-        time.sleep(0.5)
-        try:
-            cache_set(graph_key, G)
-        except CacheError as e:
-            print(e)
+        # One process downloads a missing network; others wait and load it
+        with fetch_lock(graph_key):
+            cached = cached_after_lock(graph_key)
+            if cached is not None:
+                print("✓ Using cached street network")
+                return expand_payload(cached)
+            use_configured_endpoints()
+            G = ox.graph_from_bbox(bbox=bbox, network_type='all')
+            # Rate limit between requests
+            time.sleep(0.5)
+            try:
+                cache_set(graph_key, G if CACHE_RAW_OSM else slim_graph(G))
+            except CacheError as e:
+                print(e)
         return G
     except Exception as e:
         print(f"OSMnx error while fetching graph: {e}")
@@ -31,27 +87,34 @@ def fetch_graph_bbox(bbox):
 
 
 def fetch_features_bbox(bbox, tags, name):
-    """Fetch features using bbox with caching."""
-    west, south, east, north = bbox
-    tag_str = "_".join(tags.keys())
-    features_key = f"{name}_bbox_{west}_{south}_{east}_{north}_{tag_str}"
-    cached = cache_get(features_key)
-    if cached is not None:
-        print(f"✓ Using cached {name}")
-        return cached
-    
-    try:
-        data = ox.features_from_bbox(bbox=bbox, tags=tags)
-        # Rate limit between requests
-        time.sleep(0.3)
+    """Fetch features using bbox with caching (slimmed to polygons unless CACHE_RAW_OSM)."""
+    with stage(f"fetch_{name}"):
+        west, south, east, north = bbox
+        tag_str = "_".join(tags.keys())
+        features_key = f"{name}_bbox_{west}_{south}_{east}_{north}_{tag_str}"
+        cached = cache_get(features_key)
+        if usable_cache_entry(cached):
+            print(f"✓ Using cached {name}")
+            return expand_payload(cached)
+        
         try:
-            cache_set(features_key, data)
-        except CacheError as e:
-            print(e)
-        return data
-    except Exception as e:
-        print(f"OSMnx error while fetching features: {e}")
-        return None
+            with fetch_lock(features_key):
+                cached = cached_after_lock(features_key)
+                if cached is not None:
+                    print(f"✓ Using cached {name}")
+                    return expand_payload(cached)
+                use_configured_endpoints()
+                data = ox.features_from_bbox(bbox=bbox, tags=tags)
+                # Rate limit between requests
+                time.sleep(0.3)
+                try:
+                    cache_set(features_key, data if CACHE_RAW_OSM else slim_features(data))
+                except CacheError as e:
+                    print(e)
+            return data
+        except Exception as e:
+            print(f"OSMnx error while fetching features: {e}")
+            return None
 
 
 def fetch_map_data(bbox):
@@ -4,8 +4,11 @@ import time
 from geopy.geocoders import Nominatim
 
 from .cache import cache_get, cache_set, CacheError
+from .config import NOMINATIM_URL
+from .profiling import stage
 
 
+@stage('geocode')
 def get_coordinates(city, country):
     """
     Fetches coordinates for a given city and country using geopy.
@@ -18,7 +21,9 @@ def get_coordinates(city, country):
         return cached
 
     print("Looking up coordinates...")
-    geolocator = Nominatim(user_agent="city_map_poster", timeout=10)
+    scheme, _, domain = NOMINATIM_URL.partition('://')
+    geolocator = Nominatim(user_agent="city_map_poster", timeout=10,
+                           domain=domain.rstrip('/'), scheme=scheme)
     
     # Add a small delay to respect Nominatim's usage policy
     time.sleep(1)
@@ -0,0 +1,167 @@
+"""Pixel-aware level-of-detail simplification of scene geometry."""
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from .config import (
+    LOD_TOLERANCE_PX,
+    LOD_MIN_FEATURE_PX,
+    FADE_HEIGHT,
+    FADE_WIDTH,
+    FADE_LOD_MINOR_VISIBILITY,
+    FADE_LOD_MAX_SCALE
+)
+from .scene import MAJOR_ROAD_TYPES, replace_geometry
+
+
+def ground_pixel_size(extent, figsize, dpi):
+    """
+    Return the ground size (scene units, meters) of one output pixel for a
+    poster showing extent (xmin, xmax, ymin, ymax) at figsize and dpi.
+    """
+    return (extent[1] - extent[0]) / (figsize[0] * dpi)
+
+
+def count_vertices(layer):
+    """Return the total number of coordinates in a GeoSeries/GeoDataFrame."""
+    if layer is None or layer.empty:
+        return 0
+    return int(layer.geometry.count_coordinates().sum())
+
+
+def _simplify_layer(layer, tolerance, min_extent, preserve_topology):
+    """
+    Simplify every geometry of a layer in one vectorized call and drop the
+    ones whose bounding box fits inside min_extent or that collapse to empty.
+    """
+    if layer is None or layer.empty:
+        return layer
+    bounds = layer.geometry.bounds.to_numpy()
+    extent = np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+    layer = layer[extent >= min_extent]
+
+    simplified = layer.geometry.simplify(tolerance, preserve_topology=preserve_topology)
+    keep = (~simplified.is_empty).to_numpy()
+    return replace_geometry(layer, simplified)[keep]
+
+
+def simplify_scene(scene, figsize, dpi, tolerance_px=LOD_TOLERANCE_PX,
+                   min_feature_px=LOD_MIN_FEATURE_PX, minor_road_min_density=None,
+                   major_roads_only=False):
+    """
+    Reduce scene geometry to what the output resolution can show.
+
+    Lines and polygons are simplified to tolerance_px output pixels and
+    features smaller than min_feature_px are dropped. If the output has fewer
+    than minor_road_min_density pixels per ground kilometer, minor road
+    classes (residential, service, paths...) are skipped entirely.
+
+    Returns (scene, stats) where stats counts vertices and features before
+    and after.
+    """
+    pixel_size = ground_pixel_size(scene['extent'], figsize, dpi)
+    layers = ('roads', 'water', 'parks')
+    stats = {
+        'pixel_size': pixel_size,
+        'vertices_before': sum(count_vertices(scene[name]) for name in layers),
+        'features_before': sum(len(scene[name]) for name in layers if scene[name] is not None),
+        'minor_roads_skipped': False,
+    }
+
+    roads = scene['roads']
+    if major_roads_only or (minor_road_min_density and 1000 / pixel_size < minor_road_min_density):
+        roads = roads[roads['highway'].isin(MAJOR_ROAD_TYPES).to_numpy()]
+        stats['minor_roads_skipped'] = True
+
+    tolerance = pixel_size * tolerance_px
+    min_extent = pixel_size * min_feature_px
+    simplified = dict(scene)
+    simplified['roads'] = _simplify_layer(roads, tolerance, min_extent, preserve_topology=False)
+    simplified['water'] = _simplify_layer(scene['water'], tolerance, min_extent, preserve_topology=True)
+    simplified['parks'] = _simplify_layer(scene['parks'], tolerance, min_extent, preserve_topology=True)
+
+    stats['vertices_after'] = sum(count_vertices(simplified[name]) for name in layers)
+    stats['features_after'] = sum(len(simplified[name]) for name in layers if simplified[name] is not None)
+    return simplified, stats
+
+
+def fade_visibility(layer, extent):
+    """
+    Return, per geometry, the largest share of it that shows through the
+    edge fades (1 = fully visible, 0 = hidden under opaque background).
+
+    The fades are linear ramps over FADE_WIDTH of the poster at the sides and
+    FADE_HEIGHT at top and bottom, composited on top of each other. Each
+    geometry is judged at the point of its bounding box closest to the
+    poster center, i.e. its least faded part.
+    """
+    xmin, xmax, ymin, ymax = extent
+    bounds = layer.geometry.bounds.to_numpy()
+    x = np.clip((xmin + xmax) / 2, bounds[:, 0], bounds[:, 2])
+    y = np.clip((ymin + ymax) / 2, bounds[:, 1], bounds[:, 3])
+    fx = (x - xmin) / (xmax - xmin)
+    fy = (y - ymin) / (ymax - ymin)
+
+    def _ramp(fraction, size):
+        # Opacity of the fade on whichever side the point is closer to
+        return np.clip(1 - np.minimum(fraction, 1 - fraction) / size, 0, 1)
+
+    return (1 - _ramp(fx, FADE_WIDTH)) * (1 - _ramp(fy, FADE_HEIGHT))
+
+
+def _fade_layer(layer, extent, tolerance, minor_road_min_visibility=None):
+    """
+    Simplify the faded geometries of a layer with a tolerance that grows as
+    they disappear, optionally dropping minor roads that barely show.
+    """
+    if layer is None or layer.empty:
+        return layer
+    visibility = fade_visibility(layer, extent)
+
+    if minor_road_min_visibility is not None:
+        minor = ~layer['highway'].isin(MAJOR_ROAD_TYPES).to_numpy()
+        keep = ~(minor & (visibility < minor_road_min_visibility))
+        layer = layer[keep]
+        visibility = visibility[keep]
+
+    faded = visibility < 1
+    if not faded.any():
+        return layer
+    geometry = np.asarray(layer.geometry.array).copy()
+    scale = 1 / np.maximum(visibility[faded], 1 / FADE_LOD_MAX_SCALE)
+    geometry[faded] = shapely.simplify(geometry[faded], tolerance * scale)
+    keep = ~shapely.is_empty(geometry)
+    geometry = gpd.GeoSeries(geometry, index=layer.index, crs=layer.crs)
+    return replace_geometry(layer, geometry)[keep]
+
+
+def fade_scene(scene, figsize, dpi, tolerance_px=LOD_TOLERANCE_PX,
+               minor_road_min_visibility=FADE_LOD_MINOR_VISIBILITY):
+    """
+    Spatially varying level of detail under the edge fades.
+
+    Minor roads are dropped where less than minor_road_min_visibility of them
+    shows through the fades; everything else under a fade is simplified to
+    tolerance_px / visibility output pixels (capped at FADE_LOD_MAX_SCALE
+    times). Geometry outside the fades is left untouched.
+
+    Returns (scene, stats) like simplify_scene.
+    """
+    pixel_size = ground_pixel_size(scene['extent'], figsize, dpi)
+    layers = ('roads', 'water', 'parks')
+    stats = {
+        'pixel_size': pixel_size,
+        'vertices_before': sum(count_vertices(scene[name]) for name in layers),
+        'features_before': sum(len(scene[name]) for name in layers if scene[name] is not None),
+    }
+
+    tolerance = pixel_size * tolerance_px
+    faded = dict(scene)
+    faded['roads'] = _fade_layer(scene['roads'], scene['extent'], tolerance, minor_road_min_visibility)
+    faded['water'] = _fade_layer(scene['water'], scene['extent'], tolerance)
+    faded['parks'] = _fade_layer(scene['parks'], scene['extent'], tolerance)
+
+    stats['vertices_after'] = sum(count_vertices(faded[name]) for name in layers)
+    stats['features_after'] = sum(len(faded[name]) for name in layers if faded[name] is not None)
+    return faded, stats
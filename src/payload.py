@@ -0,0 +1,196 @@
+"""
+Slim cache payloads: only the render-relevant parts of fetched map data,
+and packed render-ready scenes.
+
+The renderer reads node positions, each edge's highway class and optional
+geometry, and the polygon geometry of water and parks. slim_graph and
+slim_features keep just that, with highway as a categorical and all
+coordinates as float32 offsets from the payload's south-west corner (about
+2 mm resolution for a 20 km map), and expand_payload rebuilds the graph or
+GeoDataFrame the rest of the pipeline expects. Everything else OSM
+returned (names, speeds, lanes, osmid lists, hundreds of tag columns) is
+dropped.
+
+pack_scene stores a prepared scene the same way, as float32 offsets from
+the poster center: half the size of float64 shapely geometry, and a few
+NumPy arrays to pickle instead of one object per feature when a scene is
+cached or sent to render worker processes.
+"""
+
+import gc
+from contextlib import contextmanager
+
+import geopandas as gpd
+import networkx as nx
+import numpy as np
+import pandas as pd
+import shapely
+
+from .scene import normalize_highway, scene_origin
+
+
+PAYLOAD_VERSION = 1
+
+POLYGON_TYPES = ['Polygon', 'MultiPolygon']
+
+
+@contextmanager
+def _gc_paused():
+    """Pause the cyclic garbage collector while building many small objects."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def is_slim_payload(obj):
+    """Return True if obj is a payload made by slim_graph or slim_features."""
+    return isinstance(obj, dict) and obj.get('payload') in ('graph', 'features', 'scene')
+
+
+def _pack_geometry(geometry, origin):
+    """Pack geometries of one family as (type, float32 offsets from origin, ragged offsets)."""
+    # Empty results of clipping are GeometryCollections; store them as empty parts
+    geometry = np.where(shapely.is_empty(geometry), None, geometry)
+    geom_type, coords, offsets = shapely.to_ragged_array(geometry)
+    return geom_type, (coords - origin).astype(np.float32), offsets
+
+
+def _unpack_geometry(packed, origin):
+    geom_type, coords, offsets = packed
+    return shapely.from_ragged_array(geom_type, coords.astype(np.float64) + origin, offsets)
+
+
+def slim_graph(graph):
+    """Return the slim payload of a street network graph."""
+    nodes = list(graph.nodes)
+    xy = np.array([(data['x'], data['y']) for _, data in graph.nodes(data=True)], dtype=np.float64)
+    origin = xy.min(axis=0) if len(xy) else np.zeros(2)
+    index = {node: i for i, node in enumerate(nodes)}
+
+    edges = list(graph.edges(keys=True, data=True))
+    geometry = np.array([data.get('geometry') for _, _, _, data in edges], dtype=object)
+    has_geometry = np.array([geom is not None for geom in geometry], dtype=bool)
+
+    return {
+        'payload': 'graph',
+        'version': PAYLOAD_VERSION,
+        'graph': dict(graph.graph),
+        'origin': origin,
+        'nodes': np.asarray(nodes),
+        'xy': (xy - origin).astype(np.float32),
+        'u': np.array([index[u] for u, _, _, _ in edges], dtype=np.int32),
+        'v': np.array([index[v] for _, v, _, _ in edges], dtype=np.int32),
+        'key': np.array([key for _, _, key, _ in edges], dtype=np.int32),
+        'highway': pd.Categorical([normalize_highway(data.get('highway')) for _, _, _, data in edges]),
+        'has_geometry': has_geometry,
+        'geometry': _pack_geometry(geometry[has_geometry], origin) if has_geometry.any() else None,
+    }
+
+
+def _expand_graph(payload):
+    graph = nx.MultiDiGraph(**payload['graph'])
+    origin = payload['origin']
+    nodes = payload['nodes'].tolist()
+    xy = (payload['xy'].astype(np.float64) + origin).tolist()
+    graph.add_nodes_from((node, {'x': x, 'y': y}) for node, (x, y) in zip(nodes, xy))
+
+    attrs = [{'highway': highway} for highway in np.asarray(payload['highway'], dtype=object)]
+    if payload['geometry'] is not None:
+        positions = np.flatnonzero(payload['has_geometry'])
+        for position, geom in zip(positions, _unpack_geometry(payload['geometry'], origin)):
+            attrs[position]['geometry'] = geom
+    graph.add_edges_from(zip([nodes[i] for i in payload['u'].tolist()],
+                             [nodes[i] for i in payload['v'].tolist()],
+                             payload['key'].tolist(), attrs))
+    return graph
+
+
+def slim_features(features):
+    """
+    Return the slim payload of a water or parks GeoDataFrame: its polygons
+    only (points and lines are never drawn), without any tag columns.
+    """
+    if features is None:
+        return None
+    geometry = features.geometry
+    polygons = geometry[geometry.type.isin(POLYGON_TYPES)].to_numpy()
+    origin = shapely.total_bounds(polygons)[:2] if len(polygons) else np.zeros(2)
+    return {
+        'payload': 'features',
+        'version': PAYLOAD_VERSION,
+        'crs': features.crs,
+        'origin': origin,
+        'geometry': _pack_geometry(polygons, origin) if len(polygons) else None,
+    }
+
+
+def _expand_features(payload):
+    geometry = [] if payload['geometry'] is None else _unpack_geometry(payload['geometry'], payload['origin'])
+    return gpd.GeoDataFrame(geometry=gpd.GeoSeries(geometry, crs=payload['crs']))
+
+
+def _pack_layer(layer, origin):
+    if layer is None:
+        return None
+    return _pack_geometry(layer.geometry.to_numpy(), origin) if len(layer) else ()
+
+
+def _unpack_layer(packed, origin, crs):
+    if packed is None:
+        return None
+    return gpd.GeoSeries(_unpack_geometry(packed, origin) if packed else [], crs=crs)
+
+
+def pack_scene(scene):
+    """
+    Return a scene (see build_scene) packed as float32 offsets from its
+    poster center. Scenes from build_scene are snapped to that grid, so
+    expand_payload gives back exactly the same coordinates.
+    """
+    origin = scene_origin(scene)
+    roads = scene['roads']
+    return {
+        'payload': 'scene',
+        'version': PAYLOAD_VERSION,
+        'crs': scene['crs'],
+        'extent': scene['extent'],
+        'origin': origin,
+        'highway': pd.Categorical(roads['highway'].to_numpy()),
+        'roads': _pack_layer(roads, origin),
+        'water': _pack_layer(scene['water'], origin),
+        'parks': _pack_layer(scene['parks'], origin),
+    }
+
+
+def _expand_scene(packed):
+    origin = packed['origin']
+    roads = gpd.GeoDataFrame({'highway': np.asarray(packed['highway'], dtype=object)},
+                             geometry=_unpack_layer(packed['roads'], origin, packed['crs']))
+    return {
+        'crs': packed['crs'],
+        'roads': roads,
+        'water': _unpack_layer(packed['water'], origin, packed['crs']),
+        'parks': _unpack_layer(packed['parks'], origin, packed['crs']),
+        'extent': packed['extent'],
+    }
+
+
+def expand_payload(obj):
+    """
+    Rebuild the graph, GeoDataFrame or scene of a payload; anything else
+    (e.g. raw data cached with CACHE_RAW_OSM) is returned unchanged.
+    """
+    if not is_slim_payload(obj):
+        return obj
+    if obj['payload'] == 'scene':
+        return _expand_scene(obj)
+    if obj['payload'] == 'graph':
+        # Collections triggered by the ~100k new edge dicts of a big city
+        # would otherwise take as long as building the graph itself
+        with _gc_paused():
+            return _expand_graph(obj)
+    return _expand_features(obj)
@@ -2,17 +2,21 @@
 
 import os
 from datetime import datetime
+from functools import lru_cache
 
 from .theme import load_theme, load_fonts, get_available_themes
 from .geocoding import get_coordinates
 from .data_fetcher import fetch_map_data
 from .renderer import render_poster
+from .body import render_poster_cached_body
+from .preview import render_poster_preview
 from .utils import generate_output_filename, generate_city_folder_name, calculate_bbox
 from .config import POSTERS_DIR
 
 
 def render_single_poster(city, country, theme_name, coords, graph, water, parks, 
-                         output_format, dpi, figsize, output_file):
+                         output_format, dpi, figsize, output_file, render_options=None,
+                         bbox=None):
     """
     Core rendering function that creates a poster from pre-loaded data.
     
@@ -20,9 +24,16 @@ def render_single_poster(city, country, theme_name, coords, graph, water, parks,
         city, country: Location info
         theme_name: Theme to use
         coords: Coordinates tuple (lat, lon)
-        graph, water, parks: Map data
+        graph, water, parks: Map data; with 'cache_body' or 'preview' graph
+            may be None, and the data is then fetched for bbox only if the
+            cached map body or preview scene does not exist yet
         output_format, dpi, figsize: Rendering parameters
         output_file: Output file path
+        render_options: Optional dict of extra render_poster keyword arguments;
+            'cache_body': True renders from a cached map body, 'preview': True
+            renders a quick preview ('refine': True then replaces it with the
+            full poster). Both need bbox.
+        bbox: Bounding box the map data was fetched for
     
     Returns:
         Path to the generated file
@@ -31,18 +42,57 @@ def render_single_poster(city, country, theme_name, coords, graph, water, parks,
     theme = load_theme(theme_name)
     fonts = load_fonts()
     
-    # Render poster
-    render_poster(
-        city, country, coords,
-        graph, water, parks,
-        theme, fonts,
-        output_file, output_format,
-        dpi=dpi, figsize=figsize
-    )
+    render_options = dict(render_options or {})
+    cache_body = render_options.pop('cache_body', False)
+    preview = render_options.pop('preview', False)
+    refine = render_options.pop('refine', False)
+    
+    @lru_cache(maxsize=1)
+    def _load_map_data():
+        if graph is None:
+            return fetch_map_data(bbox)
+        return graph, water, parks
+    
+    def _render_full(path):
+        render_poster(
+            city, country, coords,
+            *_load_map_data(),
+            theme, fonts,
+            path, output_format,
+            dpi=dpi, figsize=figsize,
+            **render_options
+        )
+    
+    if preview:
+        render_poster_preview(
+            city, country, coords,
+            bbox_scene_key(bbox), _load_map_data,
+            theme, fonts,
+            output_file, output_format,
+            figsize=figsize,
+            refine=_render_full if refine else None
+        )
+    elif cache_body:
+        render_poster_cached_body(
+            city, country, coords,
+            bbox_scene_key(bbox), _load_map_data,
+            theme, fonts,
+            output_file, output_format,
+            dpi=dpi, figsize=figsize,
+            scene_options=render_options
+        )
+    else:
+        _render_full(output_file)
     
     return output_file
 
 
+def bbox_scene_key(bbox):
+    """Return the cache key part for scenes built from data fetched for bbox."""
+    west, south, east, north = bbox
+    return f"bbox_{west}_{south}_{east}_{north}"
+
+
 def fetch_map_resources(city, country, distance, figsize):
     """
     Fetch all map resources (coordinates, bbox, and map data) for a city.
@@ -64,7 +114,8 @@ def fetch_map_resources(city, country, distance, figsize):
 
 
 def generate_single_poster(city, country, theme_name, distance, output_format, 
-                          dpi, figsize, output_file=None):
+                          dpi, figsize, output_file=None, render_options=None,
+                          display_city=None, display_country=None):
     """
     Generate a single poster for the given parameters.
     Fetches all necessary data and renders the poster.
@@ -78,12 +129,21 @@ def generate_single_poster(city, country, theme_name, distance, output_format,
         dpi: DPI for rendering
         figsize: Figure size tuple
         output_file: Optional output file path (auto-generated if None)
+        render_options: Optional dict of extra render_poster keyword arguments
+        display_city, display_country: Optional text printed on the poster
+            instead of the city and country names used for geocoding
     
     Returns:
         Path to the generated file
     """
-    # Fetch map resources
-    coords, bbox, graph, water, parks = fetch_map_resources(city, country, distance, figsize)
+    # Fetch map resources (map data is fetched lazily for cached map bodies
+    # and previews)
+    if render_options and (render_options.get('cache_body') or render_options.get('preview')):
+        coords = get_coordinates(city, country)
+        bbox = calculate_bbox(coords, distance, figsize)
+        graph = water = parks = None
+    else:
+        coords, bbox, graph, water, parks = fetch_map_resources(city, country, distance, figsize)
     
     # Generate output filename if not provided
     if output_file is None:
@@ -91,13 +151,15 @@ def generate_single_poster(city, country, theme_name, distance, output_format,
     
     # Render poster
     return render_single_poster(
-        city, country, theme_name, coords, 
+        display_city or city, display_country or country, theme_name, coords, 
         graph, water, parks,
-        output_format, dpi, figsize, output_file
+        output_format, dpi, figsize, output_file,
+        render_options=render_options, bbox=bbox
     )
 
 
-def generate_all_themes(city, country, distance, output_format, dpi, figsize):
+def generate_all_themes(city, country, distance, output_format, dpi, figsize, render_options=None,
+                        display_city=None, display_country=None):
     """
     Generate posters for all available themes for a given city.
     Fetches map data once and reuses it for all themes.
@@ -106,6 +168,8 @@ def generate_all_themes(city, country, distance, output_format, dpi, figsize):
         city, country: Location info
         distance: Map radius in meters
         output_format, dpi, figsize: Rendering parameters
+        render_options: Optional dict of extra render_poster keyword arguments
+        display_city, display_country: Optional text printed on the posters
     
     Returns:
         Dict with 'successful', 'failed', and 'output_dir' keys
@@ -154,9 +218,10 @@ def generate_all_themes(city, country, distance, output_format, dpi, figsize):
             
             # Render poster with pre-fetched data
             render_single_poster(
-                city, country, theme_name, coords, 
+                display_city or city, display_country or country, theme_name, coords, 
                 graph, water, parks,
-                output_format, dpi, figsize, output_file
+                output_format, dpi, figsize, output_file,
+                render_options=render_options, bbox=bbox
             )
             
             print(f"✓ Saved: {filename}")
@@ -0,0 +1,91 @@
+"""Fast low-resolution previews with optional full-detail refinement."""
+
+import os
+
+from PIL import Image
+
+from .cache import cache_get, cache_set, CacheError
+from .config import DEFAULT_FIGSIZE, PREVIEW_DPI
+from .payload import expand_payload, pack_scene
+from .profiling import stage
+from .renderer import build_scene
+from .tiling import build_tile_jobs, render_tile
+
+
+# Geometry stages of a preview: major roads only, everything simplified to
+# the preview pixel, detail under the fades dropped
+PREVIEW_SCENE_OPTIONS = {'fade_lod': True, 'lod': True, 'major_roads_only': True}
+
+
+def load_preview_scene(scene_key, load_map_data, figsize=DEFAULT_FIGSIZE, dpi=PREVIEW_DPI):
+    """
+    Return the preview scene for a map, from the cache when possible.
+
+    The scene is projected, reduced to major roads and simplified to the
+    preview resolution, so it is small to store and quick to draw in any
+    theme. It is cached packed as float32 offsets from the poster center.
+    load_map_data (returning graph, water, parks) is called only on a cache
+    miss; with scene_key None nothing is cached.
+    """
+    key = f"preview_scene_{scene_key}_{figsize[0]}x{figsize[1]}_{dpi}"
+    if scene_key is not None:
+        scene = cache_get(key)
+        if scene is not None:
+            print("✓ Using cached preview scene")
+            return expand_payload(scene)
+
+    graph, water, parks = load_map_data()
+    scene = build_scene(graph, water, parks, figsize, dpi, **PREVIEW_SCENE_OPTIONS)
+    if scene_key is not None:
+        try:
+            cache_set(key, pack_scene(scene))
+        except CacheError as e:
+            print(e)
+    return scene
+
+
+def render_poster_preview(city, country, point, scene_key, load_map_data, theme, fonts,
+                          output_file, output_format='png', figsize=DEFAULT_FIGSIZE,
+                          dpi=PREVIEW_DPI, refine=None):
+    """
+    Render a quick PNG preview of the poster at preview resolution.
+
+    Layout, colors and typography are those of the full poster; only the
+    resolution and the road detail drop. If refine is given it is called
+    afterwards with a temporary path to render the full-detail poster to,
+    which then atomically replaces the preview at output_file.
+    """
+    if output_format.lower() != 'png':
+        raise ValueError("Previews only support PNG output")
+
+    print(f"Rendering preview at {dpi} DPI...")
+    scene = load_preview_scene(scene_key, load_map_data, figsize, dpi)
+
+    poster_size = (int(figsize[0] * dpi), int(figsize[1] * dpi))
+    context = {
+        'theme': theme,
+        'fonts': fonts,
+        'city': city,
+        'country': country,
+        'point': point,
+        'figsize': figsize,
+        'dpi': dpi,
+    }
+    rect = (0, 0, poster_size[0], poster_size[1])
+    job = next(build_tile_jobs(scene, [rect], poster_size, context))
+    pixels = render_tile(job)
+    with stage('encode'):
+        Image.fromarray(pixels).save(output_file, format='png', dpi=(dpi, dpi))
+    print(f"✓ Preview saved as {output_file}")
+
+    if refine is not None:
+        base, ext = os.path.splitext(output_file)
+        partial = f"{base}.partial{ext}"
+        print("Refining to full detail...")
+        try:
+            refine(partial)
+            os.replace(partial, output_file)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        print(f"✓ Preview replaced by the full poster at {output_file}")
@@ -0,0 +1,244 @@
+"""Per-stage timing and memory profiling of poster runs."""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# The profile being recorded (None when profiling is off), shared by all
+# threads so tiles rendered in a thread pool are included
+_active = None
+_lock = threading.Lock()
+# Per-thread stack of open stages, for nesting and peak-memory attribution
+_local = threading.local()
+
+
+def _open_stages():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _max_rss():
+    """Return the peak resident set size of the process so far, in bytes (0 if unknown)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _traced_peak():
+    """Return the traced-memory peak since the last reset, in bytes (0 if off)."""
+    return tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+
+
+@contextmanager
+def stage(name):
+    """
+    Record the enclosed code as a named stage of the active profile.
+
+    Records wall time, CPU time of the calling thread, the process peak RSS
+    at the end of the stage and, when tracing memory, the stage's own peak
+    of traced memory. Stages nest, and stage(name) also works as a function decorator.
+    Without an active profile (see profiling) this does nothing beyond the
+    function call.
+    """
+    profile = _active
+    if profile is None:
+        yield
+        return
+
+    stack = _open_stages()
+    tracing = profile['memory']
+    if tracing:
+        # The peak so far belongs to the enclosing stages; restart it for this one
+        peak = _traced_peak()
+        for parent in stack:
+            parent['peak_bytes'] = max(parent['peak_bytes'], peak)
+        tracemalloc.reset_peak()
+
+    record = {
+        'name': name,
+        'thread': threading.get_ident(),
+        'depth': len(stack),
+        'counts': {},
+        'peak_bytes': 0,
+    }
+    stack.append(record)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        record['wall_s'] = time.perf_counter() - wall_start
+        record['cpu_s'] = time.thread_time() - cpu_start
+        record['start_s'] = wall_start - profile['started']
+        record['max_rss_bytes'] = _max_rss()
+        stack.pop()
+        if tracing:
+            record['peak_bytes'] = max(record['peak_bytes'], _traced_peak())
+            for parent in stack:
+                parent['peak_bytes'] = max(parent['peak_bytes'], record['peak_bytes'])
+        with _lock:
+            profile['stages'].append(record)
+
+
+def add_counts(**counts):
+    """Add to the geometry counts (e.g. edges=..., vertices=...) of the innermost open stage."""
+    if _active is None:
+        return
+    stack = _open_stages()
+    if stack:
+        record_counts = stack[-1]['counts']
+        for key, value in counts.items():
+            record_counts[key] = record_counts.get(key, 0) + int(value)
+
+
+@contextmanager
+def profiling(memory=False):
+    """
+    Profile every stage run inside the block and yield the profile.
+
+    With memory=True tracemalloc also traces Python and NumPy allocations
+    for exact per-stage peaks; this slows allocation-heavy stages several
+    times over, so use it for memory questions only, not for timings.
+    Stages running in worker processes are not recorded; render tiled
+    output with threads or one worker to include them. Build the report
+    with profile_report or write_profile.
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("A profile is already being recorded")
+
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profile = {
+        'memory': memory,
+        'stages': [],
+        'started': time.perf_counter(),
+        'cpu_started': time.process_time(),
+    }
+    _active = profile
+    try:
+        yield profile
+    finally:
+        _active = None
+        profile['wall_s'] = time.perf_counter() - profile['started']
+        profile['cpu_s'] = time.process_time() - profile['cpu_started']
+        profile['max_rss_bytes'] = _max_rss()
+        if memory:
+            profile['peak_bytes'] = max([_traced_peak()] +
+                                        [record['peak_bytes'] for record in profile['stages']])
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _mb(num_bytes):
+    return round(num_bytes / 2 ** 20, 3)
+
+
+def profile_report(profile):
+    """
+    Build the JSON-ready report of a recorded profile.
+
+    'stages' lists every stage in start order; 'summary' totals them by
+    name (calls, wall and CPU seconds, largest peaks); 'counts' sums the
+    geometry counts of all stages. max_rss_mb is the process peak resident
+    memory when a stage ended; peak_mb the stage's own traced peak (0
+    unless memory was traced).
+    """
+    stages = sorted(profile['stages'], key=lambda record: record['start_s'])
+    summary = {}
+    counts = {}
+    for record in stages:
+        entry = summary.setdefault(record['name'], {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                                                     'max_rss_mb': 0.0, 'peak_mb': 0.0})
+        entry['calls'] += 1
+        entry['wall_s'] += record['wall_s']
+        entry['cpu_s'] += record['cpu_s']
+        entry['max_rss_mb'] = max(entry['max_rss_mb'], _mb(record['max_rss_bytes']))
+        entry['peak_mb'] = max(entry['peak_mb'], _mb(record['peak_bytes']))
+        for key, value in record['counts'].items():
+            counts[key] = counts.get(key, 0) + value
+
+    threads = {}
+    return {
+        'wall_s': round(profile['wall_s'], 6),
+        'cpu_s': round(profile['cpu_s'], 6),
+        'max_rss_mb': _mb(profile['max_rss_bytes']),
+        'peak_mb': _mb(profile.get('peak_bytes', 0)),
+        'memory_traced': profile['memory'],
+        'counts': counts,
+        'summary': {name: {key: round(value, 6) if isinstance(value, float) else value
+                           for key, value in entry.items()}
+                    for name, entry in summary.items()},
+        'stages': [{
+            'name': record['name'],
+            'start_s': round(record['start_s'], 6),
+            'wall_s': round(record['wall_s'], 6),
+            'cpu_s': round(record['cpu_s'], 6),
+            'max_rss_mb': _mb(record['max_rss_bytes']),
+            'peak_mb': _mb(record['peak_bytes']),
+            'depth': record['depth'],
+            'thread': threads.setdefault(record['thread'], len(threads)),
+            'counts': record['counts'],
+        } for record in stages],
+    }
+
+
+def chrome_trace(report):
+    """
+    Convert a profile report to Chrome trace event format, viewable in
+    chrome://tracing or Perfetto. One complete ('X') event per stage.
+    """
+    pid = os.getpid()
+    events = []
+    for record in report['stages']:
+        events.append({
+            'name': record['name'],
+            'ph': 'X',
+            'ts': round(record['start_s'] * 1e6, 1),
+            'dur': round(record['wall_s'] * 1e6, 1),
+            'pid': pid,
+            'tid': record['thread'],
+            'args': dict(record['counts'], cpu_s=record['cpu_s'],
+                         max_rss_mb=record['max_rss_mb'], peak_mb=record['peak_mb']),
+        })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def write_profile(profile, report_file=None, trace_file=None):
+    """
+    Write the report of a recorded profile as JSON to report_file and,
+    if given, as a Chrome trace to trace_file. Returns the report.
+    """
+    report = profile_report(profile)
+    if report_file:
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Profile written to {report_file}")
+    if trace_file:
+        with open(trace_file, 'w') as f:
+            json.dump(chrome_trace(report), f)
+        print(f"✓ Chrome trace written to {trace_file}")
+    return report
+
+
+def print_profile_summary(report):
+    """Print the per-stage totals of a profile report, slowest first."""
+    print(f"Profile: {report['wall_s']:.2f}s wall, {report['cpu_s']:.2f}s CPU, "
+          f"peak RSS {report['max_rss_mb']:.0f} MB")
+    for name, entry in sorted(report['summary'].items(), key=lambda item: -item[1]['wall_s']):
+        print(f"  {name:<16} {entry['wall_s']:8.3f}s  x{entry['calls']}")
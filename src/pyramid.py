@@ -0,0 +1,173 @@
+"""Deep Zoom (DZI) tile pyramid export for web viewing."""
+
+import math
+import os
+
+import numpy as np
+from PIL import Image
+from tqdm import tqdm
+
+from .config import DEFAULT_DPI, DEFAULT_FIGSIZE, PYRAMID_TILE_SIZE
+from .profiling import stage
+from .renderer import build_scene, fade_pixels
+from .tiling import build_tile_jobs, iter_in_pool, render_tile
+
+
+DZI_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="png" Overlap="0" TileSize="{tile_size}">
+  <Size Width="{width}" Height="{height}"/>
+</Image>
+"""
+
+
+def pyramid_levels(width, height):
+    """
+    Return the Deep Zoom levels for an image as a list of (level, width, height).
+    Level 0 is 1x1 pixel; the last level is the full resolution.
+    """
+    max_level = math.ceil(math.log2(max(width, height, 1)))
+    levels = []
+    for level in range(max_level + 1):
+        scale = 2 ** (max_level - level)
+        levels.append((level, math.ceil(width / scale), math.ceil(height / scale)))
+    return levels
+
+
+def tile_rects(width, height, tile_size):
+    """
+    Split a level into tiles.
+    Returns a list of (col, row, (left, top, right, bottom)) in pixels.
+    """
+    return [
+        (col, row, (col * tile_size, row * tile_size,
+                    min((col + 1) * tile_size, width), min((row + 1) * tile_size, height)))
+        for row in range(math.ceil(height / tile_size))
+        for col in range(math.ceil(width / tile_size))
+    ]
+
+
+def tiles_dir_for(output_file):
+    """Return the '<name>_files' tile directory that belongs to a .dzi file."""
+    return f"{os.path.splitext(output_file)[0]}_files"
+
+
+def _render_tile_to_file(job):
+    """
+    Render a full-resolution tile and write it as PNG (runs in a worker).
+    Blank tiles (no geometry, no text) skip matplotlib: they are only the
+    background under the fades.
+    """
+    if job['blank']:
+        pixels = fade_pixels(job['theme'], job['poster_size'], job['rect'])
+    else:
+        pixels = render_tile(job)
+    with stage('encode'):
+        Image.fromarray(pixels).save(job['path'])
+    return job['path']
+
+
+def downsample_tile(job):
+    """
+    Build a tile from the (up to) four tiles below it at the next level,
+    box-filtered to half size. Each axis shrinks by exactly 2, so an odd
+    last column or row of the level is averaged on its own rather than
+    stretching the edge tile. Runs in a worker; returns the written path.
+    """
+    col, row = job['col'], job['row']
+    source_width, source_height = job['source_size']
+    tile_size = job['tile_size']
+
+    children = Image.new('RGB', (min(2 * tile_size, source_width - 2 * col * tile_size),
+                                 min(2 * tile_size, source_height - 2 * row * tile_size)))
+    for dy in range(2):
+        for dx in range(2):
+            child = os.path.join(job['source_dir'], f"{2 * col + dx}_{2 * row + dy}.png")
+            if os.path.exists(child):
+                with Image.open(child) as image:
+                    children.paste(image, (dx * tile_size, dy * tile_size))
+
+    with stage('encode'):
+        # Repeat an odd last column or row so it is averaged on its own
+        pixels = np.asarray(children)
+        pixels = np.pad(pixels, ((0, pixels.shape[0] % 2), (0, pixels.shape[1] % 2), (0, 0)), mode='edge')
+        half = (pixels.shape[1] // 2, pixels.shape[0] // 2)
+        Image.fromarray(pixels).resize(half, Image.Resampling.BOX).save(job['path'])
+    return job['path']
+
+
+def render_poster_pyramid(city, country, point, graph, water, parks, theme, fonts,
+                          output_file, output_format='dzi', dpi=DEFAULT_DPI,
+                          figsize=DEFAULT_FIGSIZE, workers=None, tile_size=PYRAMID_TILE_SIZE,
+                          scene_options=None, threads=False):
+    """
+    Export the poster as a Deep Zoom tile pyramid.
+
+    Writes output_file (the .dzi descriptor) and a '<name>_files/<level>/'
+    directory of '<col>_<row>.png' tiles. The full-resolution level is
+    rendered from the prepared scene with the same styling and typography as
+    render_poster, each tile receiving only the geometry that intersects it.
+    Every lower level is box-downsampled from the level above, so no tile is
+    ever rendered twice. Tiles of a level are produced in a process pool, or
+    a thread pool with threads=True.
+    scene_options are passed on to build_scene.
+    """
+    workers = workers or os.cpu_count() or 1
+    width_px = int(figsize[0] * dpi)
+    height_px = int(figsize[1] * dpi)
+    levels = pyramid_levels(width_px, height_px)
+    tiles_dir = tiles_dir_for(output_file)
+
+    print(f"Rendering {len(levels)}-level tile pyramid with {workers} workers...")
+    print(f"  Resolution: {width_px}x{height_px} pixels ({dpi} DPI), {tile_size}px tiles")
+    scene = build_scene(graph, water, parks, figsize, dpi, **(scene_options or {}))
+
+    # Full-resolution level: render tiles from the scene
+    top_level = levels[-1][0]
+    top_dir = os.path.join(tiles_dir, str(top_level))
+    os.makedirs(top_dir, exist_ok=True)
+    rects = tile_rects(width_px, height_px, tile_size)
+    context = {
+        'theme': theme,
+        'fonts': fonts,
+        'city': city,
+        'country': country,
+        'point': point,
+        'figsize': figsize,
+        'dpi': dpi,
+    }
+
+    def _render_jobs():
+        jobs = build_tile_jobs(scene, [rect for _, _, rect in rects], (width_px, height_px), context,
+                               pack=not threads and workers > 1)
+        for (col, row, _), job in zip(rects, jobs):
+            job['path'] = os.path.join(top_dir, f"{col}_{row}.png")
+            yield job
+
+    for _ in tqdm(iter_in_pool(_render_tile_to_file, _render_jobs(), workers, threads),
+                  total=len(rects), desc=f"Level {top_level}", unit="tile"):
+        pass
+
+    # Lower levels: downsample from the level above
+    level_dir = top_dir
+    for level, level_width, level_height in reversed(levels[:-1]):
+        source_dir = level_dir
+        source_size = levels[level + 1][1:]
+        level_dir = os.path.join(tiles_dir, str(level))
+        os.makedirs(level_dir, exist_ok=True)
+        rects = tile_rects(level_width, level_height, tile_size)
+        jobs = ({
+            'col': col,
+            'row': row,
+            'size': (right - left, bottom - top),
+            'source_dir': source_dir,
+            'source_size': source_size,
+            'tile_size': tile_size,
+            'path': os.path.join(level_dir, f"{col}_{row}.png"),
+        } for col, row, (left, top, right, bottom) in rects)
+        for _ in iter_in_pool(downsample_tile, jobs, workers, threads):
+            pass
+
+    with open(output_file, 'w') as f:
+        f.write(DZI_TEMPLATE.format(tile_size=tile_size, width=width_px, height=height_px))
+
+    print(f"✓ Done! Tile pyramid saved as {output_file} (tiles in {tiles_dir})")
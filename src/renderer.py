@@ -1,75 +1,79 @@
 """Map rendering and visualization functionality."""
 
+from contextlib import contextmanager
+from functools import lru_cache
+
 import numpy as np
-import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
-import osmnx as ox
+import matplotlib.transforms as mtransforms
+import shapely
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.figure import Figure
+from matplotlib.path import Path
 
-from .config import BASE_FONT_SIZE, MIN_FONT_SIZE, MAX_CITY_CHARS, DEFAULT_FIGSIZE, DEFAULT_DPI, TEXT_CITY_POSITION, TEXT_LINE_POSITION, TEXT_COUNTRY_POSITION, TEXT_COORDS_POSITION, BASE_FIGURE_HEIGHT, BASE_FIGURE_WIDTH, LINE_WIDTH_INCHES
+from .config import BASE_FONT_SIZE, MIN_FONT_SIZE, MAX_CITY_CHARS, DEFAULT_FIGSIZE, DEFAULT_DPI, TEXT_CITY_POSITION, TEXT_LINE_POSITION, TEXT_COUNTRY_POSITION, TEXT_COORDS_POSITION, BASE_FIGURE_HEIGHT, LINE_WIDTH_INCHES, CLIP_MARGIN_PX, FADE_HEIGHT, FADE_WIDTH, MAP_LAYERS_ZORDER
+from .profiling import add_counts, stage
 from .theme import create_font_properties
+from .scene import normalize_highway, prepare_scene, clip_scene, quantize_scene
+from .lod import ground_pixel_size, simplify_scene, fade_scene
+from .strokes import merge_road_strokes
 
 
-def create_gradient_fade(ax, color, location='bottom', zorder=10):
+@contextmanager
+def agg_figure(**figure_kwargs):
     """
-    Creates a fade effect at the edges of the map.
-    Supports: 'bottom', 'top', 'left', 'right'
+    Yield a matplotlib Figure with its own Agg canvas, outside pyplot's
+    global state so figures can live in any thread. On exit, whether the
+    render succeeded or raised, the figure is cleared: its axes, artists and
+    the geometry they hold are freed right away instead of waiting for the
+    cyclic garbage collector, and so is the canvas with its pixel buffer.
     """
-    rgb = mcolors.to_rgb(color)
-    
-    xlim = ax.get_xlim()
-    ylim = ax.get_ylim()
-    x_range = xlim[1] - xlim[0]
-    y_range = ylim[1] - ylim[0]
-    
-    if location in ['bottom', 'top']:
-        vals = np.linspace(0, 1, 256).reshape(-1, 1)
-        gradient = np.hstack((vals, vals))
-        
-        my_colors = np.zeros((256, 4))
-        my_colors[:, 0] = rgb[0]
-        my_colors[:, 1] = rgb[1]
-        my_colors[:, 2] = rgb[2]
-        
-        if location == 'bottom':
-            my_colors[:, 3] = np.linspace(1, 0, 256)
-            extent_y_start = 0
-            extent_y_end = 0.15
-        else:  # top
-            my_colors[:, 3] = np.linspace(0, 1, 256)
-            extent_y_start = 0.85
-            extent_y_end = 1.0
-        
-        y_bottom = ylim[0] + y_range * extent_y_start
-        y_top = ylim[0] + y_range * extent_y_end
-        
-        custom_cmap = mcolors.ListedColormap(my_colors)
-        ax.imshow(gradient, extent=[xlim[0], xlim[1], y_bottom, y_top], 
-                  aspect='auto', cmap=custom_cmap, zorder=zorder, origin='lower')
-    
-    else:  # left or right
-        vals = np.linspace(0, 1, 256).reshape(1, -1)
-        gradient = np.vstack((vals, vals))
-        
-        my_colors = np.zeros((256, 4))
-        my_colors[:, 0] = rgb[0]
-        my_colors[:, 1] = rgb[1]
-        my_colors[:, 2] = rgb[2]
-        
-        if location == 'left':
-            my_colors[:, 3] = np.linspace(1, 0, 256)
-            extent_x_start = 0
-            extent_x_end = 0.10
-        else:  # right
-            my_colors[:, 3] = np.linspace(0, 1, 256)
-            extent_x_start = 0.90
-            extent_x_end = 1.0
-        
-        x_left = xlim[0] + x_range * extent_x_start
-        x_right = xlim[0] + x_range * extent_x_end
-        
-        custom_cmap = mcolors.ListedColormap(my_colors)
-        ax.imshow(gradient, extent=[x_left, x_right, ylim[0], ylim[1]], 
-                  aspect='auto', cmap=custom_cmap, zorder=zorder, origin='lower')
+    fig = Figure(**figure_kwargs)
+    FigureCanvasAgg(fig)
+    try:
+        yield fig
+    finally:
+        for ax in fig.axes:
+            ax.clear()
+        fig.clear()
+        FigureCanvasBase(fig)
+
+
+def get_road_color(highway, theme):
+    """
+    Return the theme color for a single highway type.
+    """
+    if highway in ['motorway', 'motorway_link']:
+        return theme['road_motorway']
+    elif highway in ['trunk', 'trunk_link', 'primary', 'primary_link']:
+        return theme['road_primary']
+    elif highway in ['secondary', 'secondary_link']:
+        return theme['road_secondary']
+    elif highway in ['tertiary', 'tertiary_link']:
+        return theme['road_tertiary']
+    elif highway in ['residential', 'living_street', 'unclassified']:
+        return theme['road_residential']
+    else:
+        return theme['road_default']
+
+
+def get_road_width(highway):
+    """
+    Return the base line width for a single highway type.
+    Major roads get thicker lines.
+    """
+    if highway in ['motorway', 'motorway_link']:
+        return 1.2
+    elif highway in ['trunk', 'trunk_link', 'primary', 'primary_link']:
+        return 1.0
+    elif highway in ['secondary', 'secondary_link']:
+        return 0.8
+    elif highway in ['tertiary', 'tertiary_link']:
+        return 0.6
+    else:
+        return 0.4
 
 
 def get_edge_colors_by_type(G, theme):
@@ -77,33 +81,10 @@ def get_edge_colors_by_type(G, theme):
     Assigns colors to edges based on road type hierarchy.
     Returns a list of colors corresponding to each edge in the graph.
     """
-    edge_colors = []
-    
-    for u, v, data in G.edges(data=True):
-        # Get the highway type (can be a list or string)
-        highway = data.get('highway', 'unclassified')
-        
-        # Handle list of highway types (take the first one)
-        if isinstance(highway, list):
-            highway = highway[0] if highway else 'unclassified'
-        
-        # Assign color based on road type
-        if highway in ['motorway', 'motorway_link']:
-            color = theme['road_motorway']
-        elif highway in ['trunk', 'trunk_link', 'primary', 'primary_link']:
-            color = theme['road_primary']
-        elif highway in ['secondary', 'secondary_link']:
-            color = theme['road_secondary']
-        elif highway in ['tertiary', 'tertiary_link']:
-            color = theme['road_tertiary']
-        elif highway in ['residential', 'living_street', 'unclassified']:
-            color = theme['road_residential']
-        else:
-            color = theme['road_default']
-        
-        edge_colors.append(color)
-    
-    return edge_colors
+    return [
+        get_road_color(normalize_highway(data.get('highway', 'unclassified')), theme)
+        for u, v, data in G.edges(data=True)
+    ]
 
 
 def get_edge_widths_by_type(G):
@@ -111,29 +92,10 @@ def get_edge_widths_by_type(G):
     Assigns line widths to edges based on road type.
     Major roads get thicker lines.
     """
-    edge_widths = []
-    
-    for u, v, data in G.edges(data=True):
-        highway = data.get('highway', 'unclassified')
-        
-        if isinstance(highway, list):
-            highway = highway[0] if highway else 'unclassified'
-        
-        # Assign width based on road importance
-        if highway in ['motorway', 'motorway_link']:
-            width = 1.2
-        elif highway in ['trunk', 'trunk_link', 'primary', 'primary_link']:
-            width = 1.0
-        elif highway in ['secondary', 'secondary_link']:
-            width = 0.8
-        elif highway in ['tertiary', 'tertiary_link']:
-            width = 0.6
-        else:
-            width = 0.4
-        
-        edge_widths.append(width)
-    
-    return edge_widths
+    return [
+        get_road_width(normalize_highway(data.get('highway', 'unclassified')))
+        for u, v, data in G.edges(data=True)
+    ]
 
 
 def calculate_dynamic_font_size(city_name):
@@ -150,85 +112,204 @@ def calculate_dynamic_font_size(city_name):
     return adjusted_font_size
 
 
-def render_poster(city, country, point, graph, water, parks, theme, fonts, 
-                  output_file, output_format, dpi=DEFAULT_DPI, figsize=DEFAULT_FIGSIZE):
+def configure_map_axes(ax, extent):
     """
-    Render the final map poster with all layers and typography.
+    Set the axes view to extent (xmin, xmax, ymin, ymax) with no ticks,
+    spines or margins around the map.
     """
-    print("Rendering map...")
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.margins(0)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.get_xaxis().set_visible(False)
+    ax.get_yaxis().set_visible(False)
+
+
+def polygon_paths(polygons):
+    """
+    Convert a layer of (Multi)Polygons into matplotlib Paths in bulk, one
+    compound Path per Polygon with its holes as extra subpaths.
     
-    # Setup Plot
-    fig, ax = plt.subplots(figsize=figsize, facecolor=theme['bg'])
-    ax.set_facecolor(theme['bg'])
-    ax.set_position((0, 0, 1, 1))
-    
-    # Project graph to UTM for proper metric plotting
-    graph_proj = ox.project_graph(graph)
-    
-    # Plot Layers
-    # Layer 1: Polygons (filter to only plot polygon/multipolygon geometries)
-    if water is not None and not water.empty:
-        water_polys = water[water.geometry.type.isin(['Polygon', 'MultiPolygon'])]
-        if not water_polys.empty:
-            # Project water to same CRS as graph
-            water_polys = water_polys.to_crs(graph_proj.graph['crs'])
-            water_polys.plot(ax=ax, facecolor=theme['water'], edgecolor='none', zorder=1)
-    
-    if parks is not None and not parks.empty:
-        parks_polys = parks[parks.geometry.type.isin(['Polygon', 'MultiPolygon'])]
-        if not parks_polys.empty:
-            # Project parks to same CRS as graph
-            parks_polys = parks_polys.to_crs(graph_proj.graph['crs'])
-            parks_polys.plot(ax=ax, facecolor=theme['parks'], edgecolor='none', zorder=2)
+    Exteriors are oriented counter-clockwise and holes clockwise, so holes
+    stay empty under both the nonzero and the even-odd fill rule.
+    """
+    parts = shapely.orient_polygons(shapely.get_parts(np.asarray(polygons)))
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    vertices, ring_index = shapely.get_coordinates(rings, return_index=True)
+    
+    # Rings are closed: start each one with MOVETO and end it with CLOSEPOLY
+    codes = np.full(len(vertices), Path.LINETO, dtype=Path.code_type)
+    starts = np.flatnonzero(np.diff(ring_index, prepend=-1))
+    codes[starts] = Path.MOVETO
+    codes[np.append(starts[1:], len(vertices)) - 1] = Path.CLOSEPOLY
+    
+    splits = np.flatnonzero(np.diff(ring_part[ring_index])) + 1
+    return [Path(part_vertices, part_codes) for part_vertices, part_codes
+            in zip(np.split(vertices, splits), np.split(codes, splits))]
+
+
+def line_segments(lines):
+    """
+    Convert a layer of (Multi)LineStrings into LineCollection segments in
+    bulk. Returns (segments, feature) where feature[i] is the index of the
+    feature segment i came from.
+    """
+    parts, feature = shapely.get_parts(np.asarray(lines), return_index=True)
+    keep = ~shapely.is_empty(parts)
+    vertices, part = shapely.get_coordinates(parts[keep], return_index=True)
+    if not len(vertices):
+        return [], feature[keep]
+    return np.split(vertices, np.flatnonzero(np.diff(part)) + 1), feature[keep]
+
+
+def draw_polygon_layer(ax, polygons, color, zorder):
+    """Draw a polygon layer as a single PathCollection without outlines."""
+    collection = PathCollection(polygon_paths(polygons), facecolors=color,
+                                edgecolors='none', linewidths=0, zorder=zorder)
+    ax.add_collection(collection)
+    return collection
+
+
+@stage('draw_layers')
+def draw_map_layers(ax, scene, theme, figsize, snap=None):
+    """
+    Draw water, parks and roads of a prepared scene onto ax.
+    Road widths scale with the figure height of the full poster.
+    Tiles pass snap=False: a clipped, almost axis-aligned edge would otherwise
+    snap to the pixel grid differently in a tile than in the full render.
+    All layers are drawn below zorder MAP_LAYERS_ZORDER.
+    """
+    # Layer 1: Polygons
+    if scene['water'] is not None and not scene['water'].empty:
+        draw_polygon_layer(ax, scene['water'].geometry, theme['water'], zorder=1)
+    
+    if scene['parks'] is not None and not scene['parks'].empty:
+        draw_polygon_layer(ax, scene['parks'].geometry, theme['parks'], zorder=2)
     
     # Layer 2: Roads with hierarchy coloring
-    print("Applying road hierarchy colors...")
-    edge_colors = get_edge_colors_by_type(graph_proj, theme)
-    edge_widths = get_edge_widths_by_type(graph_proj)
+    roads = scene['roads']
+    if roads.empty:
+        return
+    # Style each road class once, then look it up per segment
+    classes, road_class = np.unique(roads['highway'].to_numpy(), return_inverse=True)
+    class_colors = mcolors.to_rgba_array([get_road_color(h, theme) for h in classes])
     # Scale road linewidths with figure height to maintain proportions across sizes
-    _fig_w, _fig_h = figsize
-    _scale_y_edges = _fig_h / BASE_FIGURE_HEIGHT
-    edge_widths = [w * _scale_y_edges for w in edge_widths]
-    
-    ox.plot_graph(
-        graph_proj, ax=ax, bgcolor=theme['bg'],
-        node_size=0,
-        edge_color=edge_colors,
-        edge_linewidth=edge_widths,
-        show=False, close=False
-    )
-    
-    # Set equal aspect to prevent geographic distortion
-    ax.set_aspect('equal', adjustable='datalim')
-    
-    # Adjust data limits to match figure aspect ratio
-    xlim = ax.get_xlim()
-    ylim = ax.get_ylim()
-    x_center = (xlim[0] + xlim[1]) / 2
-    y_center = (ylim[0] + ylim[1]) / 2
-    x_range = xlim[1] - xlim[0]
-    y_range = ylim[1] - ylim[0]
-    
-    fig_width, fig_height = figsize
-    target_aspect = fig_width / fig_height  # 12/16 = 0.75
-    current_aspect = x_range / y_range
-    
-    if current_aspect > target_aspect:
-        # Data is wider than figure, need to expand vertically
-        new_y_range = x_range / target_aspect
-        ax.set_ylim(y_center - new_y_range/2, y_center + new_y_range/2)
-    else:
-        # Data is taller than figure, need to expand horizontally
-        new_x_range = y_range * target_aspect
-        ax.set_xlim(x_center - new_x_range/2, x_center + new_x_range/2)
+    _scale_y_edges = figsize[1] / BASE_FIGURE_HEIGHT
+    class_widths = np.array([get_road_width(h) * _scale_y_edges for h in classes])
+    segments, feature = line_segments(roads.geometry)
+    ax.add_collection(LineCollection(segments, colors=class_colors[road_class[feature]],
+                                     linewidths=class_widths[road_class[feature]],
+                                     snap=snap, zorder=1))
+
+
+@lru_cache(maxsize=16)
+def _fade_ramp(pixels, size):
+    """
+    Opacity of the two opposite edge fades along one poster axis of the
+    given length in pixels, sampled at pixel centers.
+    size is the fraction of the axis each fade covers. Cached (read-only):
+    a ramp is one row of floats, while the 2-D overlay built from it is as
+    large as the poster and so is not kept between renders.
+    """
+    fraction = (np.arange(pixels) + 0.5) / pixels
+    low = np.clip(1 - fraction / size, 0, 1)
+    high = np.clip(1 - (1 - fraction) / size, 0, 1)
+    ramp = 1 - (1 - low) * (1 - high)
+    ramp.flags.writeable = False
+    return ramp
+
+
+def build_fade_overlay(size_px, color, rect=None):
+    """
+    Composite the four edge fades into one RGBA image.
+
+    size_px is the (width, height) of the poster in pixels and rect
+    (left, top, right, bottom) the part of it to build (default: all).
+    The fades are blended over each other exactly as four stacked layers
+    would be, so corners get 1 - (1 - a_x) * (1 - a_y). Returns an
+    (h, w, 4) uint8 array, rows top to bottom.
+    """
+    width, height = size_px
+    left, top, right, bottom = rect or (0, 0, width, height)
+    # Row 0 is the top of the poster
+    alpha_x = _fade_ramp(width, FADE_WIDTH)[left:right]
+    alpha_y = _fade_ramp(height, FADE_HEIGHT)[::-1][top:bottom]
+    alpha = 1 - np.outer(1 - alpha_y, 1 - alpha_x)
+
+    overlay = np.empty(alpha.shape + (4,), dtype=np.uint8)
+    overlay[..., :3] = np.round(np.array(mcolors.to_rgb(color)) * 255)
+    overlay[..., 3] = np.round(alpha * 255)
+    return overlay
+
+
+def fade_pixels(theme, size_px, rect=None):
+    """
+    Return the poster as drawn with no map layers or text: the edge fades
+    over the background, as an (h, w, 3) uint8 array. size_px and rect are
+    passed to build_fade_overlay; the blend matches what Agg draws.
+    """
+    overlay = build_fade_overlay(tuple(size_px), theme['gradient_color'],
+                                 tuple(rect) if rect else None)
+    bg = np.round(np.array(mcolors.to_rgb(theme['bg'])) * 255)
+    alpha = overlay[..., 3:] / 255
+    return np.round(bg * (1 - alpha) + overlay[..., :3] * alpha).astype(np.uint8)
+
+
+@stage('fades')
+def draw_gradient_fades(ax, theme, size_px, rect=None, zorder=10):
+    """
+    Draw the fade effect on all four edges of the map as a single image.
+    size_px and rect are passed to build_fade_overlay; the image covers the
+    current axes limits, which must show exactly that part of the poster.
+    """
+    overlay = build_fade_overlay(tuple(size_px), theme['gradient_color'],
+                                 tuple(rect) if rect else None)
+    extent = (*ax.get_xlim(), *ax.get_ylim())
+    ax.imshow(overlay, extent=extent, aspect='auto', interpolation='none',
+              zorder=zorder)
+
+
+def format_coordinates(point):
+    """
+    Format a (lat, lon) point as the poster coordinate label.
+    """
+    lat, lon = point
+    coords = f"{lat:.4f}° N / {lon:.4f}° E" if lat >= 0 else f"{abs(lat):.4f}° S / {lon:.4f}° E"
+    if lon < 0:
+        coords = coords.replace("E", "W")
+    return coords
+
+
+def poster_transform(width_px, height_px, offset=(0, 0)):
+    """
+    Map poster fractions (0-1) to display pixels of a canvas that shows part
+    of a width_px x height_px poster, with its bottom-left corner offset
+    (x, y) pixels from the poster's bottom-left corner.
+    """
+    return mtransforms.Affine2D().scale(width_px, height_px).translate(-offset[0], -offset[1])
+
+
+def typography_height(figsize):
+    """
+    Height in inches from the bottom of the poster that draw_typography
+    stays below: the city name baseline plus twice its largest font size.
+    """
+    return (TEXT_CITY_POSITION + 2 * BASE_FONT_SIZE / 72) * figsize[1] / BASE_FIGURE_HEIGHT
+
+
+@stage('typography')
+def draw_typography(ax, city, country, point, theme, fonts, figsize, transform=None):
+    """
+    Draw city name, divider line, country, coordinates and attribution.
     
-    # Layer 3: Gradients (All edges)
-    create_gradient_fade(ax, theme['gradient_color'], location='bottom', zorder=10)
-    create_gradient_fade(ax, theme['gradient_color'], location='top', zorder=10)
-    create_gradient_fade(ax, theme['gradient_color'], location='left', zorder=10)
-    create_gradient_fade(ax, theme['gradient_color'], location='right', zorder=10)
+    Positions are fractions of the full poster, mapped through transform
+    (default: the axes). Tiles pass a poster_transform so each tile gets
+    exactly the text pixels the full render would have there.
+    """
+    if transform is None:
+        transform = ax.transAxes
     
-    # Typography
     adjusted_font_size = calculate_dynamic_font_size(city)
     font_props = create_font_properties(fonts, adjusted_font_size, figsize)
     
@@ -238,7 +319,6 @@ def render_poster(city, country, point, graph, water, parks, theme, fonts,
     # Scale positions proportionally with figure height to maintain spacing
     fig_width, fig_height = figsize
     scale_factor_y = fig_height / BASE_FIGURE_HEIGHT
-    scale_factor_x = fig_width / BASE_FIGURE_WIDTH
     
     # Scale text positions
     city_inches = TEXT_CITY_POSITION * scale_factor_y
@@ -246,7 +326,7 @@ def render_poster(city, country, point, graph, water, parks, theme, fonts,
     country_inches = TEXT_COUNTRY_POSITION * scale_factor_y
     coords_inches = TEXT_COORDS_POSITION * scale_factor_y
     
-    # Normalize to figure height for transform=ax.transAxes
+    # Normalize to figure height for the poster transform
     city_y = city_inches / fig_height
     line_y = line_inches / fig_height
     country_y = country_inches / fig_height
@@ -260,42 +340,193 @@ def render_poster(city, country, point, graph, water, parks, theme, fonts,
     line_x_end = 0.5 + line_half_width_norm
     
     # Bottom text
-    ax.text(0.5, city_y, spaced_city, transform=ax.transAxes,
+    ax.text(0.5, city_y, spaced_city, transform=transform,
             color=theme['text'], ha='center', fontproperties=font_props['main'], zorder=11)
     
-    ax.plot([line_x_start, line_x_end], [line_y, line_y], transform=ax.transAxes, 
+    ax.plot([line_x_start, line_x_end], [line_y, line_y], transform=transform, 
             color=theme['text'], linewidth=line_width, zorder=11)
     
-    ax.text(0.5, country_y, country.upper(), transform=ax.transAxes,
+    ax.text(0.5, country_y, country.upper(), transform=transform,
             color=theme['text'], ha='center', fontproperties=font_props['sub'], zorder=11)
     
-    lat, lon = point
-    coords = f"{lat:.4f}° N / {lon:.4f}° E" if lat >= 0 else f"{abs(lat):.4f}° S / {lon:.4f}° E"
-    if lon < 0:
-        coords = coords.replace("E", "W")
-    
-    ax.text(0.5, coords_y, coords, transform=ax.transAxes,
+    ax.text(0.5, coords_y, format_coordinates(point), transform=transform,
             color=theme['text'], alpha=0.7, ha='center', fontproperties=font_props['coords'], zorder=11)
     
     # Attribution (bottom right)
-    ax.text(0.98, 0.02, "© OpenStreetMap contributors", transform=ax.transAxes,
+    ax.text(0.98, 0.02, "© OpenStreetMap contributors", transform=transform,
             color=theme['text'], alpha=0.5, ha='right', va='bottom', 
             fontproperties=font_props['attr'], zorder=11)
+
+
+def _report_lod(label, stats):
+    """Print what a level-of-detail stage removed."""
+    removed = stats['vertices_before'] - stats['vertices_after']
+    share = removed / stats['vertices_before'] if stats['vertices_before'] else 0
+    print(f"✓ {label} at {stats['pixel_size']:.1f} m/px: removed {removed:,} of "
+          f"{stats['vertices_before']:,} vertices ({share:.0%}), "
+          f"{stats['features_before'] - stats['features_after']:,} features dropped")
+
+
+def scene_counts(scene):
+    """Return the number of road edges, polygons and vertices in a scene."""
+    roads = scene['roads'].geometry
+    polygons = [layer for layer in (scene['water'], scene['parks']) if layer is not None]
+    vertices = int(shapely.get_num_coordinates(np.asarray(roads)).sum())
+    vertices += sum(int(shapely.get_num_coordinates(np.asarray(layer)).sum()) for layer in polygons)
+    return {
+        'edges': len(roads),
+        'polygons': sum(len(layer) for layer in polygons),
+        'vertices': vertices,
+    }
+
+
+@stage('scene')
+def build_scene(graph, water, parks, figsize, dpi, merge=False, merge_through=False,
+                clip=True, fade_lod=False, lod=False, minor_road_min_density=None,
+                major_roads_only=False):
+    """
+    Prepare the scene and run the optional geometry stages on it.
+    
+    merge chains same-class road segments through plain joins into long
+    strokes; merge_through (implies merge) also continues them straight
+    through intersections. clip cuts every layer to the visible frame (plus a few pixels so strokes
+    at the edge are unchanged). fade_lod drops minor roads and simplifies
+    harder where the edge fades hide the map. lod simplifies geometry to the
+    output pixel size; minor_road_min_density (pixels per km, implies lod)
+    also skips minor roads on coarse outputs, and major_roads_only (implies
+    lod) skips them at any resolution. Finally all vertices are snapped to
+    the float32 grid around the poster center (see quantize_scene).
+    """
+    scene = prepare_scene(graph, water, parks, figsize)
+    
+    if merge or merge_through:
+        scene, stats = merge_road_strokes(scene, through_intersections=merge_through)
+        print(f"✓ Merged {stats['segments_before']:,} road segments into "
+              f"{stats['strokes_after']:,} strokes")
+    
+    if clip:
+        scene = clip_scene(scene, margin=CLIP_MARGIN_PX * ground_pixel_size(scene['extent'], figsize, dpi))
+    
+    if fade_lod:
+        scene, stats = fade_scene(scene, figsize, dpi)
+        _report_lod("Fade level of detail", stats)
+    
+    if lod or minor_road_min_density or major_roads_only:
+        scene, stats = simplify_scene(scene, figsize, dpi, minor_road_min_density=minor_road_min_density,
+                                      major_roads_only=major_roads_only)
+        _report_lod("Level of detail", stats)
+        if stats['minor_roads_skipped']:
+            print("  Minor roads skipped at this resolution")
+    
+    scene = quantize_scene(scene)
+    add_counts(**scene_counts(scene))
+    return scene
+
+
+def render_poster(city, country, point, graph, water, parks, theme, fonts, 
+                  output_file, output_format, dpi=DEFAULT_DPI, figsize=DEFAULT_FIGSIZE,
+                  tiled=False, workers=None, threads=False, compact_vector=False, raster_dpi=None, crop=None, merge=False,
+                  merge_through=False, clip=True, fade_lod=False, lod=False,
+                  minor_road_min_density=None):
+    """
+    Render the final map poster with all layers and typography.
+    With tiled=True (PNG only) the poster is rasterized in bands across a
+    process pool (a thread pool with threads=True) and streamed to disk, see
+    src.tiling. The 'dzi' format writes a Deep Zoom tile pyramid instead,
+    see src.pyramid. Figures never go through pyplot, so several posters
+    can also render concurrently in threads of one process. With
+    compact_vector=True SVG and PDF go through src.vector, which groups roads
+    by class and (for SVG) streams coordinates rounded to dpi. raster_dpi
+    rasterizes the map layers of SVG/PDF output at that DPI while fades
+    stay images and typography stays vector. crop (left, top, right, bottom
+    poster fractions, PNG only) renders just that window at full resolution,
+    see src.tiling.render_poster_crop. merge,
+    merge_through, clip, fade_lod, lod and minor_road_min_density control the
+    geometry stages of build_scene.
+    """
+    scene_options = dict(merge=merge, merge_through=merge_through, clip=clip,
+                         fade_lod=fade_lod, lod=lod,
+                         minor_road_min_density=minor_road_min_density)
+    
+    if output_format.lower() == 'dzi':
+        from .pyramid import render_poster_pyramid
+        return render_poster_pyramid(
+            city, country, point, graph, water, parks, theme, fonts,
+            output_file, output_format, dpi=dpi, figsize=figsize, workers=workers,
+            scene_options=scene_options, threads=threads
+        )
+    
+    if compact_vector:
+        from .vector import render_poster_vector
+        return render_poster_vector(
+            city, country, point, graph, water, parks, theme, fonts,
+            output_file, output_format, dpi=dpi, figsize=figsize,
+            scene_options=scene_options
+        )
+    
+    if crop:
+        from .tiling import render_poster_crop
+        return render_poster_crop(
+            city, country, point, graph, water, parks, theme, fonts,
+            output_file, output_format, crop, dpi=dpi, figsize=figsize,
+            scene_options=scene_options
+        )
+    
+    if tiled:
+        from .tiling import render_poster_tiled
+        return render_poster_tiled(
+            city, country, point, graph, water, parks, theme, fonts,
+            output_file, output_format, dpi=dpi, figsize=figsize, workers=workers,
+            scene_options=scene_options, threads=threads
+        )
     
-    # Save
-    print(f"Saving to {output_file}...")
+    print("Rendering map...")
     
-    fmt = output_format.lower()
-    save_kwargs = dict(facecolor=theme["bg"], bbox_inches="tight", pad_inches=0.05)
+    scene = build_scene(graph, water, parks, figsize, dpi, **scene_options)
     
-    # DPI matters mainly for raster formats
-    if fmt == "png":
-        save_kwargs["dpi"] = dpi
-        width_px = int(figsize[0] * dpi)
-        height_px = int(figsize[1] * dpi)
-        print(f"  Resolution: {width_px}x{height_px} pixels ({dpi} DPI)")
+    fmt = output_format.lower()
+    hybrid = bool(raster_dpi) and fmt in ("svg", "pdf")
     
-    plt.savefig(output_file, format=fmt, **save_kwargs)
-    plt.close()
+    # Setup Plot: a standalone figure, torn down even if drawing or saving fails
+    with agg_figure(figsize=figsize, facecolor=theme['bg']) as fig:
+        ax = fig.add_axes((0, 0, 1, 1))
+        ax.set_facecolor(theme['bg'])
+        
+        # Plot Layers
+        print("Applying road hierarchy colors...")
+        draw_map_layers(ax, scene, theme, figsize)
+        if hybrid:
+            # Everything below the fades becomes a single image in the vector file
+            ax.set_rasterization_zorder(MAP_LAYERS_ZORDER)
+        
+        # Limit the view to the poster extent with equal aspect to prevent geographic distortion
+        configure_map_axes(ax, scene['extent'])
+        ax.set_aspect('equal', adjustable='datalim')
+        
+        # Layer 3: Gradients (All edges), one pixel per output pixel for PNG
+        fade_dpi = dpi if fmt == "png" else fig.dpi
+        draw_gradient_fades(ax, theme, (int(figsize[0] * fade_dpi), int(figsize[1] * fade_dpi)))
+        
+        # Typography
+        draw_typography(ax, city, country, point, theme, fonts, figsize)
+        
+        # Save
+        print(f"Saving to {output_file}...")
+        
+        save_kwargs = dict(facecolor=theme["bg"], bbox_inches="tight", pad_inches=0.05)
+        
+        # DPI matters mainly for raster formats
+        if fmt == "png":
+            save_kwargs["dpi"] = dpi
+            width_px = int(figsize[0] * dpi)
+            height_px = int(figsize[1] * dpi)
+            print(f"  Resolution: {width_px}x{height_px} pixels ({dpi} DPI)")
+        elif hybrid:
+            # Rasterized parts of vector output are rendered at the savefig dpi
+            save_kwargs["dpi"] = raster_dpi
+            print(f"  Map layers rasterized at {raster_dpi} DPI, text kept as vector")
+        
+        with stage('savefig'):
+            fig.savefig(output_file, format=fmt, **save_kwargs)
     
     print(f"✓ Done! Poster saved as {output_file}")
@@ -0,0 +1,242 @@
+"""Scene preparation: projected, render-ready map layers and view extent."""
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from shapely.geometry import box
+
+from .profiling import stage
+from .utils import lazy_import
+
+# Only projection needs OSMnx, so posters from cached scenes skip loading it
+ox = lazy_import('osmnx')
+
+
+# Road types drawn wider than the residential/default 0.4 width
+MAJOR_ROAD_TYPES = {
+    'motorway', 'motorway_link',
+    'trunk', 'trunk_link', 'primary', 'primary_link',
+    'secondary', 'secondary_link',
+    'tertiary', 'tertiary_link',
+}
+
+
+def normalize_highway(highway):
+    """
+    Reduce an OSM highway tag value to a single road type.
+    Lists take their first entry; missing values become 'unclassified'.
+    """
+    if isinstance(highway, list):
+        highway = highway[0] if highway else 'unclassified'
+    if not isinstance(highway, str):
+        highway = 'unclassified'
+    return highway
+
+
+def dissolve_polygons(polygons):
+    """
+    Merge overlapping polygons (e.g. a riverbank inside natural=water) and
+    split the result into single Polygons, so every area is drawn once.
+
+    Only groups of intersecting polygons are unioned; isolated ones pass
+    through untouched. Returns a GeoSeries with the same CRS.
+    """
+    geometry = polygons.to_numpy()
+    invalid = ~shapely.is_valid(geometry)
+    if invalid.any():
+        geometry = geometry.copy()
+        geometry[invalid] = shapely.make_valid(geometry[invalid])
+    # make_valid may return collections holding lines next to the polygons
+    geometry = shapely.get_parts(geometry)
+    geometry = shapely.get_parts(geometry[np.isin(shapely.get_type_id(geometry), (3, 6))])
+
+    left, right = shapely.STRtree(geometry).query(geometry, predicate='intersects')
+    pairs = left != right
+    if pairs.any():
+        n = len(geometry)
+        adjacency = coo_matrix((np.ones(pairs.sum()), (left[pairs], right[pairs])), shape=(n, n))
+        _, labels = connected_components(adjacency, directed=False)
+        grouped = np.bincount(labels)[labels] > 1
+        order = np.argsort(labels[grouped], kind='stable')
+        groups = np.split(geometry[grouped][order],
+                          np.flatnonzero(np.diff(labels[grouped][order])) + 1)
+        merged = shapely.get_parts([shapely.union_all(group) for group in groups])
+        geometry = np.concatenate((geometry[~grouped], merged[shapely.get_type_id(merged) == 3]))
+
+    return gpd.GeoSeries(geometry, crs=polygons.crs)
+
+
+def project_polygons(features, crs):
+    """
+    Keep only Polygon/MultiPolygon geometries, project them to crs and
+    dissolve overlaps. Returns a GeoSeries, or None if there is nothing to draw.
+    """
+    if features is None or features.empty:
+        return None
+    polys = features[features.geometry.type.isin(['Polygon', 'MultiPolygon'])]
+    if polys.empty:
+        return None
+    return dissolve_polygons(polys.geometry.to_crs(crs))
+
+
+def replace_geometry(layer, geometry):
+    """
+    Return layer with its geometry replaced by geometry (same index).
+    Works for both GeoDataFrame and GeoSeries layers.
+    """
+    if hasattr(layer, 'set_geometry'):
+        return layer.set_geometry(geometry)
+    return geometry
+
+
+def calculate_view_extent(bounds, figsize, padding=0.02):
+    """
+    Calculate the visible map extent for a poster.
+
+    Pads the data bounds (west, south, east, north) like osmnx does, then grows
+    the shorter side so the extent matches the figure aspect ratio.
+    Returns (xmin, xmax, ymin, ymax).
+    """
+    left, bottom, right, top = bounds
+    pad_x = (right - left) * padding
+    pad_y = (top - bottom) * padding
+    xmin, xmax = left - pad_x, right + pad_x
+    ymin, ymax = bottom - pad_y, top + pad_y
+
+    x_center = (xmin + xmax) / 2
+    y_center = (ymin + ymax) / 2
+    x_range = xmax - xmin
+    y_range = ymax - ymin
+
+    fig_width, fig_height = figsize
+    target_aspect = fig_width / fig_height
+    current_aspect = x_range / y_range
+
+    if current_aspect > target_aspect:
+        # Data is wider than figure, need to expand vertically
+        y_range = x_range / target_aspect
+    else:
+        # Data is taller than figure, need to expand horizontally
+        x_range = y_range * target_aspect
+
+    return (x_center - x_range / 2, x_center + x_range / 2,
+            y_center - y_range / 2, y_center + y_range / 2)
+
+
+def prepare_scene(graph, water, parks, figsize):
+    """
+    Project the street network and polygon layers into a render-ready scene.
+
+    Returns a dict with:
+        crs: Projected CRS shared by all layers
+        roads: GeoDataFrame with 'highway' and 'geometry' columns
+        water, parks: GeoSeries of polygons (or None)
+        extent: Visible extent (xmin, xmax, ymin, ymax) for the figure aspect
+    """
+    # Project to the UTM zone ox.project_graph would pick, but convert the
+    # edges to a GeoDataFrame once instead of rebuilding a projected graph
+    with stage('projection'):
+        nodes = ox.graph_to_gdfs(graph, edges=False)
+        crs = ox.projection.project_gdf(nodes).crs
+        edges = ox.graph_to_gdfs(graph, nodes=False).to_crs(crs)
+        water = project_polygons(water, crs)
+        parks = project_polygons(parks, crs)
+    with stage('classification'):
+        if 'highway' in edges.columns:
+            highway = edges['highway'].map(normalize_highway)
+        else:
+            highway = 'unclassified'
+        roads = edges[['geometry']].assign(highway=highway).reset_index(drop=True)
+        roads = roads[['highway', 'geometry']]
+
+    return {
+        'crs': crs,
+        'roads': roads,
+        'water': water,
+        'parks': parks,
+        'extent': calculate_view_extent(roads.total_bounds, figsize),
+    }
+
+
+def query_scene(scene, window):
+    """
+    Return a copy of the scene holding only geometry intersecting window.
+
+    window is (xmin, xmax, ymin, ymax) in scene coordinates. Uses each
+    layer's spatial index so the cost scales with the window, not the map.
+    """
+    xmin, xmax, ymin, ymax = window
+    area = box(xmin, ymin, xmax, ymax)
+
+    def _subset(layer):
+        if layer is None or layer.empty:
+            return layer
+        hits = layer.sindex.query(area, predicate='intersects')
+        hits.sort()
+        return layer.iloc[hits]
+
+    subset = dict(scene)
+    subset['roads'] = _subset(scene['roads'])
+    subset['water'] = _subset(scene['water'])
+    subset['parks'] = _subset(scene['parks'])
+    return subset
+
+
+def scene_origin(scene):
+    """Return the poster center (x, y) of a scene, the origin of its float32 coordinates."""
+    xmin, xmax, ymin, ymax = scene['extent']
+    return np.array([(xmin + xmax) / 2, (ymin + ymax) / 2])
+
+
+def quantize_scene(scene):
+    """
+    Snap every vertex to the float32 grid around the poster center.
+
+    Scenes are cached and handed to render workers as float32 offsets from
+    the center (see src.payload.pack_scene). Snapping once here makes that
+    round trip lossless, so cached scenes and every tile draw exactly the
+    coordinates of the full render. The grid is finer than a millimeter
+    within 8 km of the center.
+    """
+    origin = scene_origin(scene)
+
+    def _snap(coords):
+        return origin + (coords - origin).astype(np.float32)
+
+    def _quantize(layer):
+        if layer is None or layer.empty:
+            return layer
+        snapped = shapely.transform(layer.geometry.to_numpy(), _snap)
+        return replace_geometry(layer, gpd.GeoSeries(snapped, index=layer.index, crs=layer.crs))
+
+    quantized = dict(scene)
+    quantized['roads'] = _quantize(scene['roads'])
+    quantized['water'] = _quantize(scene['water'])
+    quantized['parks'] = _quantize(scene['parks'])
+    return quantized
+
+
+def clip_scene(scene, margin=0.0):
+    """
+    Clip every layer to the view extent grown by margin (scene units).
+
+    Uses one vectorized clip_by_rect call per layer so geometry outside the
+    visible frame is never turned into artists, and drops what ends up empty.
+    """
+    xmin, xmax, ymin, ymax = scene['extent']
+    rect = (xmin - margin, ymin - margin, xmax + margin, ymax + margin)
+
+    def _clip(layer):
+        if layer is None or layer.empty:
+            return layer
+        clipped = layer.geometry.clip_by_rect(*rect)
+        keep = (~clipped.is_empty).to_numpy()
+        return replace_geometry(layer, clipped)[keep]
+
+    clipped = dict(scene)
+    clipped['roads'] = _clip(scene['roads'])
+    clipped['water'] = _clip(scene['water'])
+    clipped['parks'] = _clip(scene['parks'])
+    return clipped
@@ -0,0 +1,186 @@
+"""Stroke merging: chain road segments of one class into long polylines."""
+
+from collections import defaultdict
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from .config import MERGE_MAX_TURN_DEG
+
+
+def drop_reverse_duplicates(roads):
+    """
+    Drop the second copy of two-way streets.
+
+    A directed street graph stores both directions of a two-way street as
+    separate edges with the same (reversed) geometry; one stroke is enough.
+    """
+    key = shapely.to_wkb(shapely.normalize(roads.geometry.to_numpy()))
+    keep = ~roads.assign(_key=key).duplicated(subset=['highway', '_key']).to_numpy()
+    return roads[keep]
+
+
+def _end_directions(coords, offsets):
+    """
+    Return unit vectors pointing from each line end into the line, shaped
+    (n, 2, 2) for (line, start/end, xy).
+    """
+    counts = np.diff(offsets)
+    start_next = coords[offsets[:-1] + 1] - coords[offsets[:-1]]
+    end_previous = coords[offsets[1:] - 2] - coords[offsets[1:] - 1]
+    directions = np.stack((start_next, end_previous), axis=1)
+    length = np.linalg.norm(directions, axis=2, keepdims=True)
+    directions = np.divide(directions, length, out=np.zeros_like(directions), where=length > 0)
+    directions[counts < 2] = 0
+    return directions
+
+
+def _pair_ends(ends, classes, directions, min_cos):
+    """
+    Pair the ends meeting at one intersection that continue the same class
+    straight through. ends is a list of (line, side); returns pairs of ends,
+    most opposite first, never turning by more than acos(min_cos).
+    """
+    by_class = defaultdict(list)
+    for end in ends:
+        by_class[classes[end[0]]].append(end)
+
+    pairs = []
+    for group in by_class.values():
+        if len(group) < 2:
+            continue
+        candidates = []
+        for a in range(len(group)):
+            for b in range(a + 1, len(group)):
+                (line_a, side_a), (line_b, side_b) = group[a], group[b]
+                straightness = -directions[line_a, side_a] @ directions[line_b, side_b]
+                if line_a != line_b and straightness >= min_cos:
+                    candidates.append((straightness, a, b))
+        used = set()
+        for _, a, b in sorted(candidates, reverse=True):
+            if a not in used and b not in used:
+                used.update((a, b))
+                pairs.append((group[a], group[b]))
+    return pairs
+
+
+def _chain(partner, count):
+    """
+    Walk the partner links into chains.
+
+    Line ends are numbered 2 * line + side (0 = start, 1 = end); partner[end]
+    is the end joined to it, or -1. Returns a list of chains, each a list of
+    (line, reversed) in drawing order.
+    """
+    # Lines joined to nothing are strokes of their own
+    ends = partner.reshape(-1, 2)
+    visited = (ends < 0).all(axis=1)
+    chains = [[(int(line), False)] for line in np.flatnonzero(visited)]
+
+    def _walk(line, entry_side):
+        chain = []
+        while not visited[line]:
+            visited[line] = True
+            chain.append((line, entry_side == 1))
+            following = partner[2 * line + 1 - entry_side]
+            if following < 0:
+                break
+            line, entry_side = divmod(int(following), 2)
+        return chain
+
+    # Open chains first, starting at an end without a partner
+    for end in np.flatnonzero(partner < 0):
+        line, side = divmod(int(end), 2)
+        if not visited[line]:
+            chains.append(_walk(line, side))
+    # Whatever is left are closed loops
+    for line in np.flatnonzero(~visited):
+        if not visited[line]:
+            chains.append(_walk(int(line), 0))
+    return chains
+
+
+def merge_road_strokes(scene, through_intersections=False, max_turn_deg=MERGE_MAX_TURN_DEG):
+    """
+    Merge contiguous road segments of the same class into long polylines.
+
+    Segments are joined where exactly two road ends meet and both share the
+    highway class. With through_intersections, same-class segments that cross
+    an intersection turning by at most max_turn_deg are joined as well, so a
+    boulevard becomes one stroke instead of one per block. Reverse copies of
+    two-way streets are dropped first.
+
+    Returns (scene, stats) where stats holds segments_before, strokes_after.
+    """
+    roads = scene['roads']
+    stats = {'segments_before': len(roads), 'strokes_after': len(roads)}
+    if roads.empty:
+        return scene, stats
+
+    if not (roads.geometry.geom_type == 'LineString').all():
+        roads = roads.explode(index_parts=False)
+        roads = roads[roads.geometry.geom_type == 'LineString']
+    roads = drop_reverse_duplicates(roads).reset_index(drop=True)
+    geometry = roads.geometry.to_numpy()
+    classes = roads['highway'].to_numpy()
+    count = len(roads)
+
+    coords, line_index = shapely.get_coordinates(geometry, return_index=True)
+    offsets = np.searchsorted(line_index, np.arange(count + 1))
+    endpoints = np.stack((coords[offsets[:-1]], coords[offsets[1:] - 1]), axis=1).reshape(-1, 2)
+    # Same coordinates, same node (a complex view sorts far faster than rows)
+    _, node = np.unique(np.ascontiguousarray(endpoints).view(np.complex128).ravel(),
+                        return_inverse=True)
+
+    # Group line ends (numbered 2 * line + side) by the node they touch
+    order = np.argsort(node, kind='stable')
+    group_start = np.flatnonzero(np.diff(node[order], prepend=-1))
+    group_size = np.diff(np.append(group_start, len(order)))
+    partner = np.full(2 * count, -1)
+
+    # Plain joins: exactly two ends of the same class from different lines
+    plain = group_start[group_size == 2]
+    end_a, end_b = order[plain], order[plain + 1]
+    join = (end_a // 2 != end_b // 2) & (classes[end_a // 2] == classes[end_b // 2])
+    partner[end_a[join]] = end_b[join]
+    partner[end_b[join]] = end_a[join]
+
+    if through_intersections:
+        directions = _end_directions(coords, offsets)
+        min_cos = np.cos(np.radians(max_turn_deg))
+        for first, size in zip(group_start[group_size > 2], group_size[group_size > 2]):
+            ends = [divmod(int(end), 2) for end in order[first:first + size]]
+            for (line_a, side_a), (line_b, side_b) in _pair_ends(ends, classes, directions, min_cos):
+                partner[2 * line_a + side_a] = 2 * line_b + side_b
+                partner[2 * line_b + side_b] = 2 * line_a + side_a
+
+    chains = _chain(partner, count)
+    # Keep roughly the original drawing order: each stroke where its first segment was
+    chains.sort(key=min)
+    chain_lengths = [len(chain) for chain in chains]
+    lines, backwards = np.array([step for chain in chains for step in chain]).reshape(-1, 2).T
+    stroke = np.repeat(np.arange(len(chains)), chain_lengths)
+    leading = np.zeros(len(lines), dtype=bool)
+    leading[np.cumsum(chain_lengths) - np.array(chain_lengths)] = True
+
+    # Gather every vertex of every stroke in drawing order, dropping the
+    # vertex shared with the previous segment of the same stroke
+    sizes = offsets[lines + 1] - offsets[lines]
+    segment = np.repeat(np.arange(len(lines)), sizes)
+    position = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    vertex = np.where(backwards[segment] == 1,
+                      offsets[lines + 1][segment] - 1 - position,
+                      offsets[lines][segment] + position)
+    keep = leading[segment] | (position > 0)
+
+    merged = gpd.GeoDataFrame(
+        {'highway': classes[lines[leading]]},
+        geometry=shapely.linestrings(coords[vertex[keep]], indices=stroke[segment][keep]),
+        crs=roads.crs,
+    )
+
+    stats['strokes_after'] = len(merged)
+    merged_scene = dict(scene)
+    merged_scene['roads'] = merged
+    return merged_scene, stats
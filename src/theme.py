@@ -2,7 +2,6 @@
 
 import json
 import os
-from matplotlib.font_manager import FontProperties
 
 from .config import THEMES_DIR, FONTS_DIR, FONT_SIZE_CITY, FONT_SIZE_COUNTRY, FONT_SIZE_COORDS, FONT_SIZE_ATTRIBUTION, BASE_FIGURE_HEIGHT
 
@@ -81,6 +80,9 @@ def create_font_properties(fonts, adjusted_city_font_size=None, figsize=None):
     Returns a dict with font properties for: main, sub, coords, attr.
     Scales font sizes based on figure height to maintain proportions.
     """
+    # Matplotlib loads with rendering, not for theme listing or validation
+    from matplotlib.font_manager import FontProperties
+    
     # Scale factor based on figure height
     if figsize:
         scale_factor = figsize[1] / BASE_FIGURE_HEIGHT
@@ -0,0 +1,344 @@
+"""Tiled, parallel rasterization for very large poster resolutions."""
+
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+from tqdm import tqdm
+
+from .config import DEFAULT_DPI, DEFAULT_FIGSIZE, TILED_BAND_HEIGHT, BASE_FIGURE_HEIGHT
+from .payload import expand_payload, pack_scene
+from .profiling import stage
+from .scene import query_scene
+from .renderer import (
+    agg_figure,
+    build_scene,
+    configure_map_axes,
+    draw_map_layers,
+    draw_gradient_fades,
+    draw_typography,
+    get_road_width,
+    poster_transform,
+    typography_height
+)
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class PNGStreamWriter:
+    """
+    Write an RGB PNG row band by row band without holding the image in memory.
+
+    Rows are Up-filtered and fed through a single zlib stream, so only the
+    band being written and the last row of the previous band are kept.
+    """
+
+    def __init__(self, path, width, height, dpi=None, compression=6):
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._previous_row = np.zeros((width, 3), dtype=np.uint8)
+        self._compressor = zlib.compressobj(compression)
+        self._file = open(path, 'wb')
+        self._file.write(PNG_SIGNATURE)
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        if dpi:
+            pixels_per_meter = int(round(dpi / 0.0254))
+            self._write_chunk(b'pHYs', struct.pack('>IIB', pixels_per_meter, pixels_per_meter, 1))
+
+    def _write_chunk(self, chunk_type, data):
+        self._file.write(struct.pack('>I', len(data)))
+        self._file.write(chunk_type)
+        self._file.write(data)
+        self._file.write(struct.pack('>I', zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+    def write_rows(self, rows):
+        """Append an (n, width, 3) uint8 array of rows to the image."""
+        rows = np.ascontiguousarray(rows, dtype=np.uint8)
+        if rows.ndim != 3 or rows.shape[1:] != (self.width, 3):
+            raise ValueError(f"Expected rows of shape (n, {self.width}, 3), got {rows.shape}")
+        if self.rows_written + len(rows) > self.height:
+            raise ValueError("More rows written than the image height")
+
+        # PNG filter type 2 (Up): each byte minus the byte above it, mod 256
+        above = np.concatenate((self._previous_row[np.newaxis], rows[:-1]))
+        filtered = (rows - above).reshape(len(rows), -1)
+        scanlines = np.hstack((np.full((len(rows), 1), 2, dtype=np.uint8), filtered))
+
+        data = self._compressor.compress(scanlines.tobytes())
+        if data:
+            self._write_chunk(b'IDAT', data)
+        self._previous_row = rows[-1].copy()
+        self.rows_written += len(rows)
+
+    def close(self):
+        """Flush the compressed stream and finish the file."""
+        if self._file.closed:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"PNG incomplete: {self.rows_written} of {self.height} rows written")
+            self._write_chunk(b'IDAT', self._compressor.flush())
+            self._write_chunk(b'IEND', b'')
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+def plan_bands(height_px, band_height=TILED_BAND_HEIGHT):
+    """
+    Split an image height into horizontal bands.
+    Returns a list of (row_start, row_end) tuples, top to bottom.
+    
+    Band heights are rounded up to even: Agg rounds text positions half to
+    even, so only even row offsets place glyphs exactly as the full render.
+    """
+    band_height += band_height % 2
+    return [(start, min(start + band_height, height_px))
+            for start in range(0, height_px, band_height)]
+
+
+def pixel_window(extent, poster_size, rect):
+    """
+    Return the data window (xmin, xmax, ymin, ymax) covered by the pixel
+    rectangle rect = (left, top, right, bottom) of a poster_size (width,
+    height) poster showing extent. Pixel rows count from the top.
+    """
+    xmin, xmax, ymin, ymax = extent
+    width_px, height_px = poster_size
+    left, top, right, bottom = rect
+    units_x = (xmax - xmin) / width_px
+    units_y = (ymax - ymin) / height_px
+    return (xmin + left * units_x, xmin + right * units_x,
+            ymax - bottom * units_y, ymax - top * units_y)
+
+
+def build_tile_jobs(scene, rects, poster_size, context, pack=False):
+    """
+    Yield one render_tile job per pixel rect (left, top, right, bottom).
+
+    context holds what every tile shares: theme, fonts, city, country, point,
+    figsize and dpi ('typography': False leaves the text out, and then city,
+    country, point and fonts are not needed). Each job only carries the
+    scene geometry intersecting its rect, grown by the widest stroke so lines
+    just outside still contribute their antialiased edge pixels. With
+    pack=True that geometry is packed as float32 arrays (see
+    src.payload.pack_scene), which pickle far faster for worker processes.
+    'blank' is set on jobs whose tile holds no geometry and no text, so it
+    shows only the background and fades (see renderer.fade_pixels).
+    """
+    figsize = context['figsize']
+    units_per_px = (scene['extent'][1] - scene['extent'][0]) / poster_size[0]
+    max_width_px = get_road_width('motorway') * figsize[1] / BASE_FIGURE_HEIGHT * context['dpi'] / 72
+    margin = (max_width_px + 2) * units_per_px
+    # Tiles whose bottom edge lies above this pixel row (from the top) hold no text
+    text_top = poster_size[1] - typography_height(figsize) * context['dpi']
+    if not context.get('typography', True):
+        text_top = poster_size[1]
+
+    for rect in rects:
+        left, top, right, bottom = rect
+        window = pixel_window(scene['extent'], poster_size, rect)
+        query = (window[0] - margin, window[1] + margin, window[2] - margin, window[3] + margin)
+        job = dict(context)
+        subset = query_scene(scene, query)
+        empty = all(layer is None or layer.empty
+                    for layer in (subset['roads'], subset['water'], subset['parks']))
+        job.update({
+            'scene': pack_scene(subset) if pack else subset,
+            'blank': empty and bottom <= text_top,
+            'window': window,
+            'size': (right - left, bottom - top),
+            'poster_size': poster_size,
+            'rect': rect,
+            'offset': (left, poster_size[1] - bottom),
+        })
+        yield job
+
+
+def _fit_pixels(pixels, height, width):
+    """Crop or edge-pad a rendered buffer that is off by a rounding pixel."""
+    pixels = pixels[:height, :width]
+    pad_rows = height - pixels.shape[0]
+    pad_cols = width - pixels.shape[1]
+    if pad_rows or pad_cols:
+        pixels = np.pad(pixels, ((0, pad_rows), (0, pad_cols), (0, 0)), mode='edge')
+    return pixels
+
+
+@stage('tile')
+def render_tile(job):
+    """
+    Rasterize one tile of the poster and return it as an (h, w, 3) uint8 array.
+    Runs in a worker process or thread; job is a plain dict so it pickles
+    cheaply, and the figure is private to the call so tiles render safely
+    side by side in threads.
+    """
+    scene = expand_payload(job['scene'])
+    theme = job['theme']
+    dpi = job['dpi']
+    figsize = job['figsize']
+    width, height = job['size']
+
+    with agg_figure(figsize=(width / dpi, height / dpi), dpi=dpi, facecolor=theme['bg']) as fig:
+        ax = fig.add_axes((0, 0, 1, 1))
+        ax.set_facecolor(theme['bg'])
+
+        draw_map_layers(ax, scene, theme, figsize, snap=False)
+        configure_map_axes(ax, job['window'])
+        draw_gradient_fades(ax, theme, job['poster_size'], rect=job['rect'])
+        if job.get('typography', True):
+            # Text is placed in pixels so glyph snapping matches across tile seams
+            poster_width, poster_height = job['poster_size']
+            transform = poster_transform(poster_width, poster_height, job['offset'])
+            draw_typography(ax, job['city'], job['country'], job['point'], theme, job['fonts'],
+                            figsize, transform=transform)
+
+        with stage('rasterize'):
+            fig.canvas.draw()
+        pixels = np.asarray(fig.canvas.buffer_rgba())[:, :, :3]
+        return _fit_pixels(pixels, height, width).copy()
+
+
+def iter_in_pool(func, jobs, workers, threads=False):
+    """
+    Yield func(job) for every job in order, running in a process pool and
+    keeping at most 2 * workers results in flight so memory stays bounded.
+    With threads=True a thread pool is used instead: jobs are not pickled
+    and share the scene in memory, at the cost of contending for the GIL.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield func(job)
+        return
+
+    executor = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with executor(max_workers=workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(func, job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def crop_pixel_rect(crop, poster_size):
+    """
+    Convert a crop window (left, top, right, bottom) in poster fractions to
+    a pixel rect, grown outward to even pixel edges (see plan_bands) so text
+    in the crop lands on the same pixels as in the full render.
+    """
+    width_px, height_px = poster_size
+    left, top, right, bottom = crop
+    left = int(left * width_px) // 2 * 2
+    top = int(top * height_px) // 2 * 2
+    right = min(-(-int(np.ceil(right * width_px)) // 2) * 2, width_px)
+    bottom = min(-(-int(np.ceil(bottom * height_px)) // 2) * 2, height_px)
+    return left, top, right, bottom
+
+
+def render_poster_crop(city, country, point, graph, water, parks, theme, fonts,
+                       output_file, output_format, crop, dpi=DEFAULT_DPI, figsize=DEFAULT_FIGSIZE,
+                       scene_options=None):
+    """
+    Render only a window of the poster, e.g. a full-DPI proof of one area.
+
+    crop is (left, top, right, bottom) in fractions of the poster from its
+    top-left corner. The scene, view extent, line widths, fades and text
+    placement are those of the full figsize * dpi poster, and only the
+    geometry inside the window is drawn, so the PNG matches the same pixels
+    of render_poster_tiled (antialiased edges to within one level). The
+    window is grown to even pixel edges, see crop_pixel_rect.
+    scene_options are passed on to build_scene.
+    """
+    if output_format.lower() != 'png':
+        raise ValueError("Crop rendering only supports PNG output")
+
+    poster_size = (int(figsize[0] * dpi), int(figsize[1] * dpi))
+    rect = crop_pixel_rect(crop, poster_size)
+    left, top, right, bottom = rect
+
+    print(f"Rendering crop {right - left}x{bottom - top} at ({left}, {top}) "
+          f"of a {poster_size[0]}x{poster_size[1]} poster...")
+    scene = build_scene(graph, water, parks, figsize, dpi, **(scene_options or {}))
+
+    context = {
+        'theme': theme,
+        'fonts': fonts,
+        'city': city,
+        'country': country,
+        'point': point,
+        'figsize': figsize,
+        'dpi': dpi,
+    }
+    job = next(build_tile_jobs(scene, [rect], poster_size, context))
+
+    print(f"Saving to {output_file}...")
+    pixels = render_tile(job)
+    with stage('encode'):
+        Image.fromarray(pixels).save(output_file, format='png', dpi=(dpi, dpi))
+    print(f"✓ Done! Crop saved as {output_file}")
+
+
+def render_poster_tiled(city, country, point, graph, water, parks, theme, fonts,
+                        output_file, output_format, dpi=DEFAULT_DPI, figsize=DEFAULT_FIGSIZE,
+                        workers=None, band_height=TILED_BAND_HEIGHT, scene_options=None,
+                        threads=False):
+    """
+    Render the poster in horizontal bands and stream them into a PNG.
+
+    Each band only receives the geometry that intersects it (via the layers'
+    spatial index) and bands render in a process pool (a thread pool with
+    threads=True), so peak memory depends on the band size rather than the
+    full canvas. The output is exactly figsize * dpi pixels, without the
+    tight-bbox padding of render_poster.
+    scene_options are passed on to build_scene.
+    """
+    if output_format.lower() != 'png':
+        raise ValueError("Tiled rendering only supports PNG output")
+
+    workers = workers or os.cpu_count() or 1
+    width_px = int(figsize[0] * dpi)
+    height_px = int(figsize[1] * dpi)
+    bands = plan_bands(height_px, band_height)
+
+    pool_kind = "threads" if threads else "workers"
+    print(f"Rendering map in {len(bands)} bands with {workers} {pool_kind}...")
+    scene = build_scene(graph, water, parks, figsize, dpi, **(scene_options or {}))
+
+    poster_size = (width_px, height_px)
+    context = {
+        'theme': theme,
+        'fonts': fonts,
+        'city': city,
+        'country': country,
+        'point': point,
+        'figsize': figsize,
+        'dpi': dpi,
+    }
+    rects = [(0, row_start, width_px, row_end) for row_start, row_end in bands]
+    jobs = build_tile_jobs(scene, rects, poster_size, context, pack=not threads and workers > 1)
+
+    print(f"Saving to {output_file}...")
+    print(f"  Resolution: {width_px}x{height_px} pixels ({dpi} DPI)")
+    with PNGStreamWriter(output_file, width_px, height_px, dpi=dpi) as writer:
+        for pixels in tqdm(iter_in_pool(render_tile, jobs, workers, threads), total=len(bands),
+                           desc="Rendering bands", unit="band"):
+            with stage('encode'):
+                writer.write_rows(pixels)
+
+    print(f"✓ Done! Poster saved as {output_file}")
@@ -1,6 +1,8 @@
 """Utility functions for file handling and resolution calculations."""
 
+import importlib.util
 import os
+import sys
 import numpy as np
 from datetime import datetime
 
@@ -45,6 +47,24 @@ def parse_resolution(resolution_str):
         raise ValueError(f"Invalid resolution format: {e}")
 
 
+def parse_crop(crop_str):
+    """
+    Parse a crop window string (e.g., '0.4,0.3,0.6,0.5') and return
+    (left, top, right, bottom) as fractions of the poster, measured from its
+    top-left corner.
+    """
+    try:
+        parts = crop_str.split(',')
+        if len(parts) != 4:
+            raise ValueError("Crop must be in format LEFT,TOP,RIGHT,BOTTOM (e.g., 0.4,0.3,0.6,0.5)")
+        left, top, right, bottom = (float(part) for part in parts)
+        if not (0 <= left < right <= 1 and 0 <= top < bottom <= 1):
+            raise ValueError("Crop edges must be fractions between 0 and 1 with left < right and top < bottom")
+        return left, top, right, bottom
+    except ValueError as e:
+        raise ValueError(f"Invalid crop format: {e}")
+
+
 def calculate_dpi_from_resolution(resolution_str, figsize=DEFAULT_FIGSIZE):
     """
     Calculate DPI needed to achieve target resolution with given figsize.
@@ -86,3 +106,19 @@ def calculate_bbox(point, dist, figsize=DEFAULT_FIGSIZE):
     west = lon - lon_dist_deg
     
     return (west, south, east, north)
+
+
+def lazy_import(name):
+    """
+    Return module name, deferring its actual import to the first attribute
+    access. Used for heavy libraries that only some stages of a run need.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
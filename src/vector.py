@@ -0,0 +1,330 @@
+"""Compact vector (SVG/PDF) output for road-heavy posters."""
+
+import io
+import re
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+import shapely
+from matplotlib.backends.backend_pdf import FigureCanvasPdf
+from matplotlib.backends.backend_svg import FigureCanvasSVG
+from matplotlib.colors import to_hex
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
+
+from .config import DEFAULT_DPI, DEFAULT_FIGSIZE, BASE_FIGURE_HEIGHT, VECTOR_PATH_CHUNK
+from .strokes import drop_reverse_duplicates
+from .renderer import (
+    agg_figure,
+    build_scene,
+    configure_map_axes,
+    draw_gradient_fades,
+    draw_polygon_layer,
+    draw_typography,
+    get_road_color,
+    get_road_width
+)
+
+
+def road_classes(roads):
+    """
+    Return the highway classes present in roads, thinnest first, so wider
+    (more important) roads are drawn on top.
+    """
+    classes = roads['highway'].unique().tolist()
+    return sorted(classes, key=lambda highway: (get_road_width(highway), classes.index(highway)))
+
+
+def pixel_grid(extent, size_px):
+    """
+    Return the grid (origin, step), both (x, y) in scene units, of the
+    pixels of a size_px (width, height) output of the scene extent.
+    """
+    xmin, xmax, ymin, ymax = extent
+    return (xmin, ymin), ((xmax - xmin) / size_px[0], (ymax - ymin) / size_px[1])
+
+
+def snap_to_grid(coords, grid):
+    """Round an (n, 2) coordinate array to the nearest points of grid (see pixel_grid)."""
+    origin, step = np.asarray(grid[0]), np.asarray(grid[1])
+    return np.round((coords - origin) / step) * step + origin
+
+
+def line_path(lines, grid=None):
+    """
+    Build one compound Path (MOVETO/LINETO only) from a layer of LineStrings.
+    With a grid (see pixel_grid) vertices are rounded to it, and points that
+    collapse onto the previous one and lines left with a single point are
+    dropped, like svg_path_data does.
+    """
+    vertices, index = shapely.get_coordinates(shapely.get_parts(np.asarray(lines)),
+                                              return_index=True)
+    if grid is not None:
+        vertices = snap_to_grid(vertices, grid)
+        start = np.diff(index, prepend=-1) != 0
+        keep = start | (vertices != np.roll(vertices, 1, axis=0)).any(axis=1)
+        vertices, index = vertices[keep], index[keep]
+        start = np.diff(index, prepend=-1) != 0
+        sizes = np.diff(np.append(np.flatnonzero(start), len(index)))
+        keep = np.repeat(sizes >= 2, sizes)
+        vertices, index = vertices[keep], index[keep]
+    codes = np.full(len(vertices), Path.LINETO, dtype=Path.code_type)
+    codes[np.flatnonzero(np.diff(index, prepend=-1))] = Path.MOVETO
+    return Path(vertices, codes)
+
+
+def svg_path_data(geometry, extent, size_pt, quantum, closed=False):
+    """
+    Encode LineStrings (or Polygon rings with closed=True) as compact SVG
+    path data on an integer grid of quantum points.
+
+    Coordinates are mapped from the scene extent onto a size_pt (width,
+    height) page, rounded to the grid and written as relative commands;
+    points that collapse onto the previous one are dropped.
+    """
+    if closed:
+        parts = shapely.get_rings(shapely.get_parts(np.asarray(geometry)))
+    else:
+        parts = shapely.get_parts(np.asarray(geometry))
+    coords, index = shapely.get_coordinates(parts, return_index=True)
+    if not len(coords):
+        return ''
+
+    xmin, xmax, ymin, ymax = extent
+    grid = np.empty((len(coords), 2), dtype=np.int64)
+    grid[:, 0] = np.rint((coords[:, 0] - xmin) / (xmax - xmin) * size_pt[0] / quantum)
+    grid[:, 1] = np.rint((ymax - coords[:, 1]) / (ymax - ymin) * size_pt[1] / quantum)
+
+    # Drop repeated grid points, and the closing point of rings ('z' closes them)
+    start = np.diff(index, prepend=-1) != 0
+    keep = start | (grid != np.roll(grid, 1, axis=0)).any(axis=1)
+    if closed:
+        keep &= np.append(~start[1:], False)
+    grid, index = grid[keep], index[keep]
+    start = np.diff(index, prepend=-1) != 0
+    sizes = np.diff(np.append(np.flatnonzero(start), len(index)))
+    minimum = 3 if closed else 2
+    keep = np.repeat(sizes >= minimum, sizes)
+    grid, start = grid[keep], start[keep]
+    if not len(grid):
+        return ''
+
+    # Relative moves start from the current point: the end of an open
+    # subpath, or the start of a closed one
+    first = np.flatnonzero(start)
+    current = np.zeros_like(grid)
+    current[1:] = grid[:-1]
+    if closed:
+        current[first[1:]] = grid[first[:-1]]
+    delta = (grid - current).tolist()
+
+    second = np.zeros(len(grid), dtype=bool)
+    second[first + 1] = True
+    prefix = np.where(start, 'm', np.where(second, 'l', ' '))
+    if closed:
+        tokens = [f"{p}{dx} {dy}" for p, (dx, dy) in zip(prefix.tolist(), delta)]
+        last = np.append(first[1:], len(grid)) - 1
+        for i in last.tolist():
+            tokens[i] += 'z'
+        return ''.join(tokens)
+    return ''.join(f"{p}{dx} {dy}" for p, (dx, dy) in zip(prefix.tolist(), delta))
+
+
+class SVGStreamWriter:
+    """
+    Write an SVG document element by element straight to disk.
+
+    The page is size_pt (width, height) in points; map geometry is written
+    on an integer grid of quantum points inside scaled groups.
+    """
+
+    def __init__(self, path, size_pt, quantum):
+        self.size_pt = size_pt
+        self.quantum = quantum
+        self._file = open(path, 'w', encoding='utf-8')
+        width, height = (f"{value:g}" for value in size_pt)
+        self._file.write('<?xml version="1.0" encoding="utf-8" standalone="no"?>\n')
+        self._file.write(f'<svg xmlns="http://www.w3.org/2000/svg" '
+                         f'xmlns:xlink="http://www.w3.org/1999/xlink" version="1.1" '
+                         f'width="{width}pt" height="{height}pt" viewBox="0 0 {width} {height}">\n')
+
+    def write_background(self, color):
+        """Fill the whole page with color."""
+        self._file.write(f'<rect width="100%" height="100%" fill="{to_hex(color)}"/>\n')
+
+    def begin_group(self, scaled=False, **attributes):
+        """
+        Open a <g>; attributes use SVG names with '_' for '-'. scaled=True puts
+        its content on the geometry grid.
+        """
+        attrs = ''.join(f' {name.replace("_", "-")}={quoteattr(str(value))}'
+                        for name, value in attributes.items())
+        transform = f' transform="scale({self.quantum:g})"' if scaled else ''
+        self._file.write(f'<g{transform}{attrs}>\n')
+
+    def end_group(self):
+        self._file.write('</g>\n')
+
+    def write_path(self, data):
+        """Write one <path> with the given path data (skipped when empty)."""
+        if data:
+            self._file.write(f'<path d="{data}"/>\n')
+
+    def write_fragment(self, svg):
+        """
+        Embed a complete SVG document (e.g. from matplotlib) on top of the
+        page, scaled to the same size.
+        """
+        width, height = (f"{value:g}" for value in self.size_pt)
+        svg = svg[svg.index('<svg'):]
+        svg = re.sub(r'width="[^"]*" height="[^"]*"', f'width="{width}" height="{height}"', svg, count=1)
+        self._file.write(svg)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.write('</svg>\n')
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _write_polygons(writer, layer, color, extent, chunk):
+    """Stream a polygon layer as filled paths, chunk features per path."""
+    if layer is None or layer.empty:
+        return
+    geometry = layer.geometry.to_numpy()
+    writer.begin_group(scaled=True, fill=to_hex(color), fill_rule='evenodd', stroke='none')
+    for first in range(0, len(geometry), chunk):
+        writer.write_path(svg_path_data(geometry[first:first + chunk], extent, writer.size_pt,
+                                        writer.quantum, closed=True))
+    writer.end_group()
+
+
+def _write_roads(writer, roads, theme, extent, figsize, chunk):
+    """Stream roads as one styled group per class, chunk features per path."""
+    if roads.empty:
+        return
+    scale = figsize[1] / BASE_FIGURE_HEIGHT
+    writer.begin_group(scaled=True, fill='none', stroke_linecap='butt', stroke_linejoin='round')
+    for highway in road_classes(roads):
+        geometry = roads.geometry[roads['highway'] == highway].to_numpy()
+        # Stroke widths are in grid units inside the scaled group
+        writer.begin_group(stroke=to_hex(get_road_color(highway, theme)),
+                           stroke_width=f"{get_road_width(highway) * scale / writer.quantum:g}")
+        for first in range(0, len(geometry), chunk):
+            writer.write_path(svg_path_data(geometry[first:first + chunk], extent,
+                                            writer.size_pt, writer.quantum))
+        writer.end_group()
+    writer.end_group()
+
+
+def _draw_overlay(fig, city, country, point, theme, fonts, figsize, extent):
+    """
+    Draw only the edge fades and typography on a transparent figure, with
+    the fades at the figure DPI like vector output of render_poster.
+    Returns the axes.
+    """
+    fade_dpi = fig.dpi
+    fig.patch.set_visible(False)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.patch.set_visible(False)
+    configure_map_axes(ax, extent)
+    draw_gradient_fades(ax, theme, (int(figsize[0] * fade_dpi), int(figsize[1] * fade_dpi)))
+    draw_typography(ax, city, country, point, theme, fonts, figsize)
+    return ax
+
+
+def render_poster_svg(city, country, point, scene, theme, fonts, output_file, dpi, figsize,
+                      chunk=VECTOR_PATH_CHUNK):
+    """
+    Stream the poster to a compact SVG.
+
+    Water, roads (grouped by class, thinnest first) and parks are written
+    directly on a 1/dpi inch grid with relative path commands; fades and
+    typography come from matplotlib so they match render_poster.
+    """
+    size_pt = (figsize[0] * 72, figsize[1] * 72)
+    extent = scene['extent']
+    buffer = io.StringIO()
+    with agg_figure(figsize=figsize) as overlay:
+        _draw_overlay(overlay, city, country, point, theme, fonts, figsize, extent)
+        FigureCanvasSVG(overlay).print_svg(buffer)
+
+    with SVGStreamWriter(output_file, size_pt, 72 / dpi) as writer:
+        writer.write_background(theme['bg'])
+        _write_polygons(writer, scene['water'], theme['water'], extent, chunk)
+        _write_roads(writer, scene['roads'], theme, extent, figsize, chunk)
+        _write_polygons(writer, scene['parks'], theme['parks'], extent, chunk)
+        writer.write_fragment(buffer.getvalue())
+
+
+def render_poster_pdf(city, country, point, scene, theme, fonts, output_file, figsize, dpi=None):
+    """
+    Write the poster to PDF with one compound path per road class.
+
+    PDF has no relative path operators and matplotlib already deflates the
+    page stream, so this keeps matplotlib's writer but replaces the
+    per-edge paths (each with its own style) by one styled path per class.
+    With a dpi, map vertices are rounded to the 1/dpi inch grid of the SVG
+    output, so the page stream holds short numbers and no repeated points.
+    """
+    extent = scene['extent']
+    grid = pixel_grid(extent, (figsize[0] * dpi, figsize[1] * dpi)) if dpi else None
+
+    def _polygons(layer):
+        geometry = layer.geometry.to_numpy()
+        if grid is None:
+            return geometry
+        return shapely.transform(geometry, lambda coords: snap_to_grid(coords, grid))
+
+    with agg_figure(figsize=figsize) as fig:
+        ax = _draw_overlay(fig, city, country, point, theme, fonts, figsize, extent)
+        fig.patch.set_visible(True)
+        fig.patch.set_facecolor(theme['bg'])
+
+        if scene['water'] is not None and not scene['water'].empty:
+            draw_polygon_layer(ax, _polygons(scene['water']), theme['water'], zorder=1)
+        roads = scene['roads']
+        scale = figsize[1] / BASE_FIGURE_HEIGHT
+        for highway in road_classes(roads):
+            ax.add_patch(PathPatch(line_path(roads.geometry[roads['highway'] == highway], grid),
+                                   fill=False, edgecolor=get_road_color(highway, theme),
+                                   linewidth=get_road_width(highway) * scale,
+                                   capstyle='butt', joinstyle='round', zorder=1))
+        if scene['parks'] is not None and not scene['parks'].empty:
+            draw_polygon_layer(ax, _polygons(scene['parks']), theme['parks'], zorder=2)
+        configure_map_axes(ax, extent)
+
+        FigureCanvasPdf(fig).print_pdf(output_file)
+
+
+def render_poster_vector(city, country, point, graph, water, parks, theme, fonts,
+                         output_file, output_format, dpi=DEFAULT_DPI, figsize=DEFAULT_FIGSIZE,
+                         scene_options=None):
+    """
+    Render the poster as a compact SVG or PDF.
+
+    The page is exactly figsize, without the tight-bbox padding of
+    render_poster. dpi is the print resolution SVG and PDF coordinates are
+    rounded to. scene_options are passed on to build_scene.
+    """
+    fmt = output_format.lower()
+    if fmt not in ('svg', 'pdf'):
+        raise ValueError("Compact vector output supports only SVG and PDF")
+
+    print("Rendering compact vector map...")
+    scene = build_scene(graph, water, parks, figsize, dpi, **(scene_options or {}))
+    # Both directions of a two-way street would be written twice
+    scene['roads'] = drop_reverse_duplicates(scene['roads'])
+
+    print(f"Saving to {output_file}...")
+    if fmt == 'svg':
+        render_poster_svg(city, country, point, scene, theme, fonts, output_file, dpi, figsize)
+    else:
+        render_poster_pdf(city, country, point, scene, theme, fonts, output_file, figsize, dpi)
+
+    print(f"✓ Done! Poster saved as {output_file}")
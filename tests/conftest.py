@@ -8,9 +8,15 @@ from pathlib import Path
 
 @pytest.fixture
 def temp_cache_dir(monkeypatch):
-    """Create a temporary cache directory for testing."""
+    """
+    Create a temporary cache directory for testing.
+    CACHE_DIR is read once at import, so the modules holding it are
+    repointed too (src.bundle reads it through src.cache).
+    """
     temp_dir = tempfile.mkdtemp()
     monkeypatch.setenv("CACHE_DIR", temp_dir)
+    monkeypatch.setattr("src.config.CACHE_DIR", Path(temp_dir))
+    monkeypatch.setattr("src.cache.CACHE_DIR", Path(temp_dir))
     yield Path(temp_dir)
     shutil.rmtree(temp_dir)
 
@@ -105,3 +111,42 @@ def mock_fonts():
         'regular': '/path/to/Roboto-Regular.ttf',
         'light': '/path/to/Roboto-Light.ttf'
     }
+
+
+@pytest.fixture
+def small_city():
+    """
+    Return (point, graph, water, parks) for a small synthetic city.
+    A 6x8 street grid around the origin with one lake and one park, in the
+    same types fetch_map_data returns, so rendering runs without network.
+    """
+    import networkx as nx
+    import geopandas as gpd
+    from shapely.geometry import Polygon
+
+    lat0, lon0 = 40.0, -3.0
+    step = 0.002
+    road_types = ['motorway', 'primary', 'secondary', 'tertiary', 'residential', 'footway']
+
+    graph = nx.MultiDiGraph(crs='epsg:4326')
+    cols, rows = 6, 8
+    for i in range(cols):
+        for j in range(rows):
+            graph.add_node(i * rows + j, x=lon0 + i * step, y=lat0 + j * step)
+    for i in range(cols):
+        for j in range(rows):
+            node = i * rows + j
+            if i + 1 < cols:
+                graph.add_edge(node, node + rows, highway=road_types[j % len(road_types)])
+            if j + 1 < rows:
+                graph.add_edge(node, node + 1, highway=road_types[i % len(road_types)])
+
+    lake = Polygon([(lon0 + 0.001, lat0 + 0.001), (lon0 + 0.004, lat0 + 0.001),
+                    (lon0 + 0.004, lat0 + 0.005), (lon0 + 0.001, lat0 + 0.005)])
+    park = Polygon([(lon0 + 0.006, lat0 + 0.008), (lon0 + 0.009, lat0 + 0.008),
+                    (lon0 + 0.009, lat0 + 0.012), (lon0 + 0.006, lat0 + 0.012)])
+    water = gpd.GeoDataFrame({'natural': ['water']}, geometry=[lake], crs='epsg:4326')
+    parks = gpd.GeoDataFrame({'leisure': ['park']}, geometry=[park], crs='epsg:4326')
+
+    point = (lat0 + step * (rows - 1) / 2, lon0 + step * (cols - 1) / 2)
+    return point, graph, water, parks
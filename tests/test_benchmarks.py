@@ -0,0 +1,112 @@
+"""Tests for the synthetic city generator and the benchmark runner."""
+
+import json
+
+import geopandas as gpd
+import networkx as nx
+import pytest
+
+from benchmarks import run
+from benchmarks.synthetic_city import LAYOUTS, SIZES, synthetic_city
+from src.renderer import build_scene
+
+
+@pytest.fixture
+def tiny_size(monkeypatch):
+    """Register a 'tiny' benchmark size so runner tests stay fast."""
+    monkeypatch.setitem(SIZES, 'tiny', 400)
+    return 'tiny'
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_synthetic_city_types_and_size(layout):
+    """Test that synthetic cities match the fetch_map_data types and the target size."""
+    point, graph, water, parks = synthetic_city(layout, 10_000)
+
+    assert isinstance(graph, nx.MultiDiGraph)
+    assert graph.graph['crs'] == 'epsg:4326'
+    assert abs(graph.number_of_edges() - 10_000) < 500
+    assert isinstance(water, gpd.GeoDataFrame) and isinstance(parks, gpd.GeoDataFrame)
+    assert water.crs == parks.crs == 'EPSG:4326'
+    assert water.geometry.is_valid.all() and parks.geometry.is_valid.all()
+    assert graph.nodes[0]['y'] == pytest.approx(point[0], abs=0.1)
+
+
+def test_synthetic_city_deterministic():
+    """Test that the same layout, size and seed give the same city."""
+    first = synthetic_city('organic', 2_000, seed=3)
+    second = synthetic_city('organic', 2_000, seed=3)
+    other = synthetic_city('organic', 2_000, seed=4)
+
+    assert list(first[1].edges(data='highway')) == list(second[1].edges(data='highway'))
+    assert first[2].geometry.equals(second[2].geometry)
+    assert list(first[1].edges(data='highway')) != list(other[1].edges(data='highway'))
+
+
+def test_synthetic_city_projects_edge_geometry():
+    """Test that projecting an organic city moves its curved edges to metres too."""
+    import osmnx as ox
+
+    point, graph, water, parks = synthetic_city('organic', 2_000)
+    projected = ox.project_graph(graph)
+
+    nodes, edges = ox.graph_to_gdfs(projected)
+    assert graph.graph['simplified'] is True
+    assert edges.crs == nodes.crs and not edges.crs.is_geographic
+    west, south, east, north = edges.total_bounds
+    assert east - west > 1_000 and north - south > 1_000
+    assert edges.total_bounds == pytest.approx(nodes.total_bounds, rel=0.01)
+
+
+def test_synthetic_city_unknown_layout():
+    """Test that unknown layouts are rejected."""
+    with pytest.raises(ValueError, match="Unknown layout"):
+        synthetic_city('spiral', 1_000)
+
+
+def test_synthetic_city_builds_scene():
+    """Test that a synthetic city runs through scene preparation unchanged."""
+    point, graph, water, parks = synthetic_city('radial', 2_000)
+
+    scene = build_scene(graph, water, parks, figsize=(3, 4), dpi=50, clip=False)
+
+    assert len(scene['roads']) == graph.number_of_edges()
+    assert scene['roads']['highway'].map(type).eq(str).all()
+    assert scene['water'] is not None and scene['parks'] is not None
+
+
+def test_run_case_reports_stages(tiny_size):
+    """Test that a render_poster case records runs, sub-stages and counts."""
+    case = run.run_case('render_poster', 'grid', tiny_size, repeat=2, dpi=20, figsize=(3, 4))
+
+    assert len(case['runs_s']) == 2
+    assert case['min_s'] == min(case['runs_s'])
+    assert {'scene', 'projection', 'draw_layers', 'savefig'} <= set(case['stages'])
+    assert case['counts']['edges'] > 0
+
+
+def test_compare_reports_flags_regressions():
+    """Test that only cases slower than the tolerance count as regressions."""
+    baseline = {'cases': {'a': {'min_s': 1.0}, 'b': {'min_s': 1.0}}}
+    report = {'cases': {'a': {'min_s': 1.1}, 'b': {'min_s': 1.3}, 'new': {'min_s': 5.0}}}
+
+    rows = run.compare_reports(report, baseline, tolerance=0.15)
+
+    assert [(row['case'], row['regression']) for row in rows] == [('a', False), ('b', True)]
+
+
+def test_main_writes_report_and_compares(tiny_size, tmp_path):
+    """Test the command-line runner end to end, including the baseline exit status."""
+    output = tmp_path / "report.json"
+    argv = ['--benchmarks', 'render_poster', '--layouts', 'grid', '--sizes', tiny_size,
+            '--repeat', '1', '--dpi', '20', '--output', str(output)]
+
+    assert run.main(argv) == 0
+    report = json.loads(output.read_text())
+    assert list(report['cases']) == [f'render_poster/grid/{tiny_size}']
+
+    # A baseline that was far faster makes the run fail
+    report['cases'][f'render_poster/grid/{tiny_size}']['min_s'] = 1e-6
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report))
+    assert run.main(argv + ['--baseline', str(baseline)]) == 1
@@ -0,0 +1,118 @@
+"""Tests for the body module."""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.body import (
+    decode_body,
+    encode_body,
+    map_body_key,
+    render_map_body,
+    render_poster_cached_body
+)
+from src.cache import cache_get
+from src.tiling import render_poster_tiled
+
+
+@pytest.fixture
+def body_cache_dir(tmp_path, monkeypatch):
+    """Point the cache at an empty temporary directory."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr('src.cache.CACHE_DIR', cache_dir)
+    return cache_dir
+
+
+def test_map_body_key_depends_on_body_inputs(sample_theme):
+    """Test that everything changing body pixels changes the key."""
+    key = map_body_key("bbox_1", sample_theme, (3, 4), 50)
+
+    assert key == map_body_key("bbox_1", dict(sample_theme), (3, 4), 50)
+    assert key != map_body_key("bbox_2", sample_theme, (3, 4), 50)
+    assert key != map_body_key("bbox_1", dict(sample_theme, water="#0000FF"), (3, 4), 50)
+    assert key != map_body_key("bbox_1", sample_theme, (3, 4), 100)
+    assert key != map_body_key("bbox_1", sample_theme, (3, 4), 50, {'lod': True})
+    assert key != map_body_key("bbox_1", dict(sample_theme, road_motorway="#FF0000"), (3, 4), 50)
+
+
+def test_map_body_key_ignores_text_only_theme_changes(sample_theme):
+    """Test that themes differing only in text color and name share a body."""
+    variant = dict(sample_theme, text="#FF0000", name="Red text", description="Same map")
+
+    assert map_body_key("bbox_1", variant, (3, 4), 50) == map_body_key("bbox_1", sample_theme, (3, 4), 50)
+
+
+def test_render_map_body_has_no_text(small_city, sample_theme):
+    """Test that the body is figsize * dpi pixels without any text."""
+    point, graph, water, parks = small_city
+    theme = dict(sample_theme, text="#FF0000")
+
+    body = render_map_body(graph, water, parks, theme, figsize=(3, 4), dpi=50)
+
+    assert body.shape == (200, 150, 3)
+    assert body.dtype == np.uint8
+    # The theme is greyscale apart from the red text
+    assert (body[..., 0] == body[..., 1]).all()
+
+
+def test_cached_body_matches_tiled_render(small_city, sample_theme, body_cache_dir, tmp_path):
+    """Test that body plus typography is pixel-identical to a full render."""
+    point, graph, water, parks = small_city
+    full = tmp_path / "full.png"
+    composited = tmp_path / "composited.png"
+
+    render_poster_tiled("City", "Country", point, graph, water, parks, sample_theme, None,
+                        str(full), "png", dpi=50, figsize=(3, 4), workers=1)
+    render_poster_cached_body("City", "Country", point, "bbox", lambda: (graph, water, parks),
+                              sample_theme, None, str(composited), "png", dpi=50, figsize=(3, 4))
+
+    with Image.open(full) as a, Image.open(composited) as b:
+        assert b.mode == "RGB"
+        assert np.array_equal(np.asarray(a), np.asarray(b))
+
+
+def test_cached_body_variant_skips_map_data(small_city, sample_theme, body_cache_dir, tmp_path):
+    """Test that a text variant of a cached body never loads the map data."""
+    point, graph, water, parks = small_city
+    first = tmp_path / "first.png"
+    variant = tmp_path / "variant.png"
+
+    render_poster_cached_body("City", "Country", point, "bbox", lambda: (graph, water, parks),
+                              sample_theme, None, str(first), "png", dpi=50, figsize=(3, 4))
+
+    def _fail():
+        raise AssertionError("map data loaded for a cached body")
+
+    render_poster_cached_body("Ciudad", "País", point, "bbox", _fail,
+                              sample_theme, None, str(variant), "png", dpi=50, figsize=(3, 4))
+
+    with Image.open(first) as a, Image.open(variant) as b:
+        diff = np.abs(np.asarray(a).astype(int) - np.asarray(b).astype(int)).max(axis=2)
+    # Only the title area changes
+    rows = np.flatnonzero(diff.any(axis=1))
+    assert len(rows) > 0
+    assert rows.min() > 200 * 0.7
+
+
+def test_cached_body_rejects_vector_formats(sample_theme, tmp_path):
+    """Test that cached bodies are PNG only."""
+    with pytest.raises(ValueError, match="PNG"):
+        render_poster_cached_body("City", "Country", (0, 0), "bbox", lambda: None,
+                                  sample_theme, None, str(tmp_path / "out.svg"), "svg")
+
+
+def test_cached_body_stored_as_png(small_city, sample_theme, body_cache_dir, tmp_path):
+    """Test that the cache holds the body PNG-encoded, far smaller than the raw pixels."""
+    point, graph, water, parks = small_city
+
+    render_poster_cached_body("City", "Country", point, "bbox", lambda: (graph, water, parks),
+                              sample_theme, None, str(tmp_path / "poster.png"), "png",
+                              dpi=50, figsize=(3, 4))
+
+    data = cache_get(map_body_key("bbox", sample_theme, (3, 4), 50))
+    body = render_map_body(graph, water, parks, sample_theme, figsize=(3, 4), dpi=50)
+    assert data.startswith(b'\x89PNG')
+    assert len(data) < body.nbytes / 4
+    assert np.array_equal(decode_body(data), body)
+    assert np.array_equal(decode_body(encode_body(body)), body)
@@ -0,0 +1,104 @@
+"""Tests for cache bundle export and import."""
+
+import zipfile
+
+import pytest
+
+from src import bundle
+from src.bundle import export_bundle, import_bundle, key_bbox, parse_city, select_entries
+from src.cache import cache_file, cache_get, cache_index, cache_set
+
+
+PARIS = (-2.4, 48.8, -2.3, 48.9)
+ROME = (12.4, 41.8, 12.6, 42.0)
+
+
+@pytest.fixture
+def filled_cache(tmp_path, monkeypatch):
+    """A cache holding coordinates and map data of two cities."""
+    import src.cache as cache_module
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', tmp_path / "cache")
+    cache_set("coords_paris_france", (48.85, -2.35))
+    cache_set("coords_rome_italy", (41.9, 12.5))
+    for name, bbox in (("paris", PARIS), ("rome", ROME)):
+        west, south, east, north = bbox
+        cache_set(f"graph_bbox_{west}_{south}_{east}_{north}", f"{name} streets")
+        cache_set(f"water_bbox_{west}_{south}_{east}_{north}_natural_waterway", f"{name} water")
+    return tmp_path / "cache"
+
+
+def _keys(entries):
+    return sorted(entry['key'] for entry in entries)
+
+
+def test_key_bbox():
+    """Test reading the fetch bbox out of map data keys."""
+    assert key_bbox("graph_bbox_-74.0_40.7_-73.9_40.8") == (-74.0, 40.7, -73.9, 40.8)
+    assert key_bbox("map_body_bbox_1e-05_2.0_3.0_4.0_abc_3x4_300_{}") == (1e-05, 2.0, 3.0, 4.0)
+    assert key_bbox("coords_paris_france") is None
+    assert parse_city("Washington, D.C., USA") == ("Washington, D.C.", "USA")
+    with pytest.raises(ValueError):
+        parse_city("Paris")
+
+
+def test_select_entries_by_city_bbox_and_layer(filled_cache, capsys):
+    """Test choosing entries by city, region and key type."""
+    assert len(select_entries()) == 6
+    assert _keys(select_entries(cities=[("Paris", "France")])) == [
+        "coords_paris_france", "graph_bbox_-2.4_48.8_-2.3_48.9",
+        "water_bbox_-2.4_48.8_-2.3_48.9_natural_waterway"]
+    assert _keys(select_entries(bbox=(12.0, 41.0, 13.0, 42.5), layers=['graph', 'coords'])) == [
+        "coords_rome_italy", "graph_bbox_12.4_41.8_12.6_42.0"]
+    assert select_entries(cities=[("Oslo", "Norway")]) == []
+    assert "No cached coordinates for Oslo, Norway" in capsys.readouterr().out
+
+
+def test_export_import_roundtrip(filled_cache, tmp_path, monkeypatch):
+    """Test that a new machine's cache serves the exported entries with their keys."""
+    import src.cache as cache_module
+    path = tmp_path / "paris.zip"
+    export_bundle(path, select_entries(cities=[("Paris", "France")]))
+
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', tmp_path / "new_node")
+    assert import_bundle(path) == (3, 0)
+    assert import_bundle(path) == (0, 3)
+
+    assert cache_get("graph_bbox_-2.4_48.8_-2.3_48.9") == "paris streets"
+    assert cache_get("coords_paris_france") == (48.85, -2.35)
+    assert cache_get("coords_rome_italy") is None
+    assert _keys(cache_index()) == _keys(select_entries(cities=[("Paris", "France")]))
+
+
+def test_import_rejects_damaged_entry(filled_cache, tmp_path, monkeypatch):
+    """Test that an entry failing its checksum is not written to the cache."""
+    import src.cache as cache_module
+    path = tmp_path / "rome.zip"
+    export_bundle(path, select_entries(layers=['graph'], bbox=ROME), compression='none')
+    data = path.read_bytes()
+    path.write_bytes(data.replace(b"rome streets", b"rome streetz"))
+
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', tmp_path / "new_node")
+    with pytest.raises(zipfile.BadZipFile):
+        import_bundle(path)
+
+    assert not list((tmp_path / "new_node").glob("*.pkl"))
+    assert not list((tmp_path / "new_node").glob("*.tmp"))
+
+
+def test_cache_command_line(filled_cache, tmp_path, monkeypatch, capsys):
+    """Test the export, list and import commands."""
+    import src.cache as cache_module
+    path = str(tmp_path / "bundle.zip")
+
+    assert bundle.main(['export', path, '--city', 'Rome, Italy', '--layer', 'graph',
+                        '--compression', 'lzma']) == 0
+    assert bundle.main(['list', path]) == 0
+    output = capsys.readouterr().out
+    assert "Exported 1 entries" in output
+    assert "graph_bbox_12.4_41.8_12.6_42.0" in output
+
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', tmp_path / "new_node")
+    assert bundle.main(['import', path]) == 0
+    assert (tmp_path / "new_node" / cache_file("graph_bbox_12.4_41.8_12.6_42.0")).exists()
+    assert bundle.main(['export', path, '--bbox', '0,0,1,1']) == 1
+    assert bundle.main(['import', str(tmp_path / "missing.zip")]) == 1
@@ -1,9 +1,41 @@
 """Tests for the cache module."""
 
+import json
+import os
 import pytest
 import pickle
+import time
 from pathlib import Path
-from src.cache import CacheError, cache_file, cache_get, cache_set
+from src.cache import (
+    CacheError,
+    cache_exists,
+    cache_file,
+    cache_get,
+    cache_index,
+    cache_key_type,
+    cache_lock,
+    cache_tiers,
+    cache_set,
+    cache_stats,
+    FilesystemCache,
+    MemoryCache,
+    prometheus_cache_metrics,
+    sigv4_signature,
+    SQLiteCache,
+    reset_cache_stats,
+    write_cache_metrics
+)
+from src.config import CACHE_LATENCY_BUCKETS
+
+
+@pytest.fixture
+def counted_cache(tmp_path, monkeypatch):
+    """Point the cache at an empty directory and start with zeroed counters."""
+    import src.cache as cache_module
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', tmp_path / "cache")
+    reset_cache_stats()
+    yield tmp_path / "cache"
+    reset_cache_stats()
 
 
 def test_cache_file_hashing():
@@ -75,8 +107,13 @@ def test_cache_error_unpicklable(temp_cache_dir):
     import threading
     lock = threading.Lock()
     
-    with pytest.raises((CacheError, TypeError)):
+    def local_function():
+        pass
+    
+    with pytest.raises(CacheError, match="Serialization error"):
         cache_set("unpicklable", lock)
+    with pytest.raises(CacheError, match="Serialization error"):
+        cache_set("unpicklable", local_function)
 
 
 def test_cache_error_invalid_path(monkeypatch, temp_cache_dir):
@@ -92,6 +129,20 @@ def test_cache_error_invalid_path(monkeypatch, temp_cache_dir):
     assert "File error" in str(exc_info.value)
 
 
+def test_cache_set_creates_cache_dir(monkeypatch, tmp_path):
+    """Test that the cache directory is created on the first write."""
+    import src.cache as cache_module
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', cache_dir)
+    
+    assert cache_get("missing") is None
+    assert not cache_dir.exists()
+    
+    cache_set("first", {"data": "value"})
+    
+    assert cache_get("first") == {"data": "value"}
+
+
 def test_cache_file_created(temp_cache_dir, monkeypatch):
     """Test that cache files are actually created in the cache directory."""
     # Ensure the module uses our temp cache dir
@@ -127,3 +178,316 @@ def test_cache_complex_nested_data(temp_cache_dir):
     assert result == complex_data
     assert result["users"][0]["name"] == "Alice"
     assert result["users"][1]["scores"][2] == 85
+
+
+def test_cache_key_type():
+    """Test that entries are grouped by their key prefix."""
+    assert cache_key_type("coords_paris_france") == "coords"
+    assert cache_key_type("graph_bbox_1_2_3_4") == "graph"
+    assert cache_key_type("water_bbox_1_2_3_4_natural_waterway") == "water"
+    assert cache_key_type("parks_bbox_1_2_3_4_leisure_landuse") == "parks"
+    assert cache_key_type("map_body_bbox_abc") == "map_body"
+    assert cache_key_type("unrelated") == "other"
+
+
+def test_cache_stats_hits_misses_bytes(counted_cache):
+    """Test that lookups, writes and bytes are counted per key type."""
+    cache_set("graph_bbox_1", list(range(1000)))
+    cache_get("graph_bbox_1")
+    cache_get("graph_bbox_1")
+    cache_get("water_bbox_1")
+    
+    stats = cache_stats()
+    entry_size = (counted_cache / cache_file("graph_bbox_1")).stat().st_size
+    
+    assert stats["graph"]["hits"] == 2
+    assert stats["graph"]["misses"] == 0
+    assert stats["graph"]["writes"] == 1
+    assert stats["graph"]["bytes_written"] == entry_size
+    assert stats["graph"]["bytes_read"] == 2 * entry_size
+    assert stats["water"]["misses"] == 1
+    assert stats["water"]["hits"] == 0
+    assert set(stats) == {"graph", "water"}
+
+
+def test_cache_stats_latency_histogram(counted_cache):
+    """Test that hit latencies land in cumulative buckets."""
+    cache_set("coords_a", (1.0, 2.0))
+    for _ in range(3):
+        cache_get("coords_a")
+    
+    histogram = cache_stats()["coords"]["read_seconds"]
+    
+    assert histogram["count"] == 3
+    assert histogram["sum"] > 0
+    assert len(histogram["buckets"]) == len(CACHE_LATENCY_BUCKETS)
+    assert histogram["buckets"] == sorted(histogram["buckets"])
+    assert histogram["buckets"][-1] == 3
+
+
+def test_cache_stats_counts_errors(counted_cache, monkeypatch):
+    """Test that failed writes are counted."""
+    import src.cache as cache_module
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', Path("/invalid/path/that/does/not/exist"))
+    
+    with pytest.raises(CacheError):
+        cache_set("parks_bbox_1", {"data": "value"})
+    
+    assert cache_stats()["parks"]["errors"] == 1
+    assert cache_stats()["parks"]["writes"] == 0
+
+
+def test_prometheus_cache_metrics(counted_cache, tmp_path):
+    """Test the Prometheus text export of the counters."""
+    cache_set("graph_bbox_1", [1, 2, 3])
+    cache_get("graph_bbox_1")
+    cache_get("coords_a")
+    
+    text = prometheus_cache_metrics()
+    
+    assert '# TYPE mapposter_cache_requests_total counter' in text
+    assert 'mapposter_cache_requests_total{type="graph",result="hit"} 1' in text
+    assert 'mapposter_cache_requests_total{type="coords",result="miss"} 1' in text
+    assert '# TYPE mapposter_cache_read_seconds histogram' in text
+    assert 'mapposter_cache_read_seconds_bucket{type="graph",le="+Inf"} 1' in text
+    assert 'mapposter_cache_read_seconds_count{type="graph"} 1' in text
+    
+    metrics_file = tmp_path / "cache.prom"
+    write_cache_metrics(metrics_file)
+    assert metrics_file.read_text() == prometheus_cache_metrics()
+
+
+def _fetch_once(cache_dir, name, log):
+    """Fetch name unless cached, as fetch_graph_bbox does; runs in a worker process."""
+    import src.cache as cache_module
+    cache_module.CACHE_DIR = cache_dir
+    with cache_lock(name):
+        if cache_exists(name):
+            return cache_get(name)
+        with open(log, "a") as f:
+            f.write("fetch\n")
+        time.sleep(0.3)
+        cache_set(name, "downloaded")
+        return "downloaded"
+
+
+def test_cache_set_leaves_no_temporary_files(counted_cache):
+    """Test that writes go through a temporary file renamed into place."""
+    cache_set("graph_bbox_1", [1, 2, 3])
+    cache_set("graph_bbox_1", [4, 5, 6])
+    
+    assert [p.name for p in counted_cache.glob("*.pkl*")] == [cache_file("graph_bbox_1")]
+    assert not list(counted_cache.glob("*.tmp"))
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="POSIX file modes")
+def test_cache_set_entry_mode_follows_umask(counted_cache):
+    """Test that entries are readable by other users like any new file, not private to the writer."""
+    old_umask = os.umask(0o022)
+    os.umask(old_umask)
+    cache_set("graph_bbox_1", [1, 2, 3])
+    
+    mode = (counted_cache / cache_file("graph_bbox_1")).stat().st_mode & 0o777
+    assert mode == 0o666 & ~old_umask
+
+
+def test_cache_set_failure_keeps_previous_entry(counted_cache):
+    """Test that a failed write leaves the existing entry and no partial file behind."""
+    import threading
+    cache_set("graph_bbox_1", "previous")
+    
+    with pytest.raises(CacheError):
+        cache_set("graph_bbox_1", ["partly picklable", threading.Lock()])
+    
+    assert cache_stats()["graph"]["errors"] == 1
+    assert cache_get("graph_bbox_1") == "previous"
+    assert not list(counted_cache.glob("*.tmp"))
+
+
+def test_cache_get_quarantines_corrupt_entry(counted_cache, monkeypatch, capsys):
+    """Test that a truncated entry is moved aside and reported as a miss."""
+    import src.cache as cache_module
+    monkeypatch.setattr(cache_module, 'CACHE_MEMORY_MB', 0)
+    cache_set("graph_bbox_1", list(range(1000)))
+    path = counted_cache / cache_file("graph_bbox_1")
+    path.write_bytes(path.read_bytes()[:100])
+    
+    assert cache_get("graph_bbox_1") is None
+    
+    assert not path.exists()
+    assert len(list((counted_cache / "quarantine").iterdir())) == 1
+    assert "Corrupt cache entry for 'graph_bbox_1'" in capsys.readouterr().out
+    assert cache_stats()["graph"]["corrupt"] == 1
+    assert cache_stats()["graph"]["misses"] == 1
+    assert 'mapposter_cache_corrupt_total{type="graph"} 1' in prometheus_cache_metrics()
+    
+    cache_set("graph_bbox_1", "refetched")
+    assert cache_get("graph_bbox_1") == "refetched"
+
+
+def test_cache_lock_single_flight_across_processes(counted_cache, tmp_path):
+    """Test that concurrent processes missing one entry fetch it exactly once."""
+    from concurrent.futures import ProcessPoolExecutor
+    log = tmp_path / "fetches.log"
+    
+    with ProcessPoolExecutor(4) as pool:
+        results = list(pool.map(_fetch_once, [counted_cache] * 4, ["graph_bbox_1"] * 4, [log] * 4))
+    
+    assert results == ["downloaded"] * 4
+    assert log.read_text() == "fetch\n"
+
+
+def test_cache_lock_timeout(counted_cache):
+    """Test that waiting for a lock held elsewhere gives up after the timeout."""
+    import threading
+    held = threading.Event()
+    release = threading.Event()
+    
+    def _hold():
+        with cache_lock("graph_bbox_1"):
+            held.set()
+            release.wait(5)
+    
+    holder = threading.Thread(target=_hold)
+    holder.start()
+    held.wait(5)
+    try:
+        with pytest.raises(CacheError, match="Timed out"):
+            with cache_lock("graph_bbox_1", timeout=0.2, poll=0.05):
+                pass
+        # Other entries are not blocked
+        with cache_lock("graph_bbox_2", timeout=0.2):
+            pass
+    finally:
+        release.set()
+        holder.join()
+    with cache_lock("graph_bbox_1", timeout=0.2):
+        pass
+
+
+def test_cache_index_records_keys(counted_cache):
+    """Test that the index maps entry files back to their keys."""
+    cache_set("graph_bbox_1", [1, 2, 3])
+    cache_set("graph_bbox_1", [4, 5, 6])
+    cache_set("coords_paris_france", (48.85, 2.35))
+    (counted_cache / "0123456789abcdef0123456789abcdef.pkl").write_bytes(pickle.dumps("old"))
+    with (counted_cache / "index.jsonl").open("a") as f:
+        f.write('{"key": "cut short')
+    
+    index = {record['file']: record for record in cache_index()}
+    
+    assert len(index) == 3
+    assert index[cache_file("graph_bbox_1")]['key'] == "graph_bbox_1"
+    assert index[cache_file("coords_paris_france")]['type'] == "coords"
+    assert index[cache_file("graph_bbox_1")]['size'] == (counted_cache / cache_file("graph_bbox_1")).stat().st_size
+    assert index["0123456789abcdef0123456789abcdef.pkl"]['key'] is None
+
+
+def test_cache_index_compacts_rewritten_entries(counted_cache, monkeypatch):
+    """Test that rewriting entries does not grow the index without bound."""
+    import src.cache as cache_module
+    monkeypatch.setattr(cache_module, 'INDEX_COMPACT_BYTES', 2000)
+    monkeypatch.setattr(cache_module, '_index_compacted_size', 0)
+    cache_set("coords_paris_france", (48.85, 2.35))
+    cache_set("graph_bbox_2", "evicted")
+    (counted_cache / cache_file("graph_bbox_2")).unlink()
+    
+    for i in range(200):
+        cache_set("graph_bbox_1", i)
+    
+    index_file = counted_cache / "index.jsonl"
+    assert index_file.stat().st_size <= 2000 + 200
+    assert not list(counted_cache.glob("*.tmp"))
+    files = [json.loads(line)['file'] for line in index_file.read_text().splitlines()]
+    assert cache_file("graph_bbox_2") not in files
+    index = {record['file']: record for record in cache_index()}
+    assert index[cache_file("graph_bbox_1")]['key'] == "graph_bbox_1"
+    assert index[cache_file("coords_paris_france")]['key'] == "coords_paris_france"
+
+
+def test_cache_tiers_default(counted_cache):
+    """Test that lookups go through memory, then the local directory."""
+    tiers = cache_tiers()
+    
+    assert [type(tier) for tier in tiers] == [MemoryCache, FilesystemCache]
+    assert tiers[1].path == counted_cache
+    assert cache_tiers() is tiers
+
+
+def test_memory_cache_evicts_least_recently_used():
+    """Test that the memory tier stays under its size limit."""
+    memory = MemoryCache(max_bytes=10)
+    memory.set("a", b"1234")
+    memory.set("b", b"5678")
+    memory.get("a")
+    memory.set("c", b"9012")
+    memory.set("huge", b"x" * 11)
+    
+    assert memory.get("a") == b"1234"
+    assert memory.get("b") is None
+    assert memory.get("c") == b"9012"
+    assert memory.get("huge") is None
+
+
+def test_shared_tier_promotes_hits(counted_cache, tmp_path, monkeypatch):
+    """Test that a hit in the read-only shared tier is copied into memory and the local directory."""
+    import src.cache as cache_module
+    shared = FilesystemCache(tmp_path / "shared")
+    shared.set(cache_file("graph_bbox_1"), pickle.dumps("from shared"))
+    monkeypatch.setattr(cache_module, 'CACHE_SHARED', str(tmp_path / "shared"))
+    
+    assert cache_get("graph_bbox_1") == "from shared"
+    assert (counted_cache / cache_file("graph_bbox_1")).exists()
+    assert cache_stats()["graph"]["promotions"] == 2
+    
+    # Writes stay out of the read-only tier
+    cache_set("graph_bbox_2", "local")
+    assert not (tmp_path / "shared" / cache_file("graph_bbox_2")).exists()
+    assert cache_get("graph_bbox_2") == "local"
+
+
+def test_sqlite_cache_roundtrip_and_read_only(tmp_path):
+    """Test the SQLite tier, read-only access and quarantine."""
+    database = tmp_path / "cache.sqlite"
+    
+    assert SQLiteCache(database, writable=False).get("a.pkl") is None
+    writable = SQLiteCache(database)
+    writable.set("a.pkl", b"first")
+    writable.set("a.pkl", b"second")
+    read_only = SQLiteCache(database, writable=False)
+    
+    assert read_only.get("a.pkl") == b"second"
+    assert read_only.exists("a.pkl") and not read_only.exists("b.pkl")
+    with pytest.raises(OSError):
+        read_only.set("b.pkl", b"data")
+    assert not read_only.quarantine("a.pkl", b"second")
+    assert writable.quarantine("a.pkl", b"second")
+    assert writable.get("a.pkl") is None
+
+
+def test_corrupt_shared_entry_falls_through(counted_cache, tmp_path, monkeypatch, capsys):
+    """Test that a corrupt entry in a read-only tier is skipped, not deleted."""
+    import src.cache as cache_module
+    SQLiteCache(tmp_path / "shared.sqlite").set(cache_file("graph_bbox_1"), b"not a pickle")
+    monkeypatch.setattr(cache_module, 'CACHE_SHARED', f"sqlite://{tmp_path / 'shared.sqlite'}")
+    
+    assert cache_get("graph_bbox_1") is None
+    
+    assert "skipped" in capsys.readouterr().out
+    assert cache_stats()["graph"]["corrupt"] == 1
+    assert SQLiteCache(tmp_path / "shared.sqlite").get(cache_file("graph_bbox_1")) == b"not a pickle"
+
+
+def test_sigv4_signature_matches_aws_example():
+    """Test the signer against the GET Object example of the AWS S3 documentation."""
+    headers = {
+        'host': 'examplebucket.s3.amazonaws.com',
+        'range': 'bytes=0-9',
+        'x-amz-content-sha256': 'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855',
+        'x-amz-date': '20130524T000000Z',
+    }
+    
+    signature = sigv4_signature('wJalrXUtnFEMI/K7MDENG/bPxRfiCYEXAMPLEKEY', 'us-east-1',
+                                'GET', '/test.txt', headers)
+    
+    assert signature == 'f0e8bdb87c964420e857bd35b5d6ed310bd44f0170aba48dd91039c6036bdb41'
@@ -7,6 +7,7 @@ from unittest.mock import patch, MagicMock
 from src.cli import (
     create_parser,
     validate_args,
+    get_render_options,
     print_examples
 )
 
@@ -258,6 +259,273 @@ def test_validate_args_dpi_only(mock_get_themes, mock_exit):
     assert result is True
 
 
+def test_parser_tiled_arguments():
+    """Test tiled rendering argument parsing."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--tiled', '--workers', '4'])
+    
+    assert args.tiled is True
+    assert args.workers == 4
+
+
+@patch('src.cli.sys.exit')
+@patch('src.cli.get_available_themes')
+def test_validate_args_tiled_requires_png(mock_get_themes, mock_exit, capsys):
+    """Test that --tiled is rejected for vector formats."""
+    mock_get_themes.return_value = ['feature_based']
+    
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--tiled', '-f', 'svg'])
+    
+    validate_args(args)
+    
+    captured = capsys.readouterr()
+    assert "png" in captured.out.lower()
+    mock_exit.assert_called_once_with(1)
+
+
+def test_get_render_options_default():
+    """Test that no options are set by default."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France'])
+    
+    assert get_render_options(args) == {}
+
+
+def test_get_render_options_tiled():
+    """Test that tiled options are collected."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--tiled', '--workers', '2'])
+    
+    assert get_render_options(args) == {'tiled': True, 'workers': 2}
+
+
+def test_get_render_options_dzi():
+    """Test that dzi output forwards the worker count."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '-f', 'dzi', '--workers', '3'])
+    
+    assert get_render_options(args) == {'workers': 3}
+
+
+def test_get_render_options_lod():
+    """Test that level-of-detail options are collected."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--lod', '--lod-min-density', '40'])
+    
+    assert get_render_options(args) == {'lod': True, 'minor_road_min_density': 40.0}
+
+
+@patch('src.cli.sys.exit')
+@patch('src.cli.get_available_themes')
+def test_validate_args_lod_min_density_positive(mock_get_themes, mock_exit, capsys):
+    """Test that a non-positive density threshold is rejected."""
+    mock_get_themes.return_value = ['feature_based']
+    
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--lod-min-density', '0'])
+    
+    validate_args(args)
+    
+    captured = capsys.readouterr()
+    assert "positive" in captured.out.lower()
+    mock_exit.assert_called_once_with(1)
+
+
+def test_get_render_options_no_clip():
+    """Test that --no-clip disables viewport clipping."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--no-clip'])
+    
+    assert get_render_options(args) == {'clip': False}
+
+
+def test_get_render_options_fade_lod():
+    """Test that --fade-lod enables the fade level of detail."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--fade-lod'])
+    
+    assert get_render_options(args) == {'fade_lod': True}
+
+
+@patch('src.cli.sys.exit')
+@patch('src.cli.get_available_themes')
+def test_validate_args_compact_vector_requires_vector_format(mock_get_themes, mock_exit, capsys):
+    """Test that --compact-vector is rejected for PNG output."""
+    mock_get_themes.return_value = ['feature_based']
+    
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--compact-vector'])
+    
+    validate_args(args)
+    
+    captured = capsys.readouterr()
+    assert "svg" in captured.out.lower()
+    mock_exit.assert_called_once_with(1)
+
+
+def test_get_render_options_compact_vector():
+    """Test that --compact-vector is forwarded."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '-f', 'svg', '--compact-vector'])
+    
+    assert get_render_options(args) == {'compact_vector': True}
+
+
+@patch('src.cli.sys.exit')
+@patch('src.cli.get_available_themes')
+def test_validate_args_raster_dpi_requires_vector_format(mock_get_themes, mock_exit, capsys):
+    """Test that --raster-dpi is rejected for PNG output."""
+    mock_get_themes.return_value = ['feature_based']
+    
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--raster-dpi', '150'])
+    
+    validate_args(args)
+    
+    captured = capsys.readouterr()
+    assert "svg" in captured.out.lower()
+    mock_exit.assert_called_once_with(1)
+
+
+def test_get_render_options_raster_dpi():
+    """Test that --raster-dpi is forwarded."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '-f', 'pdf', '--raster-dpi', '150'])
+    
+    assert get_render_options(args) == {'raster_dpi': 150}
+
+
+def test_get_render_options_merge_roads():
+    """Test that the stroke merging flags are forwarded."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--merge-roads'])
+    assert get_render_options(args) == {'merge': True}
+    
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--merge-through'])
+    assert get_render_options(args) == {'merge_through': True}
+
+
+@patch('src.cli.sys.exit')
+@patch('src.cli.get_available_themes')
+def test_validate_args_cache_body_requires_png(mock_get_themes, mock_exit, capsys):
+    """Test that --cache-body is rejected for vector formats."""
+    mock_get_themes.return_value = ['feature_based']
+    
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--cache-body', '-f', 'svg'])
+    
+    validate_args(args)
+    
+    captured = capsys.readouterr()
+    assert "png" in captured.out.lower()
+    mock_exit.assert_called_once_with(1)
+
+
+def test_get_render_options_cache_body():
+    """Test that --cache-body is forwarded and display names are parsed."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--cache-body',
+                              '--display-city', 'Parigi', '--display-country', 'Francia'])
+    
+    assert get_render_options(args) == {'cache_body': True}
+    assert args.display_city == 'Parigi'
+    assert args.display_country == 'Francia'
+
+
+@patch('src.cli.sys.exit')
+@patch('src.cli.get_available_themes')
+def test_validate_args_crop_invalid(mock_get_themes, mock_exit, capsys):
+    """Test that a malformed --crop is rejected."""
+    mock_get_themes.return_value = ['feature_based']
+    
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--crop', '0.5,0.5,0.4,0.6'])
+    
+    validate_args(args)
+    
+    captured = capsys.readouterr()
+    assert "crop" in captured.out.lower()
+    mock_exit.assert_called_with(1)
+
+
+def test_get_render_options_crop():
+    """Test that --crop is parsed into a window."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--crop', '0.4,0.3,0.6,0.5'])
+    
+    assert get_render_options(args) == {'crop': (0.4, 0.3, 0.6, 0.5)}
+
+
+@patch('src.cli.sys.exit')
+@patch('src.cli.get_available_themes')
+def test_validate_args_refine_requires_preview(mock_get_themes, mock_exit, capsys):
+    """Test that --refine is rejected without --preview."""
+    mock_get_themes.return_value = ['feature_based']
+    
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--refine'])
+    
+    validate_args(args)
+    
+    captured = capsys.readouterr()
+    assert "--preview" in captured.out
+    mock_exit.assert_called_once_with(1)
+
+
+def test_get_render_options_preview():
+    """Test that the preview flags are forwarded."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--preview', '--refine'])
+    
+    assert get_render_options(args) == {'preview': True, 'refine': True}
+
+
+@patch('src.cli.sys.exit')
+@patch('src.cli.get_available_themes')
+def test_validate_args_threads_requires_pool(mock_get_themes, mock_exit, capsys):
+    """Test that --threads is rejected without --tiled or dzi output."""
+    mock_get_themes.return_value = ['feature_based']
+    
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--threads'])
+    
+    validate_args(args)
+    
+    captured = capsys.readouterr()
+    assert "--threads" in captured.out
+    mock_exit.assert_called_once_with(1)
+
+
+def test_get_render_options_threads():
+    """Test that --threads is forwarded with the pool options."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--tiled', '--threads'])
+    
+    assert get_render_options(args) == {'tiled': True, 'workers': None, 'threads': True}
+
+
+def test_parser_profile_arguments():
+    """Test that the profiling outputs are parsed."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--profile', 'run.json',
+                              '--profile-trace', 'trace.json', '--profile-memory'])
+    
+    assert args.profile == 'run.json'
+    assert args.profile_trace == 'trace.json'
+    assert args.profile_memory
+    assert get_render_options(args) == {}
+
+
+def test_parser_cache_metrics_argument():
+    """Test that the cache metrics file is parsed."""
+    parser = create_parser()
+    args = parser.parse_args(['--city', 'Paris', '--country', 'France', '--cache-metrics', 'cache.prom'])
+    
+    assert args.cache_metrics == 'cache.prom'
+    assert get_render_options(args) == {}
+
+
 def test_print_examples_output(capsys):
     """Test that print_examples outputs usage information."""
     print_examples()
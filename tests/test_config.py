@@ -23,7 +23,19 @@ from src.config import (
 def test_cache_dir_default():
     """Test that CACHE_DIR has a default value."""
     assert isinstance(CACHE_DIR, Path)
-    assert CACHE_DIR.exists()
+    assert CACHE_DIR == Path(os.environ.get("CACHE_DIR", "cache"))
+
+
+def test_cache_dir_not_created_on_import(monkeypatch, tmp_path):
+    """Test that importing the config has no filesystem side effects."""
+    custom_cache = tmp_path / "new_cache"
+    monkeypatch.setenv("CACHE_DIR", str(custom_cache))
+    
+    import importlib
+    from src import config
+    importlib.reload(config)
+    
+    assert not custom_cache.exists()
 
 
 def test_cache_dir_env_variable(monkeypatch, tmp_path):
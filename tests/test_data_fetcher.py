@@ -10,6 +10,30 @@ from src.data_fetcher import (
 from src.cache import CacheError
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache(temp_cache_dir):
+    """Keep the fetch locks out of the repository's cache directory."""
+    return temp_cache_dir
+
+
+def _tiny_graph():
+    """Return a two-node street graph as OSMnx would download it."""
+    import networkx as nx
+    graph = nx.MultiDiGraph(crs='epsg:4326')
+    graph.add_node(1, x=-74.0, y=40.7, street_count=1)
+    graph.add_node(2, x=-73.9, y=40.8, street_count=1)
+    graph.add_edge(1, 2, osmid=10, highway='primary', name='Main St', oneway=False, length=1.0)
+    return graph
+
+
+def _tiny_features():
+    """Return a one-polygon GeoDataFrame as OSMnx would download it."""
+    import geopandas as gpd
+    from shapely.geometry import box
+    return gpd.GeoDataFrame({'leisure': ['park'], 'name': ['Central']},
+                            geometry=[box(-74.0, 40.7, -73.9, 40.8)], crs='epsg:4326')
+
+
 @patch('src.data_fetcher.cache_get')
 @patch('src.data_fetcher.cache_set')
 @patch('src.data_fetcher.ox.graph_from_bbox')
@@ -39,7 +63,7 @@ def test_fetch_graph_bbox_from_osm(mock_sleep, mock_osmnx, mock_cache_set, mock_
     """Test fetching graph from OSM."""
     bbox = (-74.0, 40.7, -73.9, 40.8)
     mock_cache_get.return_value = None
-    mock_graph = Mock()
+    mock_graph = _tiny_graph()
     mock_osmnx.return_value = mock_graph
     
     result = fetch_graph_bbox(bbox)
@@ -75,7 +99,7 @@ def test_fetch_graph_bbox_cache_error_handled(mock_sleep, mock_osmnx, mock_cache
     """Test that cache errors don't prevent graph fetching."""
     bbox = (-74.0, 40.7, -73.9, 40.8)
     mock_cache_get.return_value = None
-    mock_graph = Mock()
+    mock_graph = _tiny_graph()
     mock_osmnx.return_value = mock_graph
     mock_cache_set.side_effect = CacheError("Cache write failed")
     
@@ -115,13 +139,13 @@ def test_fetch_features_bbox_from_osm(mock_sleep, mock_osmnx, mock_cache_set, mo
     """Test fetching features from OSM."""
     bbox = (-74.0, 40.7, -73.9, 40.8)
     tags = {'leisure': 'park'}
-    mock_features = Mock()
+    mock_features = _tiny_features()
     mock_cache_get.return_value = None
     mock_osmnx.return_value = mock_features
     
     result = fetch_features_bbox(bbox, tags, 'parks')
     
-    assert result == mock_features
+    assert result is mock_features
     mock_osmnx.assert_called_once_with(bbox=bbox, tags=tags)
     mock_cache_set.assert_called_once()
     mock_sleep.assert_called_once_with(0.3)  # Rate limiting
@@ -227,3 +251,103 @@ def test_fetch_map_data_correct_tags(mock_tqdm, mock_fetch_features, mock_fetch_
     parks_call = mock_fetch_features.call_args_list[1]
     assert parks_call[0][1] == {'leisure': 'park', 'landuse': 'grass'}
     assert parks_call[0][2] == 'parks'
+
+
+@patch('src.data_fetcher.cache_get')
+@patch('src.data_fetcher.cache_set')
+@patch('src.data_fetcher.ox')
+@patch('src.data_fetcher.time.sleep')
+@patch('src.data_fetcher.OVERPASS_URL', "http://127.0.0.1:8765/overpass/api")
+def test_fetch_uses_configured_overpass_url(mock_sleep, mock_ox, mock_cache_set, mock_cache_get):
+    """Test that downloads go to the configured Overpass server."""
+    mock_cache_get.return_value = None
+    
+    fetch_graph_bbox((-74.0, 40.7, -73.9, 40.8))
+    
+    assert mock_ox.settings.overpass_url == "http://127.0.0.1:8765/overpass/api"
+    mock_ox.graph_from_bbox.assert_called_once()
+
+
+@patch('src.data_fetcher.cache_get')
+@patch('src.data_fetcher.cache_set')
+@patch('src.data_fetcher.ox.graph_from_bbox')
+@patch('src.data_fetcher.time.sleep')
+def test_fetch_graph_bbox_caches_slim_payload(mock_sleep, mock_osmnx, mock_cache_set, mock_cache_get):
+    """Test that the cached graph keeps only render fields and expands on load."""
+    bbox = (-74.0, 40.7, -73.9, 40.8)
+    mock_cache_get.return_value = None
+    mock_osmnx.return_value = _tiny_graph()
+    
+    fetch_graph_bbox(bbox)
+    payload = mock_cache_set.call_args[0][1]
+    mock_cache_get.return_value = payload
+    cached = fetch_graph_bbox(bbox)
+    
+    assert payload['payload'] == 'graph'
+    assert list(cached.edges(data=True)) == [(1, 2, {'highway': 'primary'})]
+    assert cached.nodes[2]['x'] == pytest.approx(-73.9, abs=1e-6)
+
+
+@patch('src.data_fetcher.cache_get')
+@patch('src.data_fetcher.cache_set')
+@patch('src.data_fetcher.ox.graph_from_bbox')
+@patch('src.data_fetcher.time.sleep')
+@patch('src.data_fetcher.CACHE_RAW_OSM', True)
+def test_fetch_graph_bbox_raw_on_request(mock_sleep, mock_osmnx, mock_cache_set, mock_cache_get):
+    """Test that CACHE_RAW_OSM caches the full graph and refetches slim entries."""
+    from src.payload import slim_graph
+    bbox = (-74.0, 40.7, -73.9, 40.8)
+    graph = _tiny_graph()
+    mock_cache_get.return_value = slim_graph(graph)
+    mock_osmnx.return_value = graph
+    
+    assert fetch_graph_bbox(bbox) is graph
+    mock_cache_set.assert_called_once_with(mock_cache_get.call_args[0][0], graph)
+
+
+@patch('src.data_fetcher.ox.graph_from_bbox')
+@patch('src.data_fetcher.time.sleep')
+def test_fetch_graph_bbox_waits_for_concurrent_fetch(mock_sleep, mock_osmnx, tmp_path, monkeypatch, capsys):
+    """Test that a process waiting on another's fetch of the same bbox loads its result."""
+    import threading
+    import src.cache as cache_module
+    from src.cache import cache_lock, cache_set
+    from src.payload import slim_graph
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', tmp_path / "cache")
+    bbox = (-74.0, 40.7, -73.9, 40.8)
+    key = "graph_bbox_-74.0_40.7_-73.9_40.8"
+    held = threading.Event()
+    
+    def _other_fetch():
+        with cache_lock(key):
+            held.set()
+            threading.Event().wait(0.3)
+            cache_set(key, slim_graph(_tiny_graph()))
+    
+    other = threading.Thread(target=_other_fetch)
+    other.start()
+    held.wait(5)
+    result = fetch_graph_bbox(bbox)
+    other.join()
+    
+    mock_osmnx.assert_not_called()
+    assert result.number_of_edges() == 1
+    assert "Using cached street network" in capsys.readouterr().out
+
+
+@patch('src.data_fetcher.ox.graph_from_bbox')
+@patch('src.data_fetcher.time.sleep')
+def test_fetch_graph_bbox_unwritable_cache(mock_sleep, mock_osmnx, tmp_path, monkeypatch, capsys):
+    """Test that a cache that can be neither locked nor written does not stop the download."""
+    import src.cache as cache_module
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("")
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', blocker / "cache")
+    mock_osmnx.return_value = _tiny_graph()
+    
+    result = fetch_graph_bbox((-74.0, 40.7, -73.9, 40.8))
+    
+    assert result is mock_osmnx.return_value
+    output = capsys.readouterr().out
+    assert "fetching without the lock" in output
+    assert "File error while saving cache" in output
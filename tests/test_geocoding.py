@@ -118,7 +118,24 @@ def test_get_coordinates_nominatim_config(mock_sleep, mock_nominatim, mock_cache
     get_coordinates("London", "UK")
     
     # Check Nominatim was initialized with correct parameters
-    mock_nominatim.assert_called_once_with(user_agent="city_map_poster", timeout=10)
+    mock_nominatim.assert_called_once_with(user_agent="city_map_poster", timeout=10,
+                                           domain="nominatim.openstreetmap.org", scheme="https")
+
+
+@patch('src.geocoding.cache_get')
+@patch('src.geocoding.cache_set')
+@patch('src.geocoding.Nominatim')
+@patch('src.geocoding.time.sleep')
+@patch('src.geocoding.NOMINATIM_URL', "http://127.0.0.1:8765/nominatim/")
+def test_get_coordinates_configured_server(mock_sleep, mock_nominatim, mock_cache_set, mock_cache_get):
+    """Test that NOMINATIM_URL points the geocoder at another server."""
+    mock_cache_get.return_value = None
+    mock_nominatim.return_value.geocode.return_value = Mock(latitude=1.0, longitude=2.0, address="X")
+    
+    get_coordinates("London", "UK")
+    
+    mock_nominatim.assert_called_once_with(user_agent="city_map_poster", timeout=10,
+                                           domain="127.0.0.1:8765/nominatim", scheme="http")
 
 
 @patch('src.geocoding.cache_get')
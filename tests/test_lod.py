@@ -0,0 +1,181 @@
+"""Tests for the lod module."""
+
+import numpy as np
+import pytest
+import shapely
+
+import geopandas as gpd
+from shapely.geometry import LineString, box
+
+from src.lod import ground_pixel_size, count_vertices, simplify_scene, fade_visibility, fade_scene
+from src.scene import prepare_scene
+from src.tiling import build_tile_jobs, render_tile
+
+
+FIGSIZE = (3, 4)
+DPI = 50
+
+
+@pytest.fixture
+def detailed_scene(small_city):
+    """Scene whose roads carry many sub-pixel vertices, like real OSM edges."""
+    point, graph, water, parks = small_city
+    scene = prepare_scene(graph, water, parks, FIGSIZE)
+    pixel_size = ground_pixel_size(scene['extent'], FIGSIZE, DPI)
+    
+    # Densify every road to 1/10 pixel and wiggle it by 1/10 pixel
+    roads = scene['roads'].copy()
+    dense = shapely.segmentize(np.asarray(roads.geometry.array), pixel_size / 10)
+    coords = shapely.get_coordinates(dense)
+    coords += np.sin(np.arange(len(coords)))[:, np.newaxis] * pixel_size / 10
+    roads.geometry = shapely.set_coordinates(dense, coords)
+    scene['roads'] = roads
+    return scene
+
+
+def _render(scene, theme):
+    """Rasterize a scene to an (h, w, 3) array like the tiled renderer."""
+    poster_size = (int(FIGSIZE[0] * DPI), int(FIGSIZE[1] * DPI))
+    context = {'theme': theme, 'fonts': None, 'city': 'City', 'country': 'Country',
+               'point': (0, 0), 'figsize': FIGSIZE, 'dpi': DPI}
+    job = next(build_tile_jobs(scene, [(0, 0) + poster_size], poster_size, context))
+    return render_tile(job).astype(int)
+
+
+def test_ground_pixel_size():
+    """Test that pixel size is the extent width over the output width."""
+    assert ground_pixel_size((0, 3600, 0, 4800), (12, 16), 300) == pytest.approx(1.0)
+    assert ground_pixel_size((0, 3600, 0, 4800), (12, 16), 150) == pytest.approx(2.0)
+
+
+def test_count_vertices(detailed_scene):
+    """Test vertex counting, including empty layers."""
+    assert count_vertices(detailed_scene['roads']) > 10 * len(detailed_scene['roads'])
+    assert count_vertices(None) == 0
+
+
+def test_simplify_scene_removes_vertices(detailed_scene):
+    """Test that sub-pixel vertices are removed and reported."""
+    simplified, stats = simplify_scene(detailed_scene, FIGSIZE, DPI)
+    
+    assert stats['vertices_before'] == (count_vertices(detailed_scene['roads'])
+                                        + count_vertices(detailed_scene['water'])
+                                        + count_vertices(detailed_scene['parks']))
+    assert stats['vertices_after'] == count_vertices(simplified['roads']) + 10
+    assert stats['vertices_after'] < stats['vertices_before'] / 5
+    assert stats['minor_roads_skipped'] is False
+
+
+def test_simplify_scene_keeps_columns(detailed_scene):
+    """Test that road attributes survive simplification."""
+    simplified, stats = simplify_scene(detailed_scene, FIGSIZE, DPI)
+    
+    assert list(simplified['roads'].columns) == ['highway', 'geometry']
+    assert simplified['extent'] == detailed_scene['extent']
+
+
+def test_simplify_scene_drops_subpixel_features(detailed_scene):
+    """Test that polygons smaller than a pixel are dropped."""
+    simplified, stats = simplify_scene(detailed_scene, FIGSIZE, DPI, min_feature_px=1000)
+    
+    assert simplified['water'].empty
+    assert simplified['parks'].empty
+    assert stats['features_after'] < stats['features_before']
+
+
+def test_simplify_scene_skips_minor_roads(detailed_scene):
+    """Test that minor roads are skipped below the density threshold."""
+    pixel_size = ground_pixel_size(detailed_scene['extent'], FIGSIZE, DPI)
+    px_per_km = 1000 / pixel_size
+    
+    kept, stats = simplify_scene(detailed_scene, FIGSIZE, DPI, minor_road_min_density=px_per_km / 2)
+    assert stats['minor_roads_skipped'] is False
+    assert 'residential' in set(kept['roads']['highway'])
+    
+    skipped, stats = simplify_scene(detailed_scene, FIGSIZE, DPI, minor_road_min_density=px_per_km * 2)
+    assert stats['minor_roads_skipped'] is True
+    assert set(skipped['roads']['highway']) <= {'motorway', 'primary', 'secondary', 'tertiary'}
+
+
+def test_simplify_scene_major_roads_only(detailed_scene):
+    """Test that major_roads_only skips minor roads at any resolution."""
+    kept, stats = simplify_scene(detailed_scene, FIGSIZE, DPI, major_roads_only=True)
+    
+    assert stats['minor_roads_skipped'] is True
+    assert set(kept['roads']['highway']) <= {'motorway', 'primary', 'secondary', 'tertiary'}
+
+
+def test_simplify_scene_pixel_diff(detailed_scene, sample_theme):
+    """Test that the simplified scene renders almost like full detail."""
+    simplified, stats = simplify_scene(detailed_scene, FIGSIZE, DPI)
+    
+    full = _render(detailed_scene, sample_theme)
+    lod = _render(simplified, sample_theme)
+    diff = np.abs(full - lod)
+    
+    # Deviations stay within antialiasing: small on average, rare if visible
+    assert diff.mean() < 1.0
+    assert (diff.max(axis=2) > 32).mean() < 0.01
+
+
+def test_fade_visibility_center_and_edges():
+    """Test visibility at the center, the edges and inside a fade ramp."""
+    extent = (0, 100, 0, 100)
+    layer = gpd.GeoSeries([
+        box(49, 49, 51, 51),     # center
+        box(0, 49, 0.1, 51),     # left edge, fully under the fade
+        box(5, 49, 5.1, 51),     # halfway into the 10% left fade
+        box(49, 92.5, 51, 92.6), # halfway into the 15% top fade
+        box(0, 0, 100, 100),     # spans the poster, center visible
+    ])
+    visibility = fade_visibility(layer, extent)
+    
+    assert visibility[0] == pytest.approx(1.0)
+    assert visibility[1] == pytest.approx(0.0, abs=0.02)
+    assert visibility[2] == pytest.approx(0.5, abs=0.02)
+    assert visibility[3] == pytest.approx(0.5, abs=0.02)
+    assert visibility[4] == pytest.approx(1.0)
+
+
+def test_fade_scene_drops_minor_roads_under_fades(detailed_scene):
+    """Test that only minor roads hidden by the fades are dropped."""
+    xmin, xmax, ymin, ymax = detailed_scene['extent']
+    edge_roads = gpd.GeoDataFrame(
+        {'highway': ['residential', 'primary']},
+        geometry=[LineString([(xmin, ymax - 1), (xmax, ymax - 1)])] * 2,
+        crs=detailed_scene['crs']
+    )
+    detailed_scene['roads'] = gpd.pd.concat([detailed_scene['roads'], edge_roads], ignore_index=True)
+    faded, stats = fade_scene(detailed_scene, FIGSIZE, DPI)
+    visibility = fade_visibility(detailed_scene['roads'], detailed_scene['extent'])
+    minor = ~detailed_scene['roads']['highway'].isin(['motorway', 'primary', 'secondary', 'tertiary'])
+    hidden_minor = (minor.to_numpy() & (visibility < 0.25)).sum()
+    
+    assert hidden_minor >= 1
+    assert 'primary' in set(faded['roads']['highway'].iloc[-1:])
+    assert len(faded['roads']) == len(detailed_scene['roads']) - hidden_minor
+    assert stats['features_after'] == stats['features_before'] - hidden_minor
+
+
+def test_fade_scene_leaves_visible_geometry(detailed_scene):
+    """Test that geometry outside the fades keeps all its vertices."""
+    faded, stats = fade_scene(detailed_scene, FIGSIZE, DPI)
+    roads = detailed_scene['roads']
+    visible = fade_visibility(roads, detailed_scene['extent']) == 1
+    
+    assert visible.any()
+    kept = faded['roads'].loc[roads.index[visible]]
+    assert count_vertices(kept) == count_vertices(roads[visible])
+    assert stats['vertices_after'] < stats['vertices_before']
+
+
+def test_fade_scene_pixel_diff(detailed_scene, sample_theme):
+    """Test that fade level of detail is hidden by the fades."""
+    faded, stats = fade_scene(detailed_scene, FIGSIZE, DPI)
+    
+    full = _render(detailed_scene, sample_theme)
+    lod = _render(faded, sample_theme)
+    diff = np.abs(full - lod)
+    
+    assert diff.mean() < 1.0
+    assert (diff.max(axis=2) > 32).mean() < 0.01
@@ -0,0 +1,83 @@
+"""Tests for the local object store and the s3:// cache tier."""
+
+import pickle
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from benchmarks.object_store import make_server
+from src.cache import ObjectStoreCache, cache_file, cache_get, cache_stats, open_backend
+
+
+@contextmanager
+def running(server):
+    """Serve server in a background thread for the duration of the block."""
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    with running(make_server(tmp_path / "store", port=0, access_key='test', secret_key='secret')) as server:
+        yield server
+
+
+def test_object_store_signed_roundtrip(store):
+    """Test put, get, exists and delete with signed requests."""
+    cache = ObjectStoreCache(store.url, 'maps', 'cache/v1', writable=True,
+                             access_key='test', secret_key='secret')
+    
+    assert cache.get('a.pkl') is None
+    cache.set('a.pkl', b'payload')
+    
+    assert cache.get('a.pkl') == b'payload'
+    assert cache.exists('a.pkl') and not cache.exists('b.pkl')
+    assert (store.root / 'maps' / 'cache' / 'v1' / 'a.pkl').read_bytes() == b'payload'
+    assert cache.quarantine('a.pkl', b'payload')
+    assert cache.get('a.pkl') is None
+    assert 'denied' not in store.stats
+
+
+def test_object_store_rejects_bad_signatures(store, capsys):
+    """Test that unsigned or wrongly signed requests are refused."""
+    (store.root / 'maps').mkdir(parents=True)
+    (store.root / 'maps' / 'a.pkl').write_bytes(b'payload')
+    
+    assert ObjectStoreCache(store.url, 'maps').get('a.pkl') is None
+    assert ObjectStoreCache(store.url, 'maps', access_key='test', secret_key='wrong').get('a.pkl') is None
+    with pytest.raises(OSError, match="HTTP 403"):
+        ObjectStoreCache(store.url, 'maps', writable=True).set('b.pkl', b'data')
+    
+    assert store.stats['denied'] == 3
+    assert "Shared cache unavailable" in capsys.readouterr().out
+
+
+def test_s3_shared_tier_warms_local_cache(store, tmp_path, monkeypatch):
+    """Test that a node's local cache is filled from the shared bucket on first use."""
+    import src.cache as cache_module
+    from src.cache import reset_cache_stats
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', tmp_path / "cache")
+    monkeypatch.setattr(cache_module, 'CACHE_SHARED', 's3://maps/shared')
+    monkeypatch.setattr(cache_module, 'CACHE_S3_ENDPOINT', store.url)
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'secret')
+    reset_cache_stats()
+    entry = store.root / 'maps' / 'shared' / cache_file("graph_bbox_1")
+    entry.parent.mkdir(parents=True)
+    entry.write_bytes(pickle.dumps({'graph': 'shared'}))
+    
+    assert isinstance(open_backend('s3://maps/shared'), ObjectStoreCache)
+    assert cache_get("graph_bbox_1") == {'graph': 'shared'}
+    assert cache_get("graph_bbox_1") == {'graph': 'shared'}
+    
+    assert store.stats['get'] == 1
+    assert (tmp_path / "cache" / cache_file("graph_bbox_1")).exists()
+    assert cache_stats()["graph"]["hits"] == 2
+    assert cache_stats()["graph"]["promotions"] == 2
+    reset_cache_stats()
@@ -0,0 +1,195 @@
+"""Tests for the Overpass/Nominatim record and replay server."""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.osm_replay import endpoint_settings, make_server, overpass_status, request_key
+
+
+# A tiny Overpass answer: one residential street in a 0.01 degree box
+OVERPASS_RESPONSE = {
+    'elements': [
+        {'type': 'node', 'id': 1, 'lat': 40.001, 'lon': -3.001},
+        {'type': 'node', 'id': 2, 'lat': 40.001, 'lon': -3.009},
+        {'type': 'node', 'id': 3, 'lat': 40.009, 'lon': -3.009},
+        {'type': 'way', 'id': 10, 'nodes': [1, 2, 3], 'tags': {'highway': 'residential'}},
+    ],
+}
+NOMINATIM_RESPONSE = [{'lat': '48.8566', 'lon': '2.3522', 'display_name': 'Paris, France',
+                       'place_id': 1, 'boundingbox': ['48.8', '48.9', '2.2', '2.4']}]
+
+
+class FakeUpstream(BaseHTTPRequestHandler):
+    """Stands in for the real services while recording."""
+
+    def do_GET(self):
+        self._reply()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self._reply()
+
+    def _reply(self):
+        self.server.calls += 1
+        body = OVERPASS_RESPONSE if '/interpreter' in self.path else NOMINATIM_RESPONSE
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def running(server):
+    """Serve server in a background thread for the duration of the block."""
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def upstream():
+    server = HTTPServer(('127.0.0.1', 0), FakeUpstream)
+    server.calls = 0
+    with running(server):
+        host, port = server.server_address
+        yield server, f"http://{host}:{port}"
+
+
+def _get(url, data=None):
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=10) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def _record(cassette, upstream_url, path, data=None):
+    upstreams = {'overpass': upstream_url, 'nominatim': upstream_url}
+    with running(make_server(cassette, 'record', port=0, upstreams=upstreams)) as server:
+        return _get(server.url + path, data)
+
+
+def test_request_key_ignores_parameter_order():
+    """Test that requests differing only in parameter order share a key."""
+    assert (request_key('nominatim', 'GET', '/search?q=Paris&format=json')
+            == request_key('nominatim', 'GET', '/search?format=json&q=Paris'))
+    assert (request_key('overpass', 'POST', '/api/interpreter', b'data=a&x=1')
+            == request_key('overpass', 'POST', '/api/interpreter', b'x=1&data=a'))
+    assert (request_key('overpass', 'POST', '/api/interpreter', b'data=a')
+            != request_key('overpass', 'POST', '/api/interpreter', b'data=b'))
+
+
+def test_record_then_replay_offline(tmp_path, upstream):
+    """Test that recorded responses replay byte for byte without the upstream."""
+    server, upstream_url = upstream
+    path = '/overpass/api/interpreter'
+    status, recorded = _record(tmp_path, upstream_url, path, b'data=query')
+    assert status == 200 and server.calls == 1
+
+    with running(make_server(tmp_path, 'replay', port=0)) as replay:
+        assert _get(replay.url + path, b'data=query') == (200, recorded)
+        assert _get(replay.url + path, b'data=other')[0] == 404
+        assert replay.stats == {'requests': 2, 'replayed': 1, 'missing': 1}
+    assert server.calls == 1
+
+
+def test_record_upstream_unreachable(tmp_path):
+    """Test that an unreachable upstream answers 502 and records nothing."""
+    # Bind a port, then close it so connections to it are refused
+    closed = HTTPServer(('127.0.0.1', 0), FakeUpstream)
+    host, port = closed.server_address
+    closed.server_close()
+
+    status, content = _record(tmp_path, f"http://{host}:{port}", '/nominatim/search?q=Paris')
+
+    assert status == 502
+    assert content.startswith(b"Upstream error")
+    assert not list(tmp_path.iterdir())
+
+
+def test_replay_latency_bandwidth_and_errors(tmp_path, upstream):
+    """Test the latency, bandwidth and error injection settings."""
+    server, upstream_url = upstream
+    _record(tmp_path, upstream_url, '/nominatim/search?q=Paris')
+    url_path = '/nominatim/search?q=Paris'
+
+    with running(make_server(tmp_path, 'replay', port=0, latency=0.2)) as replay:
+        started = time.perf_counter()
+        assert _get(replay.url + url_path)[0] == 200
+        assert time.perf_counter() - started >= 0.2
+
+    size = len(json.dumps(NOMINATIM_RESPONSE))
+    with running(make_server(tmp_path, 'replay', port=0, bandwidth=size / 0.3)) as replay:
+        started = time.perf_counter()
+        assert _get(replay.url + url_path)[0] == 200
+        assert time.perf_counter() - started >= 0.3
+
+    with running(make_server(tmp_path, 'replay', port=0, error_rate=1.0, error_status=504)) as replay:
+        assert _get(replay.url + url_path)[0] == 504
+        assert replay.stats['injected_errors'] == 1
+
+
+def test_overpass_status_parsed_by_osmnx():
+    """Test that OSMnx reads the slot status pages the way it reads the real ones."""
+    import osmnx._overpass as overpass
+
+    class _Response:
+        def __init__(self, text):
+            self.text = text
+
+    with patch.object(overpass.requests, 'get', return_value=_Response(overpass_status())):
+        assert overpass._get_overpass_pause('http://replay/api') == 0
+    with patch.object(overpass.requests, 'get', return_value=_Response(overpass_status(30))):
+        assert 25 <= overpass._get_overpass_pause('http://replay/api') <= 31
+
+
+def test_fetch_and_geocode_through_replay(tmp_path, upstream, monkeypatch):
+    """Test fetch_graph_bbox and get_coordinates end to end against a replayed cassette."""
+    import osmnx as ox
+    import src.cache as cache_module
+    from src import data_fetcher, geocoding
+
+    monkeypatch.setattr(cache_module, 'CACHE_DIR', tmp_path / "cache")
+    monkeypatch.setattr(ox.settings, 'use_cache', False)
+    monkeypatch.setattr(ox.settings, 'overpass_url', ox.settings.overpass_url)
+    monkeypatch.setattr(ox.settings, 'nominatim_url', ox.settings.nominatim_url)
+    monkeypatch.setattr(data_fetcher.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(geocoding.time, 'sleep', lambda seconds: None)
+    bbox = (-3.01, 40.0, -3.0, 40.01)
+    cassette = tmp_path / "cassette"
+
+    upstreams = {'overpass': upstream[1], 'nominatim': upstream[1]}
+    for mode in ('record', 'replay'):
+        with running(make_server(cassette, mode, port=0, upstreams=upstreams)) as server:
+            endpoints = endpoint_settings(server)
+            monkeypatch.setattr(data_fetcher, 'OVERPASS_URL', endpoints['OVERPASS_URL'])
+            monkeypatch.setattr(data_fetcher, 'NOMINATIM_URL', endpoints['NOMINATIM_URL'])
+            monkeypatch.setattr(geocoding, 'NOMINATIM_URL', endpoints['NOMINATIM_URL'])
+            monkeypatch.setattr(cache_module, "CACHE_DIR", tmp_path / f"cache_{mode}")
+
+            graph = data_fetcher.fetch_graph_bbox(bbox)
+            coords = geocoding.get_coordinates("Paris", "France")
+
+            # One two-way street, simplified to an edge each way
+            assert graph.number_of_edges() == 2
+            assert coords == (48.8566, 2.3522)
+            assert server.stats.get('missing', 0) == 0
+    # Overpass status, Overpass query and Nominatim search, all while recording
+    assert upstream[0].calls == 3
@@ -0,0 +1,125 @@
+"""Tests for the payload module."""
+
+import pickle
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import LineString, MultiPolygon, Point, Polygon
+
+from src.payload import expand_payload, is_slim_payload, pack_scene, slim_features, slim_graph
+from src.renderer import build_scene
+from src.scene import prepare_scene
+
+
+def _with_osm_attributes(graph):
+    """Add the attributes OSMnx attaches that the renderer never reads."""
+    for u, v, data in graph.edges(data=True):
+        data.update(osmid=[123456789, 987654321], name='Calle Mayor', maxspeed='50',
+                    lanes='2', oneway=False, reversed=False, length=123.4)
+    for _, data in graph.nodes(data=True):
+        data.update(street_count=4, highway=None)
+    return graph
+
+
+def test_slim_graph_keeps_render_fields_only(small_city):
+    """Test that the slim graph keeps positions, highway and geometry only."""
+    point, graph, water, parks = small_city
+    graph = _with_osm_attributes(graph)
+    u, v, key = next(iter(graph.edges(keys=True)))
+    graph.edges[u, v, key]['highway'] = ['primary', 'secondary']
+    graph.edges[u, v, key]['geometry'] = LineString([(-3.0, 40.0), (-2.999, 40.001), (-2.998, 40.0)])
+
+    payload = slim_graph(graph)
+    expanded = expand_payload(payload)
+
+    assert is_slim_payload(payload)
+    assert isinstance(payload['highway'], pd.Categorical)
+    assert payload['xy'].dtype == np.float32
+    assert expanded.graph == graph.graph
+    assert list(expanded.nodes) == list(graph.nodes)
+    assert sorted(expanded.edges(keys=True)) == sorted(graph.edges(keys=True))
+    assert expanded.edges[u, v, key]['highway'] == 'primary'
+    assert expanded.edges[u, v, key]['geometry'].equals_exact(
+        graph.edges[u, v, key]['geometry'], tolerance=1e-6)
+    assert set(expanded.nodes[0]) == {'x', 'y'}
+    assert all(set(data) <= {'highway', 'geometry'} for _, _, data in expanded.edges(data=True))
+
+
+def test_slim_graph_scene_matches_raw(small_city):
+    """Test that the scene of a slim graph is the raw scene to within a millimeter."""
+    point, graph, water, parks = small_city
+
+    raw = prepare_scene(graph, water, parks, (3, 4))
+    slim = prepare_scene(expand_payload(slim_graph(graph)), water, parks, (3, 4))
+
+    assert list(slim['roads']['highway']) == list(raw['roads']['highway'])
+    assert np.allclose(shapely.get_coordinates(slim['roads'].geometry),
+                       shapely.get_coordinates(raw['roads'].geometry), atol=1e-3)
+
+
+def test_slim_graph_is_smaller(small_city):
+    """Test that the slim payload pickles much smaller than the OSMnx graph."""
+    point, graph, water, parks = small_city
+    graph = _with_osm_attributes(graph)
+
+    assert len(pickle.dumps(slim_graph(graph))) < len(pickle.dumps(graph)) / 2
+
+
+def test_slim_features_polygons_only():
+    """Test that feature payloads keep polygons (with holes) and drop tags and other geometry."""
+    lake = Polygon([(0, 0), (1, 0), (1, 1), (0, 1)], [[(0.2, 0.2), (0.4, 0.2), (0.4, 0.4)]])
+    islands = MultiPolygon([Polygon([(2, 2), (3, 2), (3, 3)]), Polygon([(4, 4), (5, 4), (5, 5)])])
+    features = gpd.GeoDataFrame(
+        {'natural': ['water', 'water', 'spring'], 'name': ['Lake', None, 'Well']},
+        geometry=[lake, islands, Point(0, 0)], crs='epsg:3857')
+
+    expanded = expand_payload(slim_features(features))
+
+    assert list(expanded.columns) == ['geometry']
+    assert expanded.crs == features.crs
+    assert len(expanded) == 2
+    assert np.allclose(expanded.area, [lake.area, islands.area])
+
+
+def test_slim_features_empty_and_none():
+    """Test payloads of layers with nothing to draw."""
+    points = gpd.GeoDataFrame(geometry=[Point(0, 0)], crs='epsg:4326')
+
+    assert slim_features(None) is None
+    assert expand_payload(slim_features(points)).empty
+
+
+def test_expand_payload_passes_raw_data_through(small_city):
+    """Test that raw cached data (and anything else) is returned unchanged."""
+    point, graph, water, parks = small_city
+
+    assert expand_payload(graph) is graph
+    assert expand_payload(water) is water
+    assert not is_slim_payload({'payload': 'other'})
+
+
+def test_pack_scene_roundtrip_is_exact(small_city):
+    """Test that a build_scene scene survives packing with identical coordinates."""
+    point, graph, water, parks = small_city
+    scene = build_scene(graph, water, parks, figsize=(3, 4), dpi=50)
+
+    packed = pack_scene(scene)
+    expanded = expand_payload(pickle.loads(pickle.dumps(packed)))
+
+    assert is_slim_payload(packed)
+    assert packed['roads'][1].dtype == np.float32
+    assert expanded['extent'] == scene['extent']
+    assert list(expanded['roads']['highway']) == list(scene['roads']['highway'])
+    for name in ('roads', 'water', 'parks'):
+        assert np.array_equal(shapely.get_coordinates(expanded[name].geometry),
+                              shapely.get_coordinates(scene[name].geometry))
+
+
+def test_pack_scene_is_smaller(small_city):
+    """Test that the packed scene pickles smaller than the shapely scene."""
+    point, graph, water, parks = small_city
+    scene = build_scene(graph, water, parks, figsize=(3, 4), dpi=50)
+
+    assert len(pickle.dumps(pack_scene(scene))) < len(pickle.dumps(scene))
@@ -70,6 +70,93 @@ def test_render_single_poster_calls_render_with_correct_args():
         assert call_args[1]['figsize'] == (20, 10)
 
 
+def test_render_single_poster_passes_render_options():
+    """Test that render_options are forwarded to render_poster."""
+    with patch('src.poster_generator.load_theme', return_value={'bg': '#FFF'}), \
+         patch('src.poster_generator.load_fonts', return_value=None), \
+         patch('src.poster_generator.render_poster') as mock_render:
+        
+        render_single_poster(
+            "Tokyo", "Japan", "noir", (0, 0),
+            Mock(), Mock(), Mock(),
+            "png", 300, (12, 16), "out.png",
+            render_options={'tiled': True, 'workers': 3}
+        )
+        
+        assert mock_render.call_args[1]['tiled'] is True
+        assert mock_render.call_args[1]['workers'] == 3
+
+
+def test_render_single_poster_cache_body():
+    """Test that cache_body renders through the cached map body."""
+    with patch('src.poster_generator.load_theme', return_value={'bg': '#FFF'}), \
+         patch('src.poster_generator.load_fonts', return_value=None), \
+         patch('src.poster_generator.render_poster') as mock_render, \
+         patch('src.poster_generator.render_poster_cached_body') as mock_cached:
+        
+        render_single_poster(
+            "Tokyo", "Japan", "noir", (0, 0),
+            None, None, None,
+            "png", 300, (12, 16), "out.png",
+            render_options={'cache_body': True, 'lod': True},
+            bbox=(1, 2, 3, 4)
+        )
+        
+        mock_render.assert_not_called()
+        args, kwargs = mock_cached.call_args
+        assert args[3] == "bbox_1_2_3_4"
+        assert kwargs['scene_options'] == {'lod': True}
+
+
+def test_generate_single_poster_cache_body_defers_fetch():
+    """Test that cache_body geocodes but leaves the map data fetch to the renderer."""
+    with patch('src.poster_generator.get_coordinates', return_value=(0, 0)), \
+         patch('src.poster_generator.fetch_map_resources') as mock_fetch, \
+         patch('src.poster_generator.render_single_poster') as mock_render:
+        
+        generate_single_poster(
+            "Paris", "France", "sunset", 10000,
+            "png", 300, (12, 16), output_file="out.png",
+            render_options={'cache_body': True},
+            display_city="Parigi", display_country="Francia"
+        )
+        
+        mock_fetch.assert_not_called()
+        args, kwargs = mock_render.call_args
+        assert args[:2] == ("Parigi", "Francia")
+        assert args[4] is None
+        assert kwargs['bbox'] is not None
+
+
+def test_render_single_poster_preview_refine():
+    """Test that preview renders through the preview module with a refine pass."""
+    graph, water, parks = Mock(), Mock(), Mock()
+    with patch('src.poster_generator.load_theme', return_value={'bg': '#FFF'}), \
+         patch('src.poster_generator.load_fonts', return_value=None), \
+         patch('src.poster_generator.render_poster') as mock_render, \
+         patch('src.poster_generator.render_poster_preview') as mock_preview:
+        
+        render_single_poster(
+            "Tokyo", "Japan", "noir", (0, 0),
+            graph, water, parks,
+            "png", 300, (12, 16), "out.png",
+            render_options={'preview': True, 'refine': True, 'tiled': True},
+            bbox=(1, 2, 3, 4)
+        )
+        
+        mock_render.assert_not_called()
+        args, kwargs = mock_preview.call_args
+        assert args[3] == "bbox_1_2_3_4"
+        
+        # The refine pass renders the full poster with the remaining options
+        kwargs['refine']("out.partial.png")
+        render_args, render_kwargs = mock_render.call_args
+        assert render_args[3:6] == (graph, water, parks)
+        assert render_args[8] == "out.partial.png"
+        assert render_kwargs['tiled'] is True
+        assert 'preview' not in render_kwargs
+
+
 # Test fetch_map_resources
 def test_fetch_map_resources_fetches_all_data():
     """Test that fetch_map_resources fetches coordinates, bbox, and map data."""
@@ -0,0 +1,97 @@
+"""Tests for the preview module."""
+
+import pytest
+from PIL import Image
+
+from src.preview import load_preview_scene, render_poster_preview
+
+
+@pytest.fixture
+def preview_cache_dir(tmp_path, monkeypatch):
+    """Point the cache at an empty temporary directory."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr('src.cache.CACHE_DIR', cache_dir)
+    return cache_dir
+
+
+def test_load_preview_scene_major_roads_only(small_city):
+    """Test that the preview scene keeps only major road classes."""
+    point, graph, water, parks = small_city
+
+    scene = load_preview_scene(None, lambda: (graph, water, parks), figsize=(3, 4), dpi=50)
+
+    assert set(scene['roads']['highway']) <= {'motorway', 'primary', 'secondary', 'tertiary'}
+    assert scene['water'] is not None
+
+
+def test_load_preview_scene_cached(small_city, preview_cache_dir):
+    """Test that a cached preview scene never loads the map data."""
+    point, graph, water, parks = small_city
+    first = load_preview_scene("bbox", lambda: (graph, water, parks), figsize=(3, 4), dpi=50)
+
+    def _fail():
+        raise AssertionError("map data loaded for a cached preview scene")
+
+    cached = load_preview_scene("bbox", _fail, figsize=(3, 4), dpi=50)
+
+    assert cached['extent'] == first['extent']
+    assert len(cached['roads']) == len(first['roads'])
+
+
+def test_render_poster_preview_size(small_city, sample_theme, tmp_path):
+    """Test that the preview is the full layout at preview resolution."""
+    point, graph, water, parks = small_city
+    output = tmp_path / "preview.png"
+
+    render_poster_preview("City", "Country", point, None, lambda: (graph, water, parks),
+                          sample_theme, None, str(output), figsize=(3, 4), dpi=40)
+
+    with Image.open(output) as image:
+        assert image.size == (120, 160)
+
+
+def test_render_poster_preview_refine_replaces_file(small_city, sample_theme, tmp_path):
+    """Test that the refinement pass replaces the preview atomically."""
+    point, graph, water, parks = small_city
+    output = tmp_path / "poster.png"
+
+    def _refine(path):
+        # The preview is in place while the full poster renders
+        with Image.open(output) as image:
+            assert image.size == (120, 160)
+        Image.new('RGB', (300, 400), 'red').save(path)
+
+    render_poster_preview("City", "Country", point, None, lambda: (graph, water, parks),
+                          sample_theme, None, str(output), figsize=(3, 4), dpi=40,
+                          refine=_refine)
+
+    with Image.open(output) as image:
+        assert image.size == (300, 400)
+    assert [p.name for p in tmp_path.iterdir()] == ["poster.png"]
+
+
+def test_render_poster_preview_failed_refine_keeps_preview(small_city, sample_theme, tmp_path):
+    """Test that a failed refinement leaves the preview and no partial file."""
+    point, graph, water, parks = small_city
+    output = tmp_path / "poster.png"
+
+    def _refine(path):
+        Image.new('RGB', (10, 10)).save(path)
+        raise RuntimeError("render failed")
+
+    with pytest.raises(RuntimeError):
+        render_poster_preview("City", "Country", point, None, lambda: (graph, water, parks),
+                              sample_theme, None, str(output), figsize=(3, 4), dpi=40,
+                              refine=_refine)
+
+    with Image.open(output) as image:
+        assert image.size == (120, 160)
+    assert [p.name for p in tmp_path.iterdir()] == ["poster.png"]
+
+
+def test_render_poster_preview_rejects_vector_formats(sample_theme, tmp_path):
+    """Test that previews are PNG only."""
+    with pytest.raises(ValueError, match="PNG"):
+        render_poster_preview("City", "Country", (0, 0), None, lambda: None,
+                              sample_theme, None, str(tmp_path / "out.svg"), "svg")
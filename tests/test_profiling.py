@@ -0,0 +1,132 @@
+"""Tests for the profiling module."""
+
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from src.profiling import (
+    add_counts,
+    chrome_trace,
+    profile_report,
+    profiling,
+    stage,
+    write_profile
+)
+from src.renderer import render_poster
+
+
+def test_stage_without_profile_is_noop():
+    """Test that stages outside a profile run their code and record nothing."""
+    ran = []
+    with stage('idle'):
+        ran.append(True)
+        add_counts(edges=3)
+    
+    assert ran == [True]
+
+
+def test_nested_stages_and_counts():
+    """Test that nested stages record depth, counts and per-name totals."""
+    @stage('leaf')
+    def _leaf():
+        add_counts(edges=2, vertices=10)
+    
+    with profiling() as profile:
+        with stage('outer'):
+            _leaf()
+            _leaf()
+    
+    report = profile_report(profile)
+    
+    assert [record['name'] for record in report['stages']] == ['outer', 'leaf', 'leaf']
+    assert [record['depth'] for record in report['stages']] == [0, 1, 1]
+    assert report['summary']['leaf']['calls'] == 2
+    assert report['counts'] == {'edges': 4, 'vertices': 20}
+    outer = report['stages'][0]
+    assert outer['wall_s'] >= sum(record['wall_s'] for record in report['stages'][1:])
+    assert report['wall_s'] >= outer['wall_s']
+
+
+def test_profiling_memory_peaks():
+    """Test that traced peaks belong to the stage that allocated, and to its parents."""
+    with profiling(memory=True) as profile:
+        with stage('outer'):
+            with stage('allocate'):
+                block = np.ones(4 * 2 ** 20 // 8)
+                del block
+            with stage('small'):
+                pass
+    
+    summary = profile_report(profile)['summary']
+    
+    assert summary['allocate']['peak_mb'] >= 4
+    assert summary['small']['peak_mb'] < 1
+    assert summary['outer']['peak_mb'] >= summary['allocate']['peak_mb']
+
+
+def test_profiling_not_reentrant():
+    """Test that only one profile records at a time."""
+    with profiling():
+        with pytest.raises(RuntimeError):
+            with profiling():
+                pass
+
+
+def test_stages_recorded_from_threads():
+    """Test that stages running in other threads join the active profile."""
+    # All three alive at once, so their thread identifiers differ
+    barrier = threading.Barrier(3)
+    
+    def _work():
+        with stage('worker'):
+            barrier.wait(timeout=10)
+    
+    with profiling() as profile:
+        threads = [threading.Thread(target=_work) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    report = profile_report(profile)
+    
+    assert report['summary']['worker']['calls'] == 3
+    assert len({record['thread'] for record in report['stages']}) == 3
+
+
+def test_render_poster_profile(small_city, sample_theme, tmp_path):
+    """Test that a render reports its pipeline stages and geometry counts."""
+    point, graph, water, parks = small_city
+    
+    with profiling() as profile:
+        render_poster("City", "Country", point, graph, water, parks, sample_theme, None,
+                      str(tmp_path / "poster.png"), "png", dpi=40, figsize=(3, 4))
+    
+    report = profile_report(profile)
+    
+    for name in ('scene', 'projection', 'classification', 'draw_layers', 'fades',
+                 'typography', 'savefig'):
+        assert report['summary'][name]['calls'] == 1
+    assert report['counts']['edges'] > 0
+    assert report['counts']['polygons'] == 2
+    assert report['counts']['vertices'] >= 2 * report['counts']['edges']
+
+
+def test_write_profile_report_and_trace(tmp_path):
+    """Test that the JSON report and Chrome trace are written."""
+    with profiling() as profile:
+        with stage('step'):
+            add_counts(edges=1)
+    
+    report_file = tmp_path / "profile.json"
+    trace_file = tmp_path / "trace.json"
+    report = write_profile(profile, str(report_file), str(trace_file))
+    
+    assert json.loads(report_file.read_text()) == report
+    events = json.loads(trace_file.read_text())['traceEvents']
+    assert events == chrome_trace(report)['traceEvents']
+    assert events[0]['name'] == 'step'
+    assert events[0]['ph'] == 'X'
+    assert events[0]['args']['edges'] == 1
@@ -0,0 +1,132 @@
+"""Tests for the pyramid module."""
+
+import os
+
+import numpy as np
+from PIL import Image
+
+from src.pyramid import (
+    pyramid_levels,
+    tile_rects,
+    tiles_dir_for,
+    render_poster_pyramid
+)
+
+
+def test_pyramid_levels_sizes():
+    """Test that levels halve (rounding up) down to a single pixel."""
+    levels = pyramid_levels(600, 800)
+    
+    assert levels[0] == (0, 1, 1)
+    assert levels[-1] == (10, 600, 800)
+    assert levels[-2] == (9, 300, 400)
+    assert len(levels) == 11
+
+
+def test_pyramid_levels_odd_size():
+    """Test that odd sizes round up at each level."""
+    levels = pyramid_levels(5, 3)
+    
+    assert [size for _, *size in levels] == [[1, 1], [2, 1], [3, 2], [5, 3]]
+
+
+def test_tile_rects_edge_tiles():
+    """Test that edge tiles are cropped to the level size."""
+    rects = tile_rects(600, 300, 256)
+    
+    assert len(rects) == 3 * 2
+    assert rects[0] == (0, 0, (0, 0, 256, 256))
+    assert rects[-1] == (2, 1, (512, 256, 600, 300))
+
+
+def test_tiles_dir_for():
+    """Test the Deep Zoom tile directory naming."""
+    assert tiles_dir_for(os.path.join("out", "paris.dzi")) == os.path.join("out", "paris_files")
+
+
+def test_render_poster_pyramid_writes_all_levels(small_city, sample_theme, tmp_path):
+    """Test that every level has its tiles and the descriptor is written."""
+    point, graph, water, parks = small_city
+    output_file = str(tmp_path / "city.dzi")
+    
+    render_poster_pyramid("City", "Country", point, graph, water, parks, sample_theme, None,
+                          output_file, dpi=50, figsize=(3, 4), workers=1, tile_size=64)
+    
+    with open(output_file) as f:
+        descriptor = f.read()
+    assert 'TileSize="64"' in descriptor
+    assert 'Width="150" Height="200"' in descriptor
+    
+    tiles_dir = tiles_dir_for(output_file)
+    for level, width, height in pyramid_levels(150, 200):
+        for col, row, (left, top, right, bottom) in tile_rects(width, height, 64):
+            with Image.open(os.path.join(tiles_dir, str(level), f"{col}_{row}.png")) as tile:
+                assert tile.size == (right - left, bottom - top)
+
+
+def test_render_poster_pyramid_downsamples_full_level(small_city, sample_theme, tmp_path):
+    """Test that a lower level is the box-downsampled full-resolution level."""
+    point, graph, water, parks = small_city
+    output_file = str(tmp_path / "city.dzi")
+    
+    render_poster_pyramid("City", "Country", point, graph, water, parks, sample_theme, None,
+                          output_file, dpi=50, figsize=(3, 4), workers=1, tile_size=256)
+    
+    tiles_dir = tiles_dir_for(output_file)
+    with Image.open(os.path.join(tiles_dir, "8", "0_0.png")) as full, \
+         Image.open(os.path.join(tiles_dir, "7", "0_0.png")) as half:
+        expected = np.asarray(full.resize((75, 100), Image.Resampling.BOX))
+        assert np.array_equal(np.asarray(half), expected)
+
+
+def test_render_poster_pyramid_blank_tiles_skip_renderer(small_city, sample_theme, tmp_path, monkeypatch):
+    """Test that tiles with no geometry and no text are written without the renderer."""
+    import src.pyramid as pyramid
+    from src.tiling import render_tile
+
+    rendered = []
+
+    def _render_tile(job):
+        assert not job['blank']
+        rendered.append(job['rect'])
+        return render_tile(job)
+
+    monkeypatch.setattr(pyramid, 'render_tile', _render_tile)
+    point, graph, water, parks = small_city
+    output_file = str(tmp_path / "city.dzi")
+
+    render_poster_pyramid("City", "Country", point, graph, water, parks, sample_theme, None,
+                          output_file, dpi=50, figsize=(3, 4), workers=1, tile_size=16)
+
+    rects = tile_rects(150, 200, 16)
+    blank = [(col, row, rect) for col, row, rect in rects if rect not in rendered]
+    assert 0 < len(blank) < len(rects)
+
+    # A blank tile is exactly what the renderer would have drawn there
+    render_poster_pyramid("City", "Country", point, graph, water, parks, sample_theme, None,
+                          str(tmp_path / "full.dzi"), dpi=50, figsize=(3, 4), workers=1,
+                          tile_size=150 * 2)
+    with Image.open(os.path.join(tiles_dir_for(str(tmp_path / "full.dzi")), "8", "0_0.png")) as full:
+        full = np.asarray(full)
+    for col, row, (left, top, right, bottom) in blank:
+        with Image.open(os.path.join(tiles_dir_for(output_file), "8", f"{col}_{row}.png")) as tile:
+            assert np.array_equal(np.asarray(tile), full[top:bottom, left:right])
+
+
+def test_render_poster_pyramid_odd_level_halves_exactly(small_city, sample_theme, tmp_path):
+    """Test that an odd-sized level is halved per pixel pair, its last column on its own."""
+    point, graph, water, parks = small_city
+    output_file = str(tmp_path / "city.dzi")
+
+    render_poster_pyramid("City", "Country", point, graph, water, parks, sample_theme, None,
+                          output_file, dpi=50, figsize=(3, 4), workers=1, tile_size=256)
+
+    tiles_dir = tiles_dir_for(output_file)
+    with Image.open(os.path.join(tiles_dir, "7", "0_0.png")) as odd, \
+         Image.open(os.path.join(tiles_dir, "6", "0_0.png")) as half:
+        odd = np.asarray(odd).astype(float)
+        half = np.asarray(half).astype(float)
+    assert odd.shape[:2] == (100, 75) and half.shape[:2] == (50, 38)
+    odd = np.pad(odd, ((0, 0), (0, 1), (0, 0)), mode='edge')
+    expected = odd.reshape(50, 2, 38, 2, 3).mean(axis=(1, 3))
+    assert np.abs(half - expected).max() <= 1
@@ -1,13 +1,28 @@
 """Tests for the renderer module."""
 
+import gc
+import os
+import re
+
 import pytest
 import numpy as np
+from PIL import Image
 from unittest.mock import Mock, patch, MagicMock
 from src.renderer import (
+    agg_figure,
     get_edge_colors_by_type,
     get_edge_widths_by_type,
-    calculate_dynamic_font_size
+    calculate_dynamic_font_size,
+    build_fade_overlay,
+    polygon_paths,
+    line_segments,
+    draw_polygon_layer,
+    render_poster
 )
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.path import Path
+from shapely.geometry import LineString, MultiLineString, MultiPolygon, Polygon, box
 
 
 @pytest.fixture
@@ -216,3 +231,189 @@ def test_get_edge_widths_empty_graph():
     
     widths = get_edge_widths_by_type(graph)
     assert widths == []
+
+
+def test_build_fade_overlay_shape_and_color():
+    """Test that the fade overlay covers the poster in the fade color."""
+    overlay = build_fade_overlay((60, 80), '#FF0000')
+    
+    assert overlay.shape == (80, 60, 4)
+    assert overlay.dtype == np.uint8
+    assert (overlay[..., 0] == 255).all()
+    assert (overlay[..., 1:3] == 0).all()
+
+
+def test_build_fade_overlay_alpha():
+    """Test that edges are opaque and the center is clear."""
+    alpha = build_fade_overlay((600, 800), '#FFFFFF')[..., 3]
+    
+    assert alpha[400, 300] == 0
+    assert alpha[0, 300] >= 250
+    assert alpha[799, 300] >= 250
+    assert alpha[400, 0] >= 250
+    assert alpha[400, 599] >= 250
+
+
+def test_build_fade_overlay_corner_blending():
+    """Test that overlapping fades composite like stacked layers."""
+    alpha = build_fade_overlay((100, 100), '#FFFFFF')[..., 3] / 255
+    side_x = alpha[50, 5]
+    side_y = alpha[5, 50]
+    
+    expected = 1 - (1 - side_x) * (1 - side_y)
+    assert abs(alpha[5, 5] - expected) < 2 / 255
+
+
+def test_build_fade_overlay_rect_matches_full():
+    """Test that a sub-rectangle is the same pixels as the full overlay."""
+    full = build_fade_overlay((60, 80), '#123456')
+    part = build_fade_overlay((60, 80), '#123456', (10, 20, 50, 70))
+    
+    assert np.array_equal(part, full[20:70, 10:50])
+
+
+def test_build_fade_overlay_caches_ramps_only():
+    """Test that only the 1-D fade ramps are kept, not the poster-sized overlay."""
+    from src.config import FADE_HEIGHT
+    from src.renderer import _fade_ramp
+
+    first = build_fade_overlay((60, 80), '#FFFFFF')
+    
+    assert build_fade_overlay((60, 80), '#FFFFFF') is not first
+    assert _fade_ramp(80, FADE_HEIGHT) is _fade_ramp(80, FADE_HEIGHT)
+    assert not _fade_ramp(80, FADE_HEIGHT).flags.writeable
+
+
+def test_polygon_paths_one_path_per_polygon():
+    """Test that each polygon part becomes one path with a subpath per ring."""
+    donut = Polygon(box(0, 0, 10, 10).exterior.coords, [box(3, 3, 7, 7).exterior.coords])
+    paths = polygon_paths([donut, MultiPolygon([box(20, 0, 21, 1), box(30, 0, 31, 1)])])
+    
+    assert len(paths) == 3
+    assert [(path.codes == Path.MOVETO).sum() for path in paths] == [2, 1, 1]
+    assert [(path.codes == Path.CLOSEPOLY).sum() for path in paths] == [2, 1, 1]
+    assert paths[1].vertices.min(axis=0).tolist() == [20, 0]
+
+
+def test_line_segments_split_parts():
+    """Test that every line part becomes a segment tagged with its feature."""
+    lines = [LineString([(0, 0), (1, 1), (2, 0)]), LineString(),
+             MultiLineString([[(5, 5), (6, 6)], [(7, 7), (8, 8)]])]
+    segments, feature = line_segments(lines)
+    
+    assert [len(segment) for segment in segments] == [3, 2, 2]
+    assert feature.tolist() == [0, 2, 2]
+    assert segments[2].tolist() == [[7, 7], [8, 8]]
+
+
+def test_polygon_paths_keep_holes_empty():
+    """Test that holes are not filled, whatever the input ring orientation."""
+    # Exterior clockwise and hole counter-clockwise, the opposite of the usual order
+    donut = Polygon(box(0, 0, 10, 10, ccw=False).exterior.coords,
+                    [box(3, 3, 7, 7).exterior.coords])
+    exterior, hole = polygon_paths([donut])[0].to_polygons()
+    assert Polygon(exterior).exterior.is_ccw
+    assert not Polygon(hole).exterior.is_ccw
+    
+    fig = Figure(figsize=(1, 1), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    draw_polygon_layer(ax, [donut], '#000000', zorder=1)
+    ax.set_xlim(0, 10)
+    ax.set_ylim(0, 10)
+    canvas.draw()
+    pixels = np.asarray(canvas.buffer_rgba())
+    
+    assert pixels[90, 10, 0] == 0  # Ring at (1, 1)
+    assert pixels[50, 50, 0] == 255  # Hole at (5, 5)
+
+
+def _render_svg(small_city, theme, path, **options):
+    """Render the small city to SVG and return the document text."""
+    point, graph, water, parks = small_city
+    render_poster("City", "Country", point, graph, water, parks, theme, None,
+                  str(path), "svg", figsize=(3, 4), **options)
+    return path.read_text()
+
+
+def test_render_poster_hybrid_svg_rasterizes_map(small_city, sample_theme, tmp_path):
+    """Test that raster_dpi turns the map layers into one image, text stays vector."""
+    vector = _render_svg(small_city, sample_theme, tmp_path / "vector.svg")
+    hybrid = _render_svg(small_city, sample_theme, tmp_path / "hybrid.svg", raster_dpi=72)
+    
+    # One extra image (the map layers) next to the fade overlay
+    assert hybrid.count('<image') == vector.count('<image') + 1
+    # Road strokes are gone from the vector part, glyphs are not
+    road_color = sample_theme['road_motorway'].lower()
+    assert f'stroke: {road_color}' in vector
+    assert f'stroke: {road_color}' not in hybrid
+    assert re.search(r'<use xlink:href="#[^"]+"', hybrid)
+
+
+def test_render_poster_concurrent_threads(small_city, sample_theme, tmp_path):
+    """Test that posters rendered in parallel threads match sequential renders."""
+    from concurrent.futures import ThreadPoolExecutor
+    point, graph, water, parks = small_city
+    themes = [sample_theme, dict(sample_theme, bg="#000000", text="#FFFFFF")]
+    
+    def _render(index):
+        path = tmp_path / f"poster_{index}.png"
+        render_poster(f"City {index % 2}", "Country", point, graph, water, parks,
+                      themes[index % 2], None, str(path), "png", dpi=40, figsize=(3, 4))
+        with Image.open(path) as image:
+            return np.asarray(image)
+    
+    expected = [_render(index) for index in range(2)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(_render, range(2, 10)))
+    
+    for index, pixels in enumerate(results):
+        assert np.array_equal(pixels, expected[index % 2])
+
+
+def test_agg_figure_cleared_on_error():
+    """Test that a figure is torn down when drawing raises."""
+    with pytest.raises(RuntimeError):
+        with agg_figure(figsize=(1, 1)) as fig:
+            fig.add_axes((0, 0, 1, 1)).plot([0, 1], [0, 1])
+            raise RuntimeError("draw failed")
+    
+    assert fig.axes == []
+    assert not isinstance(fig.canvas, FigureCanvasAgg)
+
+
+def _resident_mb():
+    """Return the resident set size of this process in MB."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason="needs /proc (Linux)")
+def test_render_poster_loop_memory_flat(small_city, sample_theme, tmp_path):
+    """Test that memory stays flat over many successful and failed renders."""
+    point, graph, water, parks = small_city
+    broken_theme = {key: value for key, value in sample_theme.items() if key != 'text'}
+    
+    def _render(index):
+        theme = broken_theme if index % 2 else sample_theme
+        try:
+            render_poster("City", "Country", point, graph, water, parks, theme, None,
+                          str(tmp_path / "poster.png"), "png", dpi=100, figsize=(6, 8))
+        except KeyError:
+            pass
+    
+    for index in range(4):
+        _render(index)
+    # Without the cyclic collector, anything not torn down explicitly stays
+    gc.collect()
+    gc.disable()
+    try:
+        baseline = _resident_mb()
+        for index in range(16):
+            _render(index)
+        growth = _resident_mb() - baseline
+    finally:
+        gc.enable()
+    
+    # A single leaked figure holds a 2 MB pixel buffer
+    assert growth < 12
@@ -0,0 +1,240 @@
+"""Tests for the scene module."""
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import Polygon, box
+
+from src.scene import (
+    normalize_highway,
+    calculate_view_extent,
+    prepare_scene,
+    query_scene,
+    clip_scene,
+    dissolve_polygons,
+    quantize_scene,
+    scene_origin
+)
+
+
+def test_normalize_highway_string():
+    """Test that plain highway strings pass through."""
+    assert normalize_highway('primary') == 'primary'
+
+
+def test_normalize_highway_list():
+    """Test that lists use their first entry."""
+    assert normalize_highway(['motorway', 'trunk']) == 'motorway'
+
+
+def test_normalize_highway_missing():
+    """Test that empty lists and missing values become unclassified."""
+    assert normalize_highway([]) == 'unclassified'
+    assert normalize_highway(None) == 'unclassified'
+    assert normalize_highway(float('nan')) == 'unclassified'
+
+
+def test_calculate_view_extent_matches_figure_aspect():
+    """Test that the extent is padded and grown to the figure aspect ratio."""
+    xmin, xmax, ymin, ymax = calculate_view_extent((0, 0, 100, 100), (12, 16))
+    
+    assert (xmax - xmin) / (ymax - ymin) == pytest.approx(12 / 16)
+    # Width is the limiting side: 100 plus 2% padding on both sides
+    assert xmax - xmin == pytest.approx(104)
+    assert (xmin + xmax) / 2 == pytest.approx(50)
+    assert (ymin + ymax) / 2 == pytest.approx(50)
+
+
+def test_calculate_view_extent_wide_data():
+    """Test that wide data expands vertically."""
+    xmin, xmax, ymin, ymax = calculate_view_extent((0, 0, 400, 100), (12, 16), padding=0)
+    
+    assert xmax - xmin == pytest.approx(400)
+    assert ymax - ymin == pytest.approx(400 * 16 / 12)
+
+
+def test_prepare_scene_layers(small_city):
+    """Test that prepare_scene projects all layers to one metric CRS."""
+    point, graph, water, parks = small_city
+    scene = prepare_scene(graph, water, parks, (12, 16))
+    
+    assert scene['crs'] is not None
+    assert list(scene['roads'].columns) == ['highway', 'geometry']
+    assert len(scene['roads']) == graph.number_of_edges()
+    assert scene['roads'].crs == scene['crs']
+    assert scene['water'].crs == scene['crs']
+    assert len(scene['parks']) == 1
+
+
+def test_prepare_scene_matches_projected_graph(small_city):
+    """Test that roads get the geometry ox.project_graph would give them."""
+    import numpy as np
+    import osmnx as ox
+    import shapely
+    
+    point, graph, water, parks = small_city
+    graph = ox.simplify_graph(graph)
+    scene = prepare_scene(graph, water, parks, (12, 16))
+    expected = ox.graph_to_gdfs(ox.project_graph(graph), nodes=False)
+    
+    assert scene['crs'] == expected.crs
+    roads = scene['roads'].geometry.to_numpy()
+    order = ox.graph_to_gdfs(graph, nodes=False).index.get_indexer(expected.index)
+    np.testing.assert_array_equal(shapely.get_coordinates(roads[order]),
+                                  shapely.get_coordinates(expected.geometry.to_numpy()))
+
+
+def test_prepare_scene_extent_covers_roads(small_city):
+    """Test that the view extent contains all road geometry."""
+    point, graph, water, parks = small_city
+    scene = prepare_scene(graph, water, parks, (12, 16))
+    xmin, xmax, ymin, ymax = scene['extent']
+    left, bottom, right, top = scene['roads'].total_bounds
+    
+    assert xmin < left and right < xmax
+    assert ymin < bottom and top < ymax
+
+
+def test_prepare_scene_without_polygons(small_city):
+    """Test that missing water and parks become None."""
+    point, graph, water, parks = small_city
+    scene = prepare_scene(graph, None, water.iloc[0:0], (12, 16))
+    
+    assert scene['water'] is None
+    assert scene['parks'] is None
+
+
+def test_query_scene_returns_intersecting_geometry(small_city):
+    """Test that query_scene keeps only geometry inside the window."""
+    point, graph, water, parks = small_city
+    scene = prepare_scene(graph, water, parks, (12, 16))
+    xmin, xmax, ymin, ymax = scene['extent']
+    
+    # Bottom strip below the park but over the lake
+    window = (xmin, xmax, ymin, ymin + (ymax - ymin) * 0.3)
+    subset = query_scene(scene, window)
+    
+    assert 0 < len(subset['roads']) < len(scene['roads'])
+    assert len(subset['water']) == 1
+    assert len(subset['parks']) == 0
+    assert subset['extent'] == scene['extent']
+
+
+def test_query_scene_keeps_draw_order(small_city):
+    """Test that the subset preserves the original road order."""
+    point, graph, water, parks = small_city
+    scene = prepare_scene(graph, water, parks, (12, 16))
+    subset = query_scene(scene, scene['extent'])
+    
+    assert list(subset['roads'].index) == sorted(subset['roads'].index)
+    assert len(subset['roads']) == len(scene['roads'])
+
+
+def test_quantize_scene_snaps_to_float32_offsets(small_city):
+    """Test that vertices are snapped to float32 offsets from the poster center, not moved."""
+    import numpy as np
+    import shapely
+
+    point, graph, water, parks = small_city
+    scene = prepare_scene(graph, water, parks, (3, 4))
+    origin = scene_origin(scene)
+
+    quantized = quantize_scene(scene)
+    before = shapely.get_coordinates(scene['roads'].geometry)
+    after = shapely.get_coordinates(quantized['roads'].geometry)
+
+    assert quantized['extent'] == scene['extent']
+    assert list(quantized['roads']['highway']) == list(scene['roads']['highway'])
+    assert np.allclose(after, before, atol=1e-3)
+    assert np.array_equal((after - origin).astype(np.float32).astype(np.float64) + origin, after)
+
+
+@pytest.fixture
+def oversized_scene(small_city):
+    """Scene with a lake reaching far outside the view and a distant road."""
+    import geopandas as gpd
+    from shapely.geometry import LineString, box
+    
+    point, graph, water, parks = small_city
+    scene = prepare_scene(graph, water, parks, (12, 16))
+    xmin, xmax, ymin, ymax = scene['extent']
+    width = xmax - xmin
+    
+    scene['water'] = gpd.GeoSeries([box(xmin - width, ymin, xmin + width / 4, ymax)], crs=scene['crs'])
+    far_road = gpd.GeoDataFrame({'highway': ['primary']},
+                                geometry=[LineString([(xmax + width, ymin), (xmax + 2 * width, ymax)])],
+                                crs=scene['crs'])
+    scene['roads'] = gpd.pd.concat([scene['roads'], far_road], ignore_index=True)
+    return scene
+
+
+def test_clip_scene_cuts_polygons_to_extent(oversized_scene):
+    """Test that polygons are cut at the view extent."""
+    clipped = clip_scene(oversized_scene)
+    xmin, xmax, ymin, ymax = oversized_scene['extent']
+    
+    assert clipped['water'].total_bounds[0] == pytest.approx(xmin)
+    assert clipped['water'].area.sum() < oversized_scene['water'].area.sum()
+
+
+def test_clip_scene_drops_invisible_roads(oversized_scene):
+    """Test that roads outside the view are dropped entirely."""
+    clipped = clip_scene(oversized_scene)
+    
+    assert len(clipped['roads']) == len(oversized_scene['roads']) - 1
+    assert list(clipped['roads'].columns) == ['highway', 'geometry']
+
+
+def test_clip_scene_margin(oversized_scene):
+    """Test that the margin grows the clip rectangle."""
+    clipped = clip_scene(oversized_scene, margin=10)
+    xmin = oversized_scene['extent'][0]
+    
+    assert clipped['water'].total_bounds[0] == pytest.approx(xmin - 10)
+
+
+def test_clip_scene_keeps_visible_geometry(small_city):
+    """Test that geometry inside the view is unchanged."""
+    point, graph, water, parks = small_city
+    scene = prepare_scene(graph, water, parks, (12, 16))
+    clipped = clip_scene(scene)
+    
+    assert len(clipped['roads']) == len(scene['roads'])
+    assert clipped['parks'].geom_equals(scene['parks']).all()
+
+
+def test_dissolve_polygons_merges_overlaps():
+    """Test that overlapping polygons are drawn as one area."""
+    polygons = gpd.GeoSeries([box(0, 0, 10, 10), box(5, 5, 15, 15), box(20, 0, 30, 10)],
+                             crs="EPSG:3857")
+    dissolved = dissolve_polygons(polygons)
+    
+    assert len(dissolved) == 2
+    assert dissolved.crs == polygons.crs
+    assert dissolved.area.sum() == pytest.approx(100 + 100 + 100 - 25)
+    assert (dissolved.geom_type == 'Polygon').all()
+
+
+def test_dissolve_polygons_repairs_invalid():
+    """Test that self-intersecting polygons are repaired before merging."""
+    bowtie = Polygon([(0, 0), (10, 10), (10, 0), (0, 10)])
+    dissolved = dissolve_polygons(gpd.GeoSeries([bowtie, box(20, 0, 30, 10)]))
+    
+    assert dissolved.is_valid.all()
+    assert dissolved.area.sum() == pytest.approx(50 + 100)
+
+
+def test_dissolve_polygons_merges_contained():
+    """Test that a polygon inside another one is absorbed."""
+    polygons = gpd.GeoSeries([box(0, 0, 10, 10), box(2, 2, 4, 4)])
+    dissolved = dissolve_polygons(polygons)
+    
+    assert len(dissolved) == 1
+    assert dissolved.area.sum() == pytest.approx(100)
+
+
+def test_dissolve_polygons_keeps_separate_untouched():
+    """Test that polygons not touching anything pass through unchanged."""
+    polygons = gpd.GeoSeries([box(0, 0, 1, 1), box(5, 5, 6, 6)])
+    dissolved = dissolve_polygons(polygons)
+    
+    assert dissolved.geom_equals(polygons).all()
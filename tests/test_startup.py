@@ -0,0 +1,63 @@
+"""Tests for package import cost and CLI startup time."""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Libraries that only the fetching and rendering stages may load
+HEAVY_MODULES = ['osmnx', 'geopandas', 'matplotlib', 'geopy', 'scipy']
+
+# Wall-clock budget for CLI runs that never fetch or render, in seconds
+# (interpreter start included; loading the heavy stack takes several times this)
+STARTUP_BUDGET = 1.0
+
+
+def _run_python(*args):
+    """Run a fresh interpreter in the project root and return the completed process."""
+    return subprocess.run([sys.executable, *args], cwd=PROJECT_ROOT,
+                          capture_output=True, text=True, timeout=60)
+
+
+def test_import_package_loads_no_heavy_modules():
+    """Test that the package and CLI helpers import without the heavy stack."""
+    code = (
+        "import sys\n"
+        "import src\n"
+        "src.create_parser, src.validate_args, src.parse_resolution, src.DEFAULT_DPI\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = _run_python("-c", code)
+    
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_exports_resolve():
+    """Test that every exported name resolves to its implementation."""
+    import src
+    from src.renderer import render_poster
+    
+    assert src.render_poster is render_poster
+    assert set(src.__all__) <= set(dir(src))
+    with pytest.raises(AttributeError):
+        src.not_an_export
+
+
+@pytest.mark.parametrize("cli_args", [["--help"], ["--list-themes"]])
+def test_cli_startup_within_budget(cli_args):
+    """Test that CLI runs that never render start within the budget."""
+    # Warm the filesystem cache so the timing measures imports, not disk
+    _run_python("create_map_poster.py", *cli_args)
+    
+    start = time.perf_counter()
+    result = _run_python("create_map_poster.py", *cli_args)
+    elapsed = time.perf_counter() - start
+    
+    assert result.returncode == 0, result.stderr
+    assert elapsed < STARTUP_BUDGET, f"startup took {elapsed:.2f}s"
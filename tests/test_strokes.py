@@ -0,0 +1,114 @@
+"""Tests for the strokes module."""
+
+import numpy as np
+import pytest
+
+import geopandas as gpd
+from shapely.geometry import LineString
+
+from src.scene import prepare_scene
+from src.strokes import drop_reverse_duplicates, merge_road_strokes
+from src.tiling import build_tile_jobs, render_tile
+
+
+def _scene(lines, classes):
+    """Build a bare scene from road lines and their highway classes."""
+    roads = gpd.GeoDataFrame({'highway': classes}, geometry=lines, crs="EPSG:3857")
+    return {'crs': roads.crs, 'roads': roads, 'water': None, 'parks': None,
+            'extent': (-100, 100, -100, 100)}
+
+
+def test_drop_reverse_duplicates():
+    """Test that the reverse copy of a two-way street is dropped."""
+    line = LineString([(0, 0), (10, 0), (10, 5)])
+    roads = gpd.GeoDataFrame({'highway': ['primary', 'primary', 'residential']},
+                             geometry=[line, line.reverse(), line.reverse()])
+    
+    deduplicated = drop_reverse_duplicates(roads)
+    assert deduplicated['highway'].tolist() == ['primary', 'residential']
+
+
+def test_merge_joins_same_class_chain():
+    """Test that a chain through two-way joins becomes one stroke."""
+    lines = [LineString([(0, 0), (10, 0)]), LineString([(20, 0), (10, 0)]),
+             LineString([(20, 0), (30, 5)])]
+    merged, stats = merge_road_strokes(_scene(lines, ['primary'] * 3))
+    
+    assert stats == {'segments_before': 3, 'strokes_after': 1}
+    stroke = merged['roads'].geometry.iloc[0]
+    assert list(stroke.coords) in ([(0, 0), (10, 0), (20, 0), (30, 5)],
+                                   [(30, 5), (20, 0), (10, 0), (0, 0)])
+
+
+def test_merge_keeps_class_boundaries():
+    """Test that segments of different classes are not joined."""
+    lines = [LineString([(0, 0), (10, 0)]), LineString([(10, 0), (20, 0)])]
+    merged, stats = merge_road_strokes(_scene(lines, ['primary', 'residential']))
+    
+    assert stats['strokes_after'] == 2
+    assert sorted(merged['roads']['highway']) == ['primary', 'residential']
+
+
+def test_merge_stops_at_intersections_by_default():
+    """Test that three-way joins are not merged without through_intersections."""
+    lines = [LineString([(-10, 0), (0, 0)]), LineString([(0, 0), (10, 0)]),
+             LineString([(0, 0), (0, 10)])]
+    merged, stats = merge_road_strokes(_scene(lines, ['primary'] * 3))
+    
+    assert stats['strokes_after'] == 3
+
+
+def test_merge_through_intersections_straight_only():
+    """Test that straight continuations are joined and turns are not."""
+    # A straight primary crossed by a residential street, plus a sharp primary turn
+    lines = [LineString([(-10, 0), (0, 0)]), LineString([(0, 0), (10, 1)]),
+             LineString([(0, -10), (0, 0)]), LineString([(0, 0), (0, 10)]),
+             LineString([(0, 0), (-8, 6)])]
+    classes = ['primary', 'primary', 'residential', 'residential', 'primary']
+    merged, stats = merge_road_strokes(_scene(lines, classes), through_intersections=True)
+    
+    roads = merged['roads']
+    assert stats['strokes_after'] == 3
+    primary = roads[roads['highway'] == 'primary'].geometry
+    assert sorted(len(line.coords) for line in primary) == [2, 3]
+    assert (roads[roads['highway'] == 'residential'].geometry.length == 20).all()
+
+
+def test_merge_closed_loop():
+    """Test that a ring of segments becomes one closed stroke."""
+    corners = [(0, 0), (10, 0), (10, 10), (0, 10)]
+    lines = [LineString([corners[i], corners[(i + 1) % 4]]) for i in range(4)]
+    merged, stats = merge_road_strokes(_scene(lines, ['residential'] * 4))
+    
+    assert stats['strokes_after'] == 1
+    assert merged['roads'].geometry.iloc[0].is_closed
+    assert merged['roads'].geometry.length.sum() == pytest.approx(40)
+
+
+def test_merge_empty_roads():
+    """Test that an empty road layer is returned unchanged."""
+    scene = _scene([], [])
+    merged, stats = merge_road_strokes(scene)
+    
+    assert merged is scene
+    assert stats == {'segments_before': 0, 'strokes_after': 0}
+
+
+def test_merge_small_city_same_picture(small_city, sample_theme):
+    """Test that merged strokes render like the original segments."""
+    point, graph, water, parks = small_city
+    scene = prepare_scene(graph, water, parks, (3, 4))
+    merged, stats = merge_road_strokes(scene, through_intersections=True)
+    assert stats['strokes_after'] < stats['segments_before'] / 5
+    
+    poster_size = (150, 200)
+    context = {'theme': sample_theme, 'fonts': None, 'city': 'City', 'country': 'Country',
+               'point': point, 'figsize': (3, 4), 'dpi': 50}
+    
+    def _render(scene):
+        job = next(build_tile_jobs(scene, [(0, 0) + poster_size], poster_size, context))
+        return render_tile(job).astype(int)
+    
+    diff = np.abs(_render(scene) - _render(merged))
+    # Only the stacking of crossing strokes and line caps may differ
+    assert (diff > 16).mean() < 0.01
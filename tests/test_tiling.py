@@ -0,0 +1,177 @@
+"""Tests for the tiling module."""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.payload import is_slim_payload
+from src.renderer import build_scene
+from src.tiling import (
+    PNGStreamWriter,
+    build_tile_jobs,
+    crop_pixel_rect,
+    plan_bands,
+    pixel_window,
+    render_poster_crop,
+    render_poster_tiled
+)
+
+
+def test_plan_bands_covers_height():
+    """Test that bands cover every row exactly once."""
+    bands = plan_bands(1000, 300)
+    
+    assert bands[0] == (0, 300)
+    assert bands[-1] == (900, 1000)
+    assert sum(end - start for start, end in bands) == 1000
+
+
+def test_plan_bands_even_offsets():
+    """Test that odd band heights are rounded up so offsets stay even."""
+    bands = plan_bands(100, 23)
+    
+    assert all(start % 2 == 0 for start, end in bands)
+    assert bands[0] == (0, 24)
+
+
+def test_pixel_window_top_band():
+    """Test that the first band maps to the top of the extent."""
+    window = pixel_window((0, 10, 0, 100), (10, 100), (0, 0, 10, 25))
+    
+    assert window == pytest.approx((0, 10, 75, 100))
+
+
+def test_pixel_window_tile():
+    """Test that a tile rect maps to its part of the extent."""
+    window = pixel_window((0, 100, 0, 200), (50, 100), (25, 50, 50, 100))
+    
+    assert window == pytest.approx((50, 100, 0, 100))
+
+
+def test_png_stream_writer_roundtrip(tmp_path):
+    """Test that streamed bands decode to the original image."""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size=(50, 40, 3), dtype=np.uint8)
+    path = tmp_path / "stream.png"
+    
+    with PNGStreamWriter(path, 40, 50, dpi=300) as writer:
+        for start in range(0, 50, 16):
+            writer.write_rows(image[start:start + 16])
+    
+    with Image.open(path) as decoded:
+        assert decoded.mode == 'RGB'
+        assert np.array_equal(np.asarray(decoded), image)
+        assert round(decoded.info['dpi'][0]) == 300
+
+
+def test_png_stream_writer_rejects_wrong_width(tmp_path):
+    """Test that rows of the wrong width are rejected."""
+    with pytest.raises(ValueError):
+        with PNGStreamWriter(tmp_path / "bad.png", 40, 10) as writer:
+            writer.write_rows(np.zeros((10, 30, 3), dtype=np.uint8))
+
+
+def test_png_stream_writer_incomplete(tmp_path):
+    """Test that closing before all rows are written raises."""
+    writer = PNGStreamWriter(tmp_path / "short.png", 4, 10)
+    writer.write_rows(np.zeros((5, 4, 3), dtype=np.uint8))
+    
+    with pytest.raises(ValueError, match="incomplete"):
+        writer.close()
+
+
+def test_render_poster_tiled_rejects_vector_formats(small_city, sample_theme, tmp_path):
+    """Test that tiled rendering is PNG only."""
+    point, graph, water, parks = small_city
+    
+    with pytest.raises(ValueError, match="PNG"):
+        render_poster_tiled("City", "Country", point, graph, water, parks,
+                            sample_theme, None, str(tmp_path / "out.svg"), "svg")
+
+
+def test_render_poster_tiled_band_seams(small_city, sample_theme, tmp_path):
+    """Test that many small bands in a pool match a single-band render."""
+    point, graph, water, parks = small_city
+    single = tmp_path / "single.png"
+    banded = tmp_path / "banded.png"
+    
+    render_poster_tiled("City", "Country", point, graph, water, parks, sample_theme, None,
+                        str(single), "png", dpi=50, figsize=(3, 4), workers=1, band_height=200)
+    render_poster_tiled("City", "Country", point, graph, water, parks, sample_theme, None,
+                        str(banded), "png", dpi=50, figsize=(3, 4), workers=2, band_height=23)
+    
+    with Image.open(single) as a, Image.open(banded) as b:
+        assert a.size == b.size == (150, 200)
+        diff = np.abs(np.asarray(a).astype(int) - np.asarray(b).astype(int))
+    
+    # Only the fade resampling may differ, by a couple of levels
+    assert diff.max() <= 4
+
+
+def test_render_poster_tiled_threads_match_processes(small_city, sample_theme, tmp_path):
+    """Test that bands rendered in a thread pool match the process pool."""
+    point, graph, water, parks = small_city
+    processes = tmp_path / "processes.png"
+    threads = tmp_path / "threads.png"
+    
+    render_poster_tiled("City", "Country", point, graph, water, parks, sample_theme, None,
+                        str(processes), "png", dpi=50, figsize=(3, 4), workers=2, band_height=40)
+    render_poster_tiled("City", "Country", point, graph, water, parks, sample_theme, None,
+                        str(threads), "png", dpi=50, figsize=(3, 4), workers=4, band_height=40,
+                        threads=True)
+    
+    with Image.open(processes) as a, Image.open(threads) as b:
+        assert np.array_equal(np.asarray(a), np.asarray(b))
+
+
+def test_build_tile_jobs_packs_scene(small_city, sample_theme):
+    """Test that packed tile jobs carry a packed scene and render the same pixels."""
+    from src.tiling import render_tile
+
+    point, graph, water, parks = small_city
+    scene = build_scene(graph, water, parks, figsize=(3, 4), dpi=50)
+    context = {'theme': sample_theme, 'figsize': (3, 4), 'dpi': 50, 'typography': False}
+    rects = [(0, 0, 150, 100)]
+
+    plain = next(build_tile_jobs(scene, rects, (150, 200), context))
+    packed = next(build_tile_jobs(scene, rects, (150, 200), context, pack=True))
+
+    assert is_slim_payload(packed['scene'])
+    assert np.array_equal(render_tile(plain), render_tile(packed))
+
+
+def test_crop_pixel_rect_even_edges():
+    """Test that crop windows grow outward to even pixel edges."""
+    assert crop_pixel_rect((0.1, 0.25, 0.5, 0.5), (150, 200)) == (14, 50, 76, 100)
+    assert crop_pixel_rect((0, 0, 1, 1), (151, 201)) == (0, 0, 151, 201)
+
+
+def test_render_poster_crop_matches_full_render(small_city, sample_theme, tmp_path):
+    """Test that a crop reproduces the same window of the full poster."""
+    point, graph, water, parks = small_city
+    full = tmp_path / "full.png"
+    crop = tmp_path / "crop.png"
+    window = (0.33, 0.41, 0.97, 0.93)
+    
+    render_poster_tiled("City", "Country", point, graph, water, parks, sample_theme, None,
+                        str(full), "png", dpi=50, figsize=(3, 4), workers=1)
+    render_poster_crop("City", "Country", point, graph, water, parks, sample_theme, None,
+                       str(crop), "png", window, dpi=50, figsize=(3, 4))
+    
+    left, top, right, bottom = crop_pixel_rect(window, (150, 200))
+    with Image.open(full) as a, Image.open(crop) as b:
+        assert b.size == (right - left, bottom - top)
+        expected = np.asarray(a).astype(int)[top:bottom, left:right]
+        diff = np.abs(np.asarray(b).astype(int) - expected)
+    
+    # Text included; only antialiased edges may round differently
+    assert diff.max() <= 1
+
+
+def test_render_poster_crop_rejects_vector_formats(small_city, sample_theme, tmp_path):
+    """Test that crop rendering is PNG only."""
+    point, graph, water, parks = small_city
+    
+    with pytest.raises(ValueError, match="PNG"):
+        render_poster_crop("City", "Country", point, graph, water, parks, sample_theme, None,
+                           str(tmp_path / "out.pdf"), "pdf", (0, 0, 1, 1))
@@ -6,8 +6,10 @@ from pathlib import Path
 from datetime import datetime
 import numpy as np
 from src.utils import (
+    lazy_import,
     generate_output_filename,
     parse_resolution,
+    parse_crop,
     calculate_dpi_from_resolution,
     calculate_bbox
 )
@@ -91,6 +93,27 @@ def test_parse_resolution_invalid_format():
         parse_resolution("invalid")
 
 
+def test_parse_crop_valid():
+    """Test parsing valid crop windows."""
+    assert parse_crop("0.4,0.3,0.6,0.5") == (0.4, 0.3, 0.6, 0.5)
+    assert parse_crop("0,0,1,1") == (0.0, 0.0, 1.0, 1.0)
+
+
+def test_parse_crop_invalid():
+    """Test that malformed or empty crop windows raise ValueError."""
+    with pytest.raises(ValueError, match="format"):
+        parse_crop("0.4,0.3,0.6")
+    
+    with pytest.raises(ValueError, match="format"):
+        parse_crop("a,b,c,d")
+    
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        parse_crop("0.6,0.3,0.4,0.5")
+    
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        parse_crop("0,0,1.5,1")
+
+
 def test_parse_resolution_negative_values():
     """Test parsing resolution with negative values raises ValueError."""
     with pytest.raises(ValueError, match="positive"):
@@ -215,3 +238,22 @@ def test_calculate_bbox_southern_hemisphere():
     assert north < 0
     # But north should still be greater than south
     assert north > south
+
+
+def test_lazy_import_defers_loading(tmp_path, monkeypatch):
+    """Test that a lazily imported module runs only on first attribute access."""
+    import sys
+    marker = tmp_path / "loaded"
+    (tmp_path / "lazy_probe.py").write_text(
+        f"open({str(marker)!r}, 'w').close()\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    
+    try:
+        module = lazy_import('lazy_probe')
+        assert not marker.exists()
+        
+        assert module.VALUE == 42
+        assert marker.exists()
+        assert lazy_import('lazy_probe') is module
+    finally:
+        sys.modules.pop('lazy_probe', None)
@@ -0,0 +1,195 @@
+"""Tests for the vector module."""
+
+import re
+import xml.etree.ElementTree as ET
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import LineString, Polygon, box
+
+from src.vector import (
+    road_classes,
+    line_path,
+    pixel_grid,
+    svg_path_data,
+    SVGStreamWriter,
+    render_poster_pdf,
+    render_poster_vector
+)
+
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+def _decode(data):
+    """Turn relative SVG path data back into absolute subpaths."""
+    subpaths = []
+    x = y = 0
+    for command, numbers in re.findall(r'([mlz])([^mlz]*)', data):
+        values = [int(value) for value in numbers.split()]
+        pairs = list(zip(values[0::2], values[1::2]))
+        if command == 'm':
+            x, y = x + pairs[0][0], y + pairs[0][1]
+            subpaths.append([(x, y)])
+            pairs = pairs[1:]
+        elif command == 'z':
+            x, y = subpaths[-1][0]
+            continue
+        for dx, dy in pairs:
+            x, y = x + dx, y + dy
+            subpaths[-1].append((x, y))
+    return subpaths
+
+
+def test_road_classes_thinnest_first():
+    """Test that major roads come last so they are drawn on top."""
+    roads = gpd.GeoDataFrame({'highway': ['motorway', 'residential', 'primary', 'footway']},
+                             geometry=[LineString([(0, 0), (1, 1)])] * 4)
+    
+    assert road_classes(roads) == ['residential', 'footway', 'primary', 'motorway']
+
+
+def test_line_path_subpaths():
+    """Test that every line starts a new subpath."""
+    path = line_path([LineString([(0, 0), (1, 0), (1, 1)]), LineString([(5, 5), (6, 6)])])
+    
+    assert path.codes.tolist() == [1, 2, 2, 1, 2]
+
+
+def test_line_path_snaps_to_grid():
+    """Test that vertices are rounded to the grid and collapsed points dropped."""
+    grid = pixel_grid((10, 110, 0, 50), (100, 100))
+    lines = [LineString([(10.2, 0.1), (10.3, 0.2), (15.6, 0.26)]), LineString([(50, 20), (50.1, 20.1)])]
+    
+    path = line_path(lines, grid)
+    
+    assert grid == ((10, 0), (1.0, 0.5))
+    assert path.vertices.tolist() == [[10, 0], [16, 0.5]]
+    assert path.codes.tolist() == [1, 2]
+
+
+def test_svg_path_data_lines_round_trip():
+    """Test that lines land on the grid, top-down, as relative commands."""
+    lines = [LineString([(0, 100), (10, 100), (10, 90)]), LineString([(50, 50), (60, 40)])]
+    data = svg_path_data(lines, (0, 100, 0, 100), (100, 100), 0.5)
+    
+    assert data.startswith('m0 0l20 0 0 20')
+    assert _decode(data) == [[(0, 0), (20, 0), (20, 20)], [(100, 100), (120, 120)]]
+
+
+def test_svg_path_data_drops_collapsed_points():
+    """Test that points closer than one grid step are merged or dropped."""
+    lines = [LineString([(0, 0), (0.1, 0), (5, 0)]), LineString([(20, 20), (20.1, 20.1)])]
+    data = svg_path_data(lines, (0, 100, 0, 100), (100, 100), 1)
+    
+    assert _decode(data) == [[(0, 100), (5, 100)]]
+
+
+def test_svg_path_data_rings_closed():
+    """Test that polygon rings, holes included, are closed with z."""
+    donut = Polygon(box(0, 0, 10, 10).exterior.coords, [box(4, 4, 6, 6).exterior.coords])
+    data = svg_path_data([donut], (0, 10, 0, 10), (10, 10), 1, closed=True)
+    
+    assert data.count('z') == 2
+    outer, hole = _decode(data)
+    assert len(outer) == len(hole) == 4
+    assert set(outer) == {(0, 0), (10, 0), (10, 10), (0, 10)}
+    assert set(hole) == {(4, 4), (6, 4), (6, 6), (4, 6)}
+
+
+def test_svg_path_data_empty():
+    """Test that nothing to draw gives empty path data."""
+    assert svg_path_data([], (0, 1, 0, 1), (1, 1), 1) == ''
+
+
+def test_svg_stream_writer_document(tmp_path):
+    """Test that the streamed document is valid SVG with scaled groups."""
+    path = tmp_path / "out.svg"
+    with SVGStreamWriter(path, (72, 144), 0.24) as writer:
+        writer.write_background('#FFFFFF')
+        writer.begin_group(scaled=True, stroke='#000000', stroke_width=2)
+        writer.write_path('m0 0l10 0')
+        writer.write_path('')
+        writer.end_group()
+    
+    root = ET.parse(path).getroot()
+    assert root.get('width') == '72pt'
+    assert root.get('viewBox') == '0 0 72 144'
+    group = root.find(f'{SVG}g')
+    assert group.get('transform') == 'scale(0.24)'
+    assert group.get('stroke-width') == '2'
+    assert len(group.findall(f'{SVG}path')) == 1
+
+
+def test_render_poster_vector_svg(small_city, sample_theme, tmp_path):
+    """Test that the compact SVG has one group per road class and the overlay."""
+    point, graph, water, parks = small_city
+    output = tmp_path / "poster.svg"
+    render_poster_vector("City", "Country", point, graph, water, parks, sample_theme, None,
+                         str(output), "svg", dpi=100, figsize=(3, 4))
+    
+    root = ET.parse(output).getroot()
+    assert root.get('width') == '216pt'
+    groups = root.findall(f'{SVG}g')
+    water_group, roads_group, parks_group, overlay = groups[0], groups[1], groups[2], root.find(f'{SVG}svg')
+    assert water_group.get('fill') == sample_theme['water'].lower()
+    assert parks_group.get('fill') == sample_theme['parks'].lower()
+    strokes = [group.get('stroke') for group in roads_group.findall(f'{SVG}g')]
+    assert strokes[-1] == sample_theme['road_motorway'].lower()
+    assert len(strokes) == 6
+    # Fades and typography come from matplotlib, sized to the page
+    assert overlay.get('width') == '216'
+    assert overlay.find(f'.//{SVG}image') is not None
+
+
+def test_render_poster_vector_dedupes_two_way_streets(small_city, sample_theme, tmp_path):
+    """Test that both directions of a street are written once."""
+    point, graph, water, parks = small_city
+    one_way = tmp_path / "one_way.svg"
+    two_way = tmp_path / "two_way.svg"
+    render_poster_vector("City", "Country", point, graph, water, parks, sample_theme, None,
+                         str(one_way), "svg", dpi=100, figsize=(3, 4))
+    for u, v, data in list(graph.edges(data=True)):
+        graph.add_edge(v, u, **data)
+    render_poster_vector("City", "Country", point, graph, water, parks, sample_theme, None,
+                         str(two_way), "svg", dpi=100, figsize=(3, 4))
+    
+    def _road_data(path):
+        roads_group = ET.parse(path).getroot().findall(f'{SVG}g')[1]
+        return sum(len(_decode(p.get('d'))) for p in roads_group.iter(f'{SVG}path'))
+    
+    assert _road_data(two_way) == _road_data(one_way)
+
+
+def test_render_poster_vector_pdf(small_city, sample_theme, tmp_path):
+    """Test that compact PDF output is written."""
+    point, graph, water, parks = small_city
+    output = tmp_path / "poster.pdf"
+    render_poster_vector("City", "Country", point, graph, water, parks, sample_theme, None,
+                         str(output), "pdf", dpi=100, figsize=(3, 4))
+    
+    assert output.read_bytes().startswith(b'%PDF')
+
+
+def test_render_poster_pdf_snapped_is_smaller(small_city, sample_theme, tmp_path):
+    """Test that rounding map vertices to the print grid shrinks the PDF."""
+    from src.renderer import build_scene
+
+    point, graph, water, parks = small_city
+    scene = build_scene(graph, water, parks, (3, 4), 100)
+    exact = tmp_path / "exact.pdf"
+    snapped = tmp_path / "snapped.pdf"
+    
+    render_poster_pdf("City", "Country", point, scene, sample_theme, None, str(exact), (3, 4))
+    render_poster_pdf("City", "Country", point, scene, sample_theme, None, str(snapped), (3, 4), dpi=100)
+    
+    assert snapped.stat().st_size < exact.stat().st_size
+
+
+def test_render_poster_vector_rejects_png(small_city, sample_theme, tmp_path):
+    """Test that raster formats are rejected."""
+    point, graph, water, parks = small_city
+    
+    with pytest.raises(ValueError, match="SVG and PDF"):
+        render_poster_vector("City", "Country", point, graph, water, parks, sample_theme, None,
+                             str(tmp_path / "out.png"), "png")